@@ -43,14 +43,22 @@ ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), La
 debuggingThisModule = False
 
 
-import sys, os, logging
+import sys, os, logging, re
+from io import StringIO
 import multiprocessing
 import time
-from collections import defaultdict
+import bisect, heapq
+import pickle, hashlib
+from array import array
+import threading, queue
+from collections import defaultdict, Counter
+from itertools import compress
+from operator import and_
 
 import tkinter as tk
 
 # Biblelator imports
+from BiblelatorGlobals import APP_NAME, DATA_FOLDER_NAME, findHomeFolderPath
 from TextBoxes import TRAILING_SPACE_SUBSTITUTE, MULTIPLE_SPACE_SUBSTITUTE
 
 # BibleOrgSys imports
@@ -64,6 +72,15 @@ from USFMMarkers import USFM_PRINTABLE_MARKERS
 AVOID_BOOKS = ( 'FRT', 'BAK', 'GLS', 'XXA','XXB','XXC','XXD','XXE','XXF','XXG', 'NDX', 'UNK', )
 END_CHARS_TO_REMOVE = ',—.–!?”:;' # NOTE: This intentionally doesn't include close parenthesis and similar
 HUNSPELL_DICTIONARY_FOLDERS = ( '/usr/share/hunspell/', )
+MAX_AUTOCOMPLETE_CANDIDATES = 50 # Maximum number of words offered in the pop-up box
+PRECOMPUTED_PREFIX_LENGTH = 4 # Short prefixes match lots of words so their candidates are found while loading
+RECENCY_DECAY = 0.9 # How quickly the boost for a word that the user typed fades as they type other words
+CURRENT_BOOK_WEIGHT = 3 # Each word in the current book counts higher so appears higher in the list
+WORD_COUNTS_CACHE_FOLDER_NAME = 'AutocompleteWordCounts/' # One file per book inside the project's Biblelator folder
+WORD_COUNTS_CACHE_VERSION = 2 # Increment this whenever countBookWords changes what it counts
+BIBLE_PHRASE_THRESHOLD = 9 # Phrases must be used more often than this to be offered
+BIBLE_BOOK_PHRASE_THRESHOLD = 4 # Same for when only the current book is loaded
+PHRASE_SKETCH_WIDTH, PHRASE_SKETCH_DEPTH = 1 << 20, 4 # Gives 16MB of approximate phrase counters
 
 
 
@@ -83,6 +100,349 @@ def exp( messageString ):
 
 
 
+class AutocompleteWordIndex:
+    """
+    A prefix index for the autocomplete words of an edit window.
+
+    All the words are kept in a sorted list so that the words starting with any given prefix
+        form a single slice which can be found with two binary searches.
+    Each word also has a rank (smaller numbers are better, i.e., more likely)
+        which is used to choose the candidates for a prefix.
+        Words typed by the user are given negative ranks so that they're always chosen.
+    The chosen candidates are then put into order by getScore
+        which combines the frequency of the word (from its loaded rank)
+        with how recently the user typed it.
+
+    The best candidates for each prefix are cached.
+        The short prefixes (which can match many thousands of words) are all worked out
+        as the words are loaded so that no lookup has to scan a large part of the list.
+    """
+    def __init__( self, maxCandidates=MAX_AUTOCOMPLETE_CANDIDATES ):
+        """
+        """
+        self.maxCandidates = maxCandidates
+        self.clear()
+    # end of AutocompleteWordIndex.__init__
+
+
+    def clear( self ):
+        """
+        Remove all words from the index.
+        """
+        self.sortedWords = [] # All the words in code-point order (for bisecting)
+        self.wordRanks = {} # Rank for each word -- smaller is better
+        self.prefixCache = {} # Best (maxCandidates+1) words for a prefix in rank order
+        self.bestRank, self.worstRank = 0, -1 # The first loaded word will get rank 0
+        self.typedWords = {} # Use number and loaded rank (or None) for each word that the user typed
+        self.lastUseNumber = 0
+        # The following are only used if the words were counted from Bible books
+        self.bookWordCounts = None # Unweighted word counts for each book (if kept in memory)
+        self.wordCounts = {} # Weighted total counts (only for the wanted words)
+        self.negatedRankCounts = [] # Total count (negated so it's increasing) for each loaded rank
+        self.weightedBBB = self.phraseThreshold = None
+    # end of AutocompleteWordIndex.clear
+
+
+    def __len__( self ): return len( self.wordRanks )
+    def __contains__( self, word ): return word in self.wordRanks
+    def __iter__( self ): return iter( self.sortedWords )
+
+
+    def setWords( self, wordList, append=False ):
+        """
+        Load the words (which should already be in order with the most likely words first).
+
+        If append is set, the new words are ranked after any existing words.
+        """
+        if not append: self.clear()
+
+        for word in wordList:
+            if word not in self.wordRanks:
+                self.worstRank += 1
+                self.wordRanks[word] = self.worstRank
+        self.sortedWords = sorted( self.wordRanks )
+
+        # Work out the best words for all the short prefixes in one pass through the ranked words
+        self.prefixCache = {}
+        for word in sorted( self.wordRanks, key=self.wordRanks.__getitem__ ):
+            for prefixLength in range( 1, min( len(word), PRECOMPUTED_PREFIX_LENGTH ) + 1 ):
+                prefix = word[:prefixLength]
+                try: bestWords = self.prefixCache[prefix]
+                except KeyError: self.prefixCache[prefix] = [word]
+                else:
+                    if len(bestWords) <= self.maxCandidates: bestWords.append( word )
+    # end of AutocompleteWordIndex.setWords
+
+
+    def setWordCounts( self, wordCounts, weightedBBB, phraseThreshold, bookWordCounts=None ):
+        """
+        Remember the word counts that the loaded words were ranked by
+            so that the ranking can be updated later by updateBookWordCounts.
+
+        bookWordCounts (the unweighted counts for each book) is only kept if it's given
+            (otherwise the caller must supply the previous counts for a book when updating it).
+
+        Must be called after setWords.
+        """
+        self.bookWordCounts, self.wordCounts = bookWordCounts, wordCounts
+        self.weightedBBB, self.phraseThreshold = weightedBBB, phraseThreshold
+        self.negatedRankCounts = [-wordCounts.get( word, 0 ) for word in sorted( self.wordRanks, key=self.wordRanks.__getitem__ )]
+    # end of AutocompleteWordIndex.setWordCounts
+
+
+    def updateBookWordCounts( self, BBB, oldCounts, newCounts, minLength ):
+        """
+        Replace the old word counts for the book with the new counts
+            and adjust (only) the words whose counts have changed.
+
+        Words which are no longer used are removed,
+            and words which have been typed by the user keep their (recent) rank.
+        Note that phrases which weren't wanted when the words were loaded have no total count,
+            so they're only added if they're now common enough in this book alone.
+
+        If oldCounts is None (we don't know what's already in the totals for this book),
+            nothing is changed (rather than counting the book twice).
+
+        Returns a list of the words that were added.
+        """
+        if self.phraseThreshold is None: return [] # The words weren't counted from a Bible
+        if oldCounts is None: return []
+        weight = CURRENT_BOOK_WEIGHT if BBB==self.weightedBBB else 1
+        changedWords = [word for word,count in oldCounts.items() if newCounts.get( word ) != count]
+        changedWords.extend( word for word in newCounts if word not in oldCounts )
+
+        addedWords = []
+        for word in changedWords:
+            if len(word) < minLength: continue
+            newTotal = self.wordCounts.get( word, 0 ) + ( newCounts.get( word, 0 ) - oldCounts.get( word, 0 ) ) * weight
+            if newTotal > 0: self.wordCounts[word] = newTotal
+            else: self.wordCounts.pop( word, None )
+            if newTotal > 0 and (' ' not in word or newTotal > self.phraseThreshold):
+                if word not in self.wordRanks:
+                    bisect.insort( self.sortedWords, word )
+                    addedWords.append( word )
+                # Slot the word in just before the loaded words with the same count
+                newRank = max( bisect.bisect_left( self.negatedRankCounts, -newTotal ) - 0.5, 0 )
+                if word in self.typedWords: # leave it near the top but update its frequency
+                    self.typedWords[word] = self.typedWords[word][0], newRank
+                    continue
+                self.wordRanks[word] = newRank
+            elif word in self.wordRanks: # it's not wanted any more
+                if word in self.typedWords: # but they typed it so it loses its frequency but stays
+                    self.typedWords[word] = self.typedWords[word][0], None
+                    continue
+                del self.sortedWords[bisect.bisect_left( self.sortedWords, word )]
+                del self.wordRanks[word]
+            else: continue
+            self._updatePrefixes( word )
+        if self.bookWordCounts is not None: self.bookWordCounts[BBB] = newCounts
+        return addedWords
+    # end of AutocompleteWordIndex.updateBookWordCounts
+
+
+    def _updatePrefixes( self, word ):
+        """
+        The rank of this word has changed (or it's been added or removed)
+            so move it to its new place in the cached candidates for all the prefixes of the word
+            (which is quick because those lists never have more than maxCandidates+1 entries).
+
+        If that can't be done without looking at the other words
+            (because the word has dropped out of a full list so some other word should take its place),
+            the candidates for that prefix are forgotten (and worked out again when next needed).
+        """
+        rank = self.wordRanks.get( word ) # None if it's been removed
+        for prefixLength in range( 1, len(word)+1 ):
+            prefix = word[:prefixLength]
+            try: bestWords = self.prefixCache[prefix]
+            except KeyError: continue
+            isFull = len(bestWords) > self.maxCandidates # so there might be other words with the prefix
+            try: bestWords.remove( word ); wasInList = True
+            except ValueError: wasInList = False
+            if rank is not None:
+                index = bisect.bisect_right( [self.wordRanks[bestWord] for bestWord in bestWords], rank )
+                if not isFull or index < len(bestWords):
+                    bestWords.insert( index, word )
+                    if len(bestWords) > self.maxCandidates+1: bestWords.pop() # Keep the list the same length
+                    continue
+            if isFull and wasInList: del self.prefixCache[prefix] # We don't know which word comes next
+    # end of AutocompleteWordIndex._updatePrefixes
+
+
+    def _getBestWords( self, prefix ):
+        """
+        Returns a list of up to maxCandidates+1 words starting with the prefix
+            (which may include the prefix itself) in rank order.
+        """
+        try: return self.prefixCache[prefix]
+        except KeyError: pass
+
+        startIndex = bisect.bisect_left( self.sortedWords, prefix )
+        # Every word starting with the prefix sorts before the prefix with its last character incremented
+        endIndex = bisect.bisect_left( self.sortedWords, prefix[:-1] + chr( ord(prefix[-1]) + 1 ), startIndex )
+        bestWords = heapq.nsmallest( self.maxCandidates+1, self.sortedWords[startIndex:endIndex], key=self.wordRanks.__getitem__ )
+        self.prefixCache[prefix] = bestWords
+        return bestWords
+    # end of AutocompleteWordIndex._getBestWords
+
+
+    def getScore( self, word ):
+        """
+        Returns a score for the word (larger is better)
+            which is the sum of a frequency part and a recency part (each from 0 to 1).
+
+        The frequency part assumes that the loaded words follow Zipf's law,
+            i.e., that the word with rank r is used 1/(r+1) times as often as the first word.
+        The recency part is 1 for the word typed most recently,
+            and fades by RECENCY_DECAY for each word typed since then.
+        """
+        try: useNumber, rank = self.typedWords[word]
+        except KeyError: return 1 / ( self.wordRanks[word] + 1 )
+        recency = RECENCY_DECAY ** ( self.lastUseNumber - useNumber )
+        return recency if rank is None else recency + 1 / ( rank + 1 )
+    # end of AutocompleteWordIndex.getScore
+
+
+    def getCandidates( self, prefix, maxCount=None ):
+        """
+        Returns a list of the best words which start with (but are longer than) the given prefix,
+            with the best scoring words first.
+
+        Only the (bounded) list of words chosen for the prefix is scored
+            so this doesn't depend on how many words start with the prefix.
+        """
+        if not prefix: return []
+        if maxCount is None: maxCount = self.maxCandidates
+        return heapq.nlargest( maxCount, (word for word in self._getBestWords( prefix ) if word != prefix), key=self.getScore )
+    # end of AutocompleteWordIndex.getCandidates
+
+
+    def promoteWord( self, word ):
+        """
+        Adds the word if necessary and gives it the best rank
+            so that it's always a candidate (and scores highly) next time.
+
+        Rather than throwing away the cached candidates for the prefixes of the word,
+            the word is just moved to the front of them
+            (which is quick because those lists never have more than maxCandidates+1 entries).
+        """
+        if word in self.typedWords: loadedRank = self.typedWords[word][1]
+        elif word in self.wordRanks: loadedRank = self.wordRanks[word]
+        else:
+            bisect.insort( self.sortedWords, word )
+            loadedRank = None
+        self.lastUseNumber += 1
+        self.typedWords[word] = self.lastUseNumber, loadedRank
+        self.bestRank -= 1
+        self.wordRanks[word] = self.bestRank
+
+        for prefixLength in range( 1, len(word)+1 ):
+            try: bestWords = self.prefixCache[word[:prefixLength]]
+            except KeyError: continue
+            try: bestWords.remove( word )
+            except ValueError: # it wasn't one of the best words
+                if len(bestWords) > self.maxCandidates: bestWords.pop() # Keep the list the same length
+            bestWords.insert( 0, word )
+    # end of AutocompleteWordIndex.promoteWord
+
+
+    def copyPromotedWords( self, otherIndex ):
+        """
+        Promote the words that the user has typed into another index
+            (keeping them in the same order).
+        """
+        for word in sorted( otherIndex.typedWords, key=otherIndex.typedWords.__getitem__ ):
+            self.promoteWord( word )
+    # end of AutocompleteWordIndex.copyPromotedWords
+# end of class AutocompleteWordIndex
+
+
+
+class PhraseModel:
+    """
+    Counts the phrases (multi-word sequences) of many books in bounded memory.
+
+    Each word is given an integer id and each phrase is packed into a single integer key.
+    All phrases are counted approximately in a count-min sketch (a fixed size table of counters)
+        and a phrase is only counted exactly once its estimated count reaches promoteCount.
+    Because the sketch can only overestimate, no phrase which really reaches promoteCount is lost,
+        although an unlucky phrase might be counted a little higher than it should be.
+    """
+    ID_BITS = 24 # Allows for up to 16 million different words
+
+    def __init__( self, promoteCount, width=PHRASE_SKETCH_WIDTH, depth=PHRASE_SKETCH_DEPTH ):
+        """
+        """
+        self.promoteCount, self.width = promoteCount, width
+        self.wordIds, self.words = {}, [None] # Zero isn't used as an id so that keys can be unpacked
+        self.sketch = [array( 'I', bytes( array( 'I' ).itemsize * width ) ) for row in range( depth )]
+        self.exactCounts = {} # Indexed by packed phrase key
+    # end of PhraseModel.__init__
+
+
+    def __len__( self ): return len( self.exactCounts )
+
+
+    def _getKey( self, phrase ):
+        """
+        Returns the phrase packed into an integer.
+        """
+        key = 0
+        for word in phrase.split( ' ' ):
+            try: wordId = self.wordIds[word]
+            except KeyError:
+                wordId = self.wordIds[word] = len( self.words )
+                self.words.append( word )
+            key = key << self.ID_BITS | wordId
+        return key
+    # end of PhraseModel._getKey
+
+
+    def _getPhrase( self, key ):
+        """
+        Returns the phrase string for the packed integer key.
+        """
+        idMask = ( 1 << self.ID_BITS ) - 1
+        words = []
+        while key:
+            words.append( self.words[key & idMask] )
+            key >>= self.ID_BITS
+        return ' '.join( reversed( words ) )
+    # end of PhraseModel._getPhrase
+
+
+    def addPhrase( self, phrase, count=1 ):
+        """
+        Add the count for the phrase.
+        """
+        key = self._getKey( phrase )
+        if key in self.exactCounts: self.exactCounts[key] += count; return
+
+        # Derive a different position for each row from the two halves of a single hash
+        #   (mixed with the SplitMix64 finalizer because the key bits aren't very random)
+        keyHash = hash( key )
+        keyHash = ( ( keyHash ^ ( keyHash >> 30 ) ) * 0xBF58476D1CE4E5B9 ) & 0xFFFFFFFFFFFFFFFF
+        keyHash = ( ( keyHash ^ ( keyHash >> 27 ) ) * 0x94D049BB133111EB ) & 0xFFFFFFFFFFFFFFFF
+        keyHash ^= keyHash >> 31
+        index, step = keyHash >> 32, keyHash & 0xFFFFFFFF | 1
+        estimate = None
+        for row in self.sketch:
+            index = ( index + step ) % self.width
+            row[index] += count
+            if estimate is None or row[index] < estimate: estimate = row[index]
+        if estimate >= self.promoteCount: self.exactCounts[key] = estimate
+    # end of PhraseModel.addPhrase
+
+
+    def getPhraseCounts( self, minCount ):
+        """
+        Returns a dictionary of the phrases with (approximately) at least minCount uses.
+        """
+        return {self._getPhrase( key ):count for key,count in self.exactCounts.items() if count >= minCount}
+    # end of PhraseModel.getPhraseCounts
+# end of class PhraseModel
+
+
+
 def setAutocompleteWords( editWindowObject, wordList, append=False ):
     """
     Given a word list, set the entries into the autocomplete words
@@ -98,60 +458,51 @@ def setAutocompleteWords( editWindowObject, wordList, append=False ):
         editWindowObject.parentApp.setDebugText( "setAutocompleteWords…" )
 
     editWindowObject.parentApp.setWaitStatus( _("Setting autocomplete words…") )
-    if not append: editWindowObject.autocompleteWords = {}
 
+    wantedWords = []
     for word in wordList:
         #if "'" not in word and '1' not in word:
             #if '(' in word and ')' not in word: # perhaps something like we(excl
                 #word = word + ')' # append a matching/final parenthesis
         if len(word) >= editWindowObject.autocompleteMinLength:
-            firstLetter, remainder = word[0], word[1:]
-            if firstLetter not in editWindowObject.autocompleteWords: editWindowObject.autocompleteWords[firstLetter] = []
-            if remainder in editWindowObject.autocompleteWords[firstLetter]:
-                if 0 and BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                    print( "    setAutocompleteWords discarded {!r} duplicate".format( word ) )
-            else: # not already in the list
-                editWindowObject.autocompleteWords[firstLetter].append( remainder )
-                for char in word:
-                    if char not in editWindowObject.autocompleteWordChars:
-                        if BibleOrgSysGlobals.debugFlag: assert char not in '\n\r'
-                        if char not in ' .':
-                            editWindowObject.autocompleteWordChars += char
-                            if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                                print( "    setAutocompleteWords added {!r} as new wordChar".format( char ) )
+            wantedWords.append( word ) # The index discards any duplicates
+            for char in word:
+                if char not in editWindowObject.autocompleteWordChars:
+                    if BibleOrgSysGlobals.debugFlag: assert char not in '\n\r'
+                    if char not in ' .':
+                        editWindowObject.autocompleteWordChars += char
+                        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+                            print( "    setAutocompleteWords added {!r} as new wordChar".format( char ) )
         #elif BibleOrgSysGlobals.debugFlag and debuggingThisModule:
             #print( "    setAutocompleteWords discarded {!r} as too short".format( word ) )
         #elif BibleOrgSysGlobals.debugFlag and debuggingThisModule:
             #if "'" not in word:
                 #print( "    setAutocompleteWords discarded {!r} as unwanted".format( word ) )
+    editWindowObject.autocompleteWords.setWords( wantedWords, append=append )
 
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule: # write wordlist
         print( "  setAutocompleteWords: Writing autocomplete words to file…" )
-        sortedKeys = sorted( editWindowObject.autocompleteWords.keys() )
         with open( 'autocompleteWordList.txt', 'wt', encoding='utf-8' ) as wordFile:
             wordCount = 0
-            for firstLetter in sortedKeys:
-                for remainder in sorted( editWindowObject.autocompleteWords[firstLetter] ):
-                    wordFile.write( firstLetter+remainder )
-                    wordCount += 1
-                    if wordCount == 8: wordFile.write( '\n' ); wordCount = 0
-                    else: wordFile.write( ' ' )
+            for word in editWindowObject.autocompleteWords: # in sorted order
+                wordFile.write( word )
+                wordCount += 1
+                if wordCount == 8: wordFile.write( '\n' ); wordCount = 0
+                else: wordFile.write( ' ' )
 
     if BibleOrgSysGlobals.debugFlag: # print detailed stats
-        sortedKeys = sorted( editWindowObject.autocompleteWords.keys() )
-        if debuggingThisModule: print( "  autocomplete first letters", len(editWindowObject.autocompleteWords), sortedKeys )
-        grandtotal = 0
+        firstLetterTotals = defaultdict( int )
         wordNumTotals = defaultdict( int )
-        for firstLetter in sortedKeys:
-            total = len(editWindowObject.autocompleteWords[firstLetter])
-            for wordRemainder in editWindowObject.autocompleteWords[firstLetter]:
-                wordNumTotals[wordRemainder.count(' ')] += 1
-            if debuggingThisModule:
-                print( "    {!r} {:,}{}" \
-                    .format( firstLetter, total, '' if total>19 else ' '+str(editWindowObject.autocompleteWords[firstLetter]) ) )
-            grandtotal += total
+        for word in editWindowObject.autocompleteWords:
+            firstLetterTotals[word[0]] += 1
+            wordNumTotals[word.count(' ')] += 1
+        sortedKeys = sorted( firstLetterTotals.keys() )
+        if debuggingThisModule:
+            print( "  autocomplete first letters", len(sortedKeys), sortedKeys )
+            for firstLetter in sortedKeys:
+                print( "    {!r} {:,}".format( firstLetter, firstLetterTotals[firstLetter] ) )
         #if BibleOrgSysGlobals.debugFlag or BibleOrgSysGlobals.verbosityLevel > 1:
-        print( "  autocomplete total words loaded = {:,}".format( grandtotal ) )
+        print( "  autocomplete total words loaded = {:,}".format( len(editWindowObject.autocompleteWords) ) )
         if debuggingThisModule:
             for spaceCount in wordNumTotals:
                 print( "    {} words: {}".format( spaceCount+1, wordNumTotals[spaceCount] ) )
@@ -161,15 +512,290 @@ def setAutocompleteWords( editWindowObject, wordList, append=False ):
 
 
 
-internalMarkers = None
+def getNewWordChars( wordList, wordChars ):
+    """
+    Returns a string containing any characters in the words
+        that aren't already in wordChars.
+    """
+    newWordChars = ''
+    for word in wordList:
+        for char in word:
+            if char not in wordChars and char not in newWordChars and char not in ' .':
+                newWordChars += char
+    return newWordChars
+# end of AutocompleteFunctions.getNewWordChars
+
+
+def loadAutocompleteWordsInBackground( editWindowObject, wordStages, addAllNewWords ):
+    """
+    Build the autocomplete words in a worker thread so that the editor can still be used.
+
+    wordStages is an iterator (usually a generator) which is run in the worker thread.
+        It yields 2-tuples containing a list of words (most likely first)
+        and either None or the parameters for AutocompleteWordIndex.setWordCounts.
+    Each stage replaces the previous words of the edit window as soon as it's ready.
+
+    Like Application.onDoGrep, the results are passed back through a queue
+        which is polled from the Tk event loop.
+    """
+    logging.info( exp("loadAutocompleteWordsInBackground( …, {} )").format( addAllNewWords ) )
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("loadAutocompleteWordsInBackground( …, {} )").format( addAllNewWords ) )
+
+    resultsQueue = queue.Queue()
+    sharingKey = editWindowObject.autocompleteSharingKey
+    sharedEntry = None if sharingKey is None else editWindowObject.parentApp.sharedAutocompleteWords[sharingKey]
+    laterBookUpdates = {} # Books saved while we're loading are recounted afterwards
+    setAutocompleteBookUpdates( editWindowObject, sharingKey, laterBookUpdates )
+    minLength = editWindowObject.autocompleteMinLength
+    wordChars = editWindowObject.autocompleteWordChars
+
+    def autocompleteThreadProducer():
+        """
+        In the worker thread: build a complete new index for each stage
+            so that the GUI thread only has to swap it in.
+        """
+        nonlocal wordChars
+        try:
+            for wordList, wordCountParameters in wordStages:
+                wantedWords = [word for word in wordList if len(word) >= minLength]
+                newWordChars = getNewWordChars( wantedWords, wordChars )
+                wordChars += newWordChars
+                newIndex = AutocompleteWordIndex()
+                newIndex.setWords( wantedWords )
+                if wordCountParameters is not None: newIndex.setWordCounts( *wordCountParameters )
+                resultsQueue.put( (newIndex, newWordChars) )
+        except Exception as err:
+            logging.error( "Unable to load autocomplete words: {}".format( err ) )
+            if BibleOrgSysGlobals.debugFlag: raise
+        finally:
+            resultsQueue.put( None ) # stop the consumer loop
+    # end of autocompleteThreadProducer
+
+    threading.Thread( target=autocompleteThreadProducer, daemon=True ).start()
+    autocompleteThreadConsumer( editWindowObject, resultsQueue, addAllNewWords, sharingKey, laterBookUpdates, sharedEntry )
+# end of AutocompleteFunctions.loadAutocompleteWordsInBackground
+
+
+def autocompleteThreadConsumer( editWindowObject, resultsQueue, addAllNewWords, sharingKey=None, laterBookUpdates=None, sharedEntry=None ):
+    """
+    In the GUI thread: watch the queue for new indexes and swap them in
+        (for all the windows which share the words if sharingKey is given).
+    sharedEntry is the entry in parentApp.sharedAutocompleteWords when the load started
+        and the results are dropped if it's been replaced (i.e., the words were released and then loaded again).
+
+    Any books saved while the words were loading (in laterBookUpdates) are then recounted.
+    """
+    while True:
+        try: result = resultsQueue.get( block=False )
+        except queue.Empty:
+            # Keep polling from any window which is still using these words
+            for window in [editWindowObject] + getAutocompleteSharingWindows( editWindowObject, sharingKey, sharedEntry ):
+                try: window.after( 250, autocompleteThreadConsumer, window, resultsQueue, addAllNewWords, sharingKey, laterBookUpdates, sharedEntry )
+                except tk.TclError: continue # that window has been closed
+                break
+            return
+        if result is None: break # the worker is finished
+
+        newIndex, newWordChars = result
+        sharingWindows = getAutocompleteSharingWindows( editWindowObject, sharingKey, sharedEntry )
+        if not sharingWindows: break # the windows have all been closed (or changed to different words)
+        newIndex.copyPromotedWords( sharingWindows[0].autocompleteWords ) # Keep any words that were typed meanwhile
+        if sharedEntry is not None: sharedEntry[0] = newIndex
+        for window in sharingWindows:
+            window.autocompleteWords = newIndex
+            window.autocompleteWordChars += newWordChars
+            window.addAllNewWords = addAllNewWords
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( "  autocompleteThreadConsumer now has {:,} words for {} window(s)".format( len(newIndex), len(sharingWindows) ) )
+
+    if laterBookUpdates is not None: finishAutocompleteBookUpdates( editWindowObject, sharingKey, laterBookUpdates )
+    if BibleOrgSysGlobals.debugFlag:
+        editWindowObject.parentApp.setDebugText( "Autocomplete words loaded" )
+        print( "  autocomplete total words loaded = {:,}".format( len(editWindowObject.autocompleteWords) ) )
+# end of AutocompleteFunctions.autocompleteThreadConsumer
+
+
+
+def shareBibleAutocompleteWords( editWindowObject ):
+    """
+    All the edit windows on the same Bible project share one set of autocomplete words
+        (so words typed in one window are offered in all of them).
+    These are kept in parentApp.sharedAutocompleteWords (keyed by the project source folder)
+        together with the list of windows using them (and any waiting book updates).
+
+    Returns True if another window already has (or is loading) the words for this project
+        (so this window now shares them and doesn't need to load them),
+        or False if this window is the first (and so must load them).
+
+    editWindowObject here is a USFM or ESFM edit window.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("shareBibleAutocompleteWords()") )
+
+    releaseAutocompleteWords( editWindowObject ) # in case it was already sharing some other words
+    sharingKey = os.path.abspath( editWindowObject.internalBible.sourceFolder )
+    sharedAutocompleteWords = editWindowObject.parentApp.sharedAutocompleteWords
+    editWindowObject.autocompleteSharingKey = sharingKey
+    if sharingKey not in sharedAutocompleteWords:
+        sharedAutocompleteWords[sharingKey] = [editWindowObject.autocompleteWords, [editWindowObject], None]
+        return False
+
+    sharedIndex, sharingWindows = sharedAutocompleteWords[sharingKey][:2]
+    editWindowObject.autocompleteWords = sharedIndex
+    editWindowObject.autocompleteWordChars = sharingWindows[0].autocompleteWordChars
+    editWindowObject.addAllNewWords = sharingWindows[0].addAllNewWords
+    sharingWindows.append( editWindowObject )
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( "  Now sharing {:,} autocomplete words with {} window(s)".format( len(sharedIndex), len(sharingWindows) ) )
+    return True
+# end of AutocompleteFunctions.shareBibleAutocompleteWords
+
+
+def releaseAutocompleteWords( editWindowObject ):
+    """
+    Stop this edit window sharing its autocomplete words with other windows
+        (because it's being closed or is changing to a different autocomplete mode).
+
+    The shared words are dropped when the last window using them releases them.
+    """
+    sharingKey = editWindowObject.autocompleteSharingKey
+    if sharingKey is None: return # not sharing
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("releaseAutocompleteWords() for {}").format( sharingKey ) )
+
+    editWindowObject.autocompleteSharingKey = None
+    sharedAutocompleteWords = editWindowObject.parentApp.sharedAutocompleteWords
+    sharingWindows = sharedAutocompleteWords[sharingKey][1]
+    sharingWindows.remove( editWindowObject )
+    if sharingWindows: # other windows are still using the words so don't change them from here
+        editWindowObject.autocompleteWords = AutocompleteWordIndex()
+    else: del sharedAutocompleteWords[sharingKey]
+# end of AutocompleteFunctions.releaseAutocompleteWords
+
+
+def getAutocompleteSharingWindows( editWindowObject, sharingKey, sharedEntry=None ):
+    """
+    Returns a list of the edit windows using the autocomplete words with the given sharingKey.
+
+    This is just the given window if sharingKey is None (i.e., the words aren't shared)
+        or an empty list if all the windows that were sharing the words have released them.
+    If sharedEntry is given (i.e., the entry in parentApp.sharedAutocompleteWords that the caller started with),
+        an empty list is also returned if the words have since been released and shared again.
+    """
+    if sharingKey is None: return [editWindowObject]
+    try: currentEntry = editWindowObject.parentApp.sharedAutocompleteWords[sharingKey]
+    except KeyError: return []
+    if sharedEntry is not None and currentEntry is not sharedEntry: return []
+    return currentEntry[1]
+# end of AutocompleteFunctions.getAutocompleteSharingWindows
+
+
+def getAutocompleteBookUpdates( editWindowObject, sharingKey ):
+    """
+    Returns a dictionary (indexed by BBB) of the saved books which are waiting to have their words recounted
+        while the autocomplete words with the given sharingKey are being loaded or updated,
+        or None if the words aren't busy.
+
+    These are kept with the shared words (or in the window if sharingKey is None).
+    """
+    if sharingKey is None: return editWindowObject.autocompleteBookUpdates
+    try: return editWindowObject.parentApp.sharedAutocompleteWords[sharingKey][2]
+    except KeyError: return None
+# end of AutocompleteFunctions.getAutocompleteBookUpdates
+
+
+def setAutocompleteBookUpdates( editWindowObject, sharingKey, bookUpdates ):
+    """
+    Sets the dictionary of waiting book updates (see getAutocompleteBookUpdates)
+        or None when the words are no longer busy.
+
+    Each load or update sets a new dictionary so that it can tell if something else has taken over the words.
+    """
+    if sharingKey is None: editWindowObject.autocompleteBookUpdates = bookUpdates
+    else:
+        try: editWindowObject.parentApp.sharedAutocompleteWords[sharingKey][2] = bookUpdates
+        except KeyError: pass # the windows have all been closed
+# end of AutocompleteFunctions.setAutocompleteBookUpdates
+
+
+def finishAutocompleteBookUpdates( editWindowObject, sharingKey, bookUpdates ):
+    """
+    Called when the autocomplete words have finished being loaded or updated
+        to recount any books which were saved in the meantime.
+    """
+    if getAutocompleteBookUpdates( editWindowObject, sharingKey ) is not bookUpdates: return # Something else has the words now
+    if bookUpdates: updateBookWordCountsInBackground( editWindowObject, sharingKey, bookUpdates )
+    else: setAutocompleteBookUpdates( editWindowObject, sharingKey, None )
+# end of AutocompleteFunctions.finishAutocompleteBookUpdates
+
+
+
+internalMarkersRegex = None
+MAX_PHRASE_WORDS = 5 # Longest sequence of words that gets counted
 DUMMY_VALUE = 999999 # Some number bigger than the number of characters in a line
 
-def countBookWords( BBB, internalBible, filename, isCurrentBook ):
+
+def getInternalMarkersRegex():
+    """
+    Returns a compiled regular expression which matches any note or character marker
+        (followed by a space or asterisk) inside a line of USFM text.
+
+    This is only compiled when first needed (because BibleOrgSysGlobals must be set-up first).
+    """
+    global internalMarkersRegex
+    if internalMarkersRegex is None:
+        internalMarkers = BibleOrgSysGlobals.USFMMarkers.getNoteMarkersList() \
+            + BibleOrgSysGlobals.USFMMarkers.getCharacterMarkersList( includeBackslash=False, includeEndMarkers=False, includeNestedMarkers=True, expandNumberableMarkers=True )
+        # Put longer markers first so (say) \fr is tried before \f
+        internalMarkersRegex = re.compile( r'\\(?:{})[ *]'.format( '|'.join( re.escape( marker )
+                                        for marker in sorted( internalMarkers, key=len, reverse=True ) ) ) )
+    return internalMarkersRegex
+# end of AutocompleteFunctions.getInternalMarkersRegex
+
+
+def getTextWords( textLine ):
+    """
+    Find the words and the short word sequences (up to MAX_PHRASE_WORDS) in the line of text.
+
+    Any internal note and character markers are removed,
+        but other punctuation etc. is NOT removed.
+
+    Returns a list of the words and phrases (ready for counting).
+    """
+    #print( "getTextWords( {!r} )".format( textLine ) )
+    if '\\' in textLine: # we have internal markers to remove
+        textLine = getInternalMarkersRegex().sub( ' ', textLine )
+    words = textLine.replace('—','— ').replace('–','– ').split() # Treat em-dash and en-dash as word break characters
+
+    textWords = [singleWord for singleWord in (word.rstrip( END_CHARS_TO_REMOVE ) # Remove certain final punctuation
+                                                for word in words if 'XXX' not in word) # XXX is used in the Matigsalug project to mark errors
+                    if len(singleWord) > 2]
+    if len(words) < 2: return textWords
+
+    # Now make the phrases of each length from windows onto the one list of words
+    #   i.e., the phrases of numWords words are made by zipping the words list with itself
+    #       offset by 0, 1, …, numWords-1 (with the final punctuation removed from the last column)
+    #   and canExtend[wx] says if it's still ok to keep adding words to the phrase starting at word wx
+    lastWords = [word[:-1] if word[-1] in END_CHARS_TO_REMOVE else word for word in words]
+    notSentenceEnds = [word[-1] != '.' for word in words] # don't go across sentence boundaries
+    canExtend = ['XXX' not in word for word in words]
+    for numWords in range( 2, MAX_PHRASE_WORDS+1 ):
+        canExtend = list( map( and_, canExtend, notSentenceEnds[numWords-2:-1] ) )
+        if not any( canExtend ): break
+        wordColumns = [words[wx:] for wx in range( numWords-1 )] + [lastWords[numWords-1:]]
+        textWords.extend( compress( map( ' '.join, zip( *wordColumns ) ), canExtend ) )
+    return textWords
+# end of AutocompleteFunctions.getTextWords
+
+
+def countBookWords( BBB, internalBible, filename, isCurrentBook, bookText=None ):
     """
     Find all the words in the Bible book and their usage counts.
 
     Note that this function doesn't use the internalBible books
         but rather loads the USFM (text) files directly.
+    If bookText is given, it's used instead of the file (e.g., for text that's just been saved).
 
     Returns a dictionary containing the results for the book.
     """
@@ -180,74 +806,19 @@ def countBookWords( BBB, internalBible, filename, isCurrentBook ):
         #print( "Didn't load autocomplete words from {} {}".format( internalBible.getAName(), BBB ) )
         return # Sometimes these books contain words from other languages, etc.
 
-    global internalMarkers
-    if internalMarkers is None: # Get our list of markers -- note that the more common note markers are first
-        internalMarkers = BibleOrgSysGlobals.USFMMarkers.getNoteMarkersList() \
-            + BibleOrgSysGlobals.USFMMarkers.getCharacterMarkersList( includeBackslash=False, includeEndMarkers=False, includeNestedMarkers=True, expandNumberableMarkers=True )
-        internalMarkers = ['\\'+marker for marker in internalMarkers]
-
-    countIncrement = 3 if isCurrentBook else 1 # Each word in current book counts higher so appears higher in the list
+    countIncrement = CURRENT_BOOK_WEIGHT if isCurrentBook else 1 # Each word in current book counts higher so appears higher in the list
     # NOTE: This idea fails as soon as they change books in the edit window
     #       as the word lists are only loaded once at startup. (A reasonable compromise I think.)
 
     encoding = None
     if encoding is None: encoding = 'utf-8'
     lastLine, lineCount, lineDuples, lastMarker = '', 0, [], None
-    wordCounts = defaultdict( int )
-
-    def countWords( textLine ):
-        """
-        Note: Punctuation etc. is NOT removed.
-        """
-        #print( "countWords( {!r} )".format( textLine ) )
-        if '\\' in textLine: # we have internal markers to remove
-            #print( "  INT", marker, textLine )
-            for iMarker in internalMarkers:
-                #print( "   GOT", repr(iMarker) )
-                textLine = textLine.replace( iMarker+' ',' ' ).replace( iMarker+'*',' ' )
-                if not '\\' in textLine: break
-            #print( "  NOW", marker, textLine )
-        words = textLine.replace('—','— ').replace('–','– ').split() # Treat em-dash and en-dash as word break characters
-
-        # Now look for (and count) single and some multiple word sequences
-        for wx,word in enumerate( words ):
-            if not word: continue
-            if 'XXX' in word: continue # This is used in the Matigsalug project to mark errors
-            singleWord = word
-            while singleWord and singleWord[-1] in END_CHARS_TO_REMOVE:
-                singleWord = singleWord[:-1] # Remove certain final punctuation
-            if len(singleWord) > 2: wordCounts[singleWord] += countIncrement
-
-            #if word[-1] not in '—.–':
-            if wx < len(words)-1: # it's not the last word in the line
-                doubleWord = word+' '+words[wx+1]
-                #print( 'doubleWord', repr(doubleWord) )
-                adjustedDoubleWord = doubleWord[:-1] if doubleWord[-1] in END_CHARS_TO_REMOVE else doubleWord
-                if '. ' not in adjustedDoubleWord: # don't go across sentence boundaries
-                    wordCounts[adjustedDoubleWord] += countIncrement
-                if wx < len(words)-2: # there's still two words after this one
-                    tripleWord = doubleWord+' '+words[wx+2]
-                    #print( 'tripleWord', repr(tripleWord) )
-                    adjustedTripleWord = tripleWord[:-1] if tripleWord[-1] in END_CHARS_TO_REMOVE else tripleWord
-                    if '. ' not in adjustedTripleWord: # don't go across sentence boundaries
-                        wordCounts[adjustedTripleWord] += countIncrement
-                    if wx < len(words)-3: # there's still three words after this one
-                        quadWord = tripleWord+' '+words[wx+3]
-                        #print( 'quadWord', repr(quadWord) )
-                        adjustedQuadWord = quadWord[:-1] if quadWord[-1] in END_CHARS_TO_REMOVE else quadWord
-                        if '. ' not in adjustedQuadWord: # don't go across sentence boundaries
-                            wordCounts[adjustedQuadWord] += countIncrement
-                        if wx < len(words)-4: # there's still four words after this one
-                            quinWord = quadWord+' '+words[wx+4]
-                            #print( 'quinWord', repr(quinWord) )
-                            adjustedQuinWord = quinWord[:-1] if quinWord[-1] in END_CHARS_TO_REMOVE else quinWord
-                            if '. ' not in adjustedQuinWord: # don't go across sentence boundaries
-                                wordCounts[adjustedQuinWord] += countIncrement
-    # end of countWords
+    bookWords = [] # All the words and phrases -- we count them all at once at the end
 
     # main code for countBookWords
     USFMFilepath = os.path.join( internalBible.sourceFolder, filename )
-    with open( USFMFilepath, 'rt', encoding=internalBible.encoding ) as bookFile:
+    with open( USFMFilepath, 'rt', encoding=internalBible.encoding ) if bookText is None \
+                                                        else StringIO( bookText ) as bookFile:
         try:
             for line in bookFile:
                 lineCount += 1
@@ -274,7 +845,7 @@ def countBookWords( BBB, internalBible, filename, isCurrentBook ):
                             #print ("Popped",oldmarker,oldtext)
                             #print ("Adding", line, "to", oldmarker, oldtext)
                             #lineDuples.append( (oldmarker, oldtext+' '+line) )
-                            countWords( line )
+                            bookWords.extend( getTextWords( line ) )
                         continue
 
                 lineAfterBackslash = line[1:]
@@ -308,7 +879,7 @@ def countBookWords( BBB, internalBible, filename, isCurrentBook ):
                         try: text = text.split( None, 1 )[1]
                         except IndexError: text = ''
                     #print( "   2", marker, text )
-                    countWords( text )
+                    bookWords.extend( getTextWords( text ) )
                     #if not lineDuples: # Just for detection of start of real USFM
                         #lineDuples.append( (marker, text) )
                 lastMarker = marker
@@ -320,6 +891,9 @@ def countBookWords( BBB, internalBible, filename, isCurrentBook ):
             #print( line )
             #raise
 
+    wordCounts = Counter( bookWords )
+    if countIncrement != 1:
+        for word in wordCounts: wordCounts[word] *= countIncrement
     return wordCounts
 # end of AutocompleteFunctions.countBookWords
 
@@ -332,6 +906,131 @@ def countBookWordsHelper( parameters ):
 # end of AutocompleteFunctions.countBookWordsHelper
 
 
+def getWordCountsCacheFolderPath( internalBible ):
+    """
+    Returns the path of the folder for the word counts cache files of the Bible project.
+
+    The cache goes into the Biblelator folder inside the project folder
+        (the same place as the autosave files).
+    """
+    sourceFolder = internalBible.sourceFolder
+    APPFolderPath = sourceFolder if APP_NAME in sourceFolder \
+                        else os.path.join( sourceFolder, APP_NAME+'/' )
+    return os.path.join( APPFolderPath, WORD_COUNTS_CACHE_FOLDER_NAME )
+# end of AutocompleteFunctions.getWordCountsCacheFolderPath
+
+
+def getFileHash( filepath ):
+    """
+    Returns a hash of the file contents
+        so we can tell if a file has really changed even if its timestamp has.
+    """
+    hasher = hashlib.md5()
+    with open( filepath, 'rb' ) as bookFile:
+        for block in iter( lambda: bookFile.read( 65536 ), b'' ):
+            hasher.update( block )
+    return hasher.hexdigest()
+# end of AutocompleteFunctions.getFileHash
+
+
+def getFileDetails( filepath ):
+    """
+    Returns a 3-tuple with the file modification time, size, and hash
+        or None if the file can't be read.
+    """
+    try:
+        fileStat = os.stat( filepath )
+        return fileStat.st_mtime, fileStat.st_size, getFileHash( filepath )
+    except OSError: return None
+# end of AutocompleteFunctions.getFileDetails
+
+
+def loadCachedBookWordCounts( cacheFolderPath, BBB ):
+    """
+    Returns a 3-tuple containing the filename, file details (see getFileDetails), and word counts
+        that were last saved for the book,
+    or None if there's no usable cache file.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("loadCachedBookWordCounts( {}, {} )").format( cacheFolderPath, BBB ) )
+
+    cacheFilepath = os.path.join( cacheFolderPath, BBB+'.pickle' )
+    try:
+        with open( cacheFilepath, 'rb' ) as cacheFile:
+            version, filename, fileDetails, wordCounts = pickle.load( cacheFile )
+    except FileNotFoundError: return None
+    except ( OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError ) as err:
+        logging.warning( "loadCachedBookWordCounts: Unable to load {}: {}".format( cacheFilepath, err ) )
+        return None
+    if version != WORD_COUNTS_CACHE_VERSION:
+        logging.info( "loadCachedBookWordCounts: Ignoring old version {} cache in {}".format( version, cacheFilepath ) )
+        return None
+    return filename, fileDetails, wordCounts
+# end of AutocompleteFunctions.loadCachedBookWordCounts
+
+
+def saveCachedBookWordCounts( cacheFolderPath, BBB, filename, fileDetails, wordCounts ):
+    """
+    Save the word counts for the book (see loadCachedBookWordCounts).
+
+    Failure (e.g., a read-only project folder) just means that the words will be counted again next time.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("saveCachedBookWordCounts( {}, {}, {} )").format( cacheFolderPath, BBB, filename ) )
+
+    cacheFilepath = os.path.join( cacheFolderPath, BBB+'.pickle' )
+    try:
+        if not os.path.exists( cacheFolderPath ): os.makedirs( cacheFolderPath, exist_ok=True )
+        tempFilepath = cacheFilepath + '.tmp'
+        with open( tempFilepath, 'wb' ) as cacheFile:
+            pickle.dump( (WORD_COUNTS_CACHE_VERSION,filename,fileDetails,dict(wordCounts)), cacheFile, pickle.HIGHEST_PROTOCOL )
+        os.replace( tempFilepath, cacheFilepath ) # So we never leave a half-written cache file
+    except OSError as err:
+        logging.warning( "saveCachedBookWordCounts: Unable to save {}: {}".format( cacheFilepath, err ) )
+# end of AutocompleteFunctions.saveCachedBookWordCounts
+
+
+def getBookWordCounts( BBB, internalBible, filename, cacheFolderPath ):
+    """
+    Returns the (unweighted) word counts for the book
+        either from the cache (if the book file hasn't changed) or by counting them.
+
+    The file modification time and size are checked first (which is fast)
+        and only if they differ is the file hash checked.
+    """
+    USFMFilepath = os.path.join( internalBible.sourceFolder, filename )
+    cachedStuff = loadCachedBookWordCounts( cacheFolderPath, BBB )
+    if cachedStuff is not None:
+        cachedFilename, cachedFileDetails, wordCounts = cachedStuff
+        if cachedFilename == filename and cachedFileDetails is not None:
+            cachedMTime, cachedSize, cachedHash = cachedFileDetails
+            try: fileStat = os.stat( USFMFilepath )
+            except OSError: fileStat = None
+            if fileStat is not None and fileStat.st_size == cachedSize:
+                if fileStat.st_mtime == cachedMTime: return wordCounts
+                if getFileHash( USFMFilepath ) == cachedHash:
+                    # Only the timestamp changed (e.g., file was copied or touched)
+                    saveCachedBookWordCounts( cacheFolderPath, BBB, filename, (fileStat.st_mtime,cachedSize,cachedHash), wordCounts )
+                    return wordCounts
+
+    fileDetails = getFileDetails( USFMFilepath ) # Before counting in case the file gets saved while we're busy
+    wordCounts = countBookWords( BBB, internalBible, filename, False )
+    if wordCounts is not None and fileDetails is not None:
+        saveCachedBookWordCounts( cacheFolderPath, BBB, filename, fileDetails, wordCounts )
+    return wordCounts
+# end of AutocompleteFunctions.getBookWordCounts
+
+
+def getBookWordCountsHelper( parameters ):
+    """
+    Parameter parameters is a 4-tuple containing the BBB, internalBible, filename, and cache folder path
+
+    Returns a 2-tuple containing the BBB and the word counts.
+    """
+    return parameters[0], getBookWordCounts( *parameters )
+# end of AutocompleteFunctions.getBookWordCountsHelper
+
+
 def loadBibleBookAutocompleteWords( editWindowObject ):
     """
     Load all the existing words in a USFM or Paratext Bible book
@@ -373,7 +1072,7 @@ def loadBibleBookAutocompleteWords( editWindowObject ):
                                 key=lambda duple: -duple[1] ):
             if len(word) >= editWindowObject.autocompleteMinLength \
             and word not in autocompleteWords: # just in case we had some (common) words in there already
-                if ' ' not in word or count > 4:
+                if ' ' not in word or count > BIBLE_BOOK_PHRASE_THRESHOLD:
                     autocompleteWords.append( word )
                 #else: print( 'loadBibleBookAutocompleteWords discarding', repr(word) )
     except KeyError:
@@ -381,105 +1080,417 @@ def loadBibleBookAutocompleteWords( editWindowObject ):
         #pass # Nothing for this book
     #print( 'autocompleteWords', len(autocompleteWords) )
     setAutocompleteWords( editWindowObject, autocompleteWords )
+    editWindowObject.autocompleteWords.setWordCounts(
+            {word:count for word,count in wordCountResults.items() if len(word) >= editWindowObject.autocompleteMinLength},
+            None, BIBLE_BOOK_PHRASE_THRESHOLD, bookWordCounts={currentBBB:dict(wordCountResults)} )
     editWindowObject.addAllNewWords = True
 # end of AutocompleteFunctions.loadBibleBookAutocompleteWords
 
 
 
+def rankBibleWords( autocompleteCounts, phraseThreshold ):
+    """
+    Returns a list of the wanted words with the most common words first.
+    """
+    autocompleteWords = []
+    #if BibleOrgSysGlobals.debugFlag: # add some multi-word entries just for testing
+        #autocompleteWords = [ 'Lord God', 'Lord your(pl) God', '(is)', '(are)', '(were)', '(one who)', ]
+    for word,count in sorted( autocompleteCounts.items(), key=lambda duple: -duple[1] ):
+        if ' ' not in word or count > phraseThreshold:
+            autocompleteWords.append( word )
+        #else:
+            #print( 'rankBibleWords discarding', repr(word) )
+            #if ' ' not in word: halt
+    return autocompleteWords
+# end of AutocompleteFunctions.rankBibleWords
+
+
+def generateBibleAutocompleteWords( internalBible, currentBBB, minLength ):
+    """
+    A generator to find all the existing words in a USFM or Paratext Bible Project
+        (designed to be run in a worker thread -- see loadAutocompleteWordsInBackground).
+
+    This is rather slow because of course, the entire Bible has to be read and processed first.
+        So the word counts for each book are cached in the project's Biblelator folder
+        and only books which have changed since last time are processed again.
+
+    The books are combined one at a time as they arrive
+        with the phrases counted by a PhraseModel so that memory use stays bounded.
+
+    Yields the words of the current book first (so they can be used straight away),
+        and then the words of the entire Bible.
+    Each yielded 2-tuple contains a list of words (most common first)
+        and the parameters for AutocompleteWordIndex.setWordCounts.
+    """
+    startTime = time.time()
+    cacheFolderPath = getWordCountsCacheFolderPath( internalBible )
+    booksToLoad = [(BBB,filename) for BBB,filename in internalBible.maximumPossibleFilenameTuples if BBB not in AVOID_BOOKS]
+    if not booksToLoad:
+        logging.critical( exp("No books to load in {}!").format( internalBible.sourceFolder ) )
+
+    singleWordCounts = defaultdict( int )
+    phraseModel = PhraseModel( promoteCount=BIBLE_PHRASE_THRESHOLD+1 )
+    def addBookWordCounts( BBB, wordCounts ):
+        """
+        Combine the book counts into the totals.
+        """
+        if wordCounts:
+            weight = CURRENT_BOOK_WEIGHT if BBB==currentBBB else 1
+            for word, count in wordCounts.items():
+                if len(word) >= minLength:
+                    if ' ' in word: phraseModel.addPhrase( word, count * weight )
+                    else: singleWordCounts[word] += count * weight
+    # end of addBookWordCounts
+
+    # Do the current book first so that its words are available as soon as possible
+    for BBB,filename in booksToLoad:
+        if BBB == currentBBB:
+            wordCounts = getBookWordCounts( BBB, internalBible, filename, cacheFolderPath )
+            booksToLoad.remove( (BBB,filename) )
+            if wordCounts:
+                autocompleteCounts = {word:count*CURRENT_BOOK_WEIGHT for word,count in wordCounts.items() if len(word) >= minLength}
+                yield rankBibleWords( autocompleteCounts, BIBLE_PHRASE_THRESHOLD ), \
+                        (autocompleteCounts, currentBBB, BIBLE_PHRASE_THRESHOLD)
+                addBookWordCounts( BBB, wordCounts )
+            break
+
+    if BibleOrgSysGlobals.maxProcesses > 1 and len(booksToLoad) > 1: # Load all the books as quickly as possible
+        parameters = [(BBB,internalBible,filename,cacheFolderPath) for BBB,filename in booksToLoad] # Can only pass a single parameter to map
+        if BibleOrgSysGlobals.verbosityLevel > 1:
+            print( exp("Autocomplete: loading up to {} USFM books using {} CPUs…").format( len(booksToLoad), BibleOrgSysGlobals.maxProcesses ) )
+            print( "  NOTE: Outputs (including error & warning messages) from loading words from Bible books may be interspersed." )
+        BibleOrgSysGlobals.alreadyMultiprocessing = True
+        try:
+            # NOTE: We're in the loader thread (and Tk has threads too) so mustn't fork the whole process
+            with multiprocessing.get_context( 'spawn' ).Pool( processes=BibleOrgSysGlobals.maxProcesses ) as pool: # start worker processes
+                # Combine each book as it arrives (so we don't have them all in memory at once)
+                for BBB, wordCounts in pool.imap_unordered( getBookWordCountsHelper, parameters ):
+                    #print( "XX", BBB, len(wordCounts) if wordCounts else wordCounts )
+                    addBookWordCounts( BBB, wordCounts )
+        finally: BibleOrgSysGlobals.alreadyMultiprocessing = False
+    else: # Just single threaded
+        # Load the books one by one -- assuming that they have regular Paratext style filenames
+        for BBB,filename in booksToLoad:
+            #if BibleOrgSysGlobals.verbosityLevel>1 or BibleOrgSysGlobals.debugFlag:
+                #print( _("  USFMBible: Loading {} from {} from {}…").format( BBB, internalBible.getAName(), internalBible.sourceFolder ) )
+            addBookWordCounts( BBB, getBookWordCounts( BBB, internalBible, filename, cacheFolderPath ) )
+
+    autocompleteCounts = dict( singleWordCounts )
+    autocompleteCounts.update( phraseModel.getPhraseCounts( BIBLE_PHRASE_THRESHOLD+1 ) )
+    autocompleteWords = rankBibleWords( autocompleteCounts, BIBLE_PHRASE_THRESHOLD )
+    #if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'acW', autocompleteWords )
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( "generateBibleAutocompleteWords took", time.time()-startTime )
+        print( "  {:,} words and {:,} phrases kept".format( len(singleWordCounts), len(phraseModel) ) )
+    yield autocompleteWords, (autocompleteCounts, currentBBB, BIBLE_PHRASE_THRESHOLD)
+# end of AutocompleteFunctions.generateBibleAutocompleteWords
+
+
 def loadBibleAutocompleteWords( editWindowObject ):
     """
     Load all the existing words in a USFM or Paratext Bible Project
         to fill the autocomplete mechanism.
 
-    This is rather slow because of course, the entire Bible has to be read and processed first.
+    The words are loaded in the background (see generateBibleAutocompleteWords)
+        so the user can continue editing while that happens.
+    They're only loaded once for each project (see shareBibleAutocompleteWords)
+        and so the current book of the first window is the one that gets weighted.
 
     editWindowObject here is a USFM or ESFM edit window.
-
-    NOTE: This list should theoretically be updated as the user enters new words!
     """
-    startTime = time.time()
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
         print( exp("AutocompleteFunctions.loadBibleAutocompleteWords()") )
         editWindowObject.parentApp.setDebugText( "loadBibleAutocompleteWords…" )
 
+    if shareBibleAutocompleteWords( editWindowObject ): # another window already has the words for this project
+        editWindowObject.parentApp.setReadyStatus()
+        return
+
     editWindowObject.parentApp.setWaitStatus( _("Loading {} Bible words…").format( editWindowObject.projectName ) )
     currentBBB = editWindowObject.currentVerseKey.getBBB()
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( "  got current BBB", repr(currentBBB) )
 
     if not editWindowObject.internalBible.preloadDone: editWindowObject.internalBible.preload()
-    bookWordCounts = {}
-    if editWindowObject.internalBible.maximumPossibleFilenameTuples:
-        if BibleOrgSysGlobals.maxProcesses > 1: # Load all the books as quickly as possible
-            parameters = [(BBB,editWindowObject.internalBible,filename,BBB==currentBBB) for BBB,filename in editWindowObject.internalBible.maximumPossibleFilenameTuples] # Can only pass a single parameter to map
-            if BibleOrgSysGlobals.verbosityLevel > 1:
-                print( exp("Autocomplete: loading up to {} USFM books using {} CPUs…").format( len(editWindowObject.internalBible.maximumPossibleFilenameTuples), BibleOrgSysGlobals.maxProcesses ) )
-                print( "  NOTE: Outputs (including error & warning messages) from loading words from Bible books may be interspersed." )
-            BibleOrgSysGlobals.alreadyMultiprocessing = True
-            with multiprocessing.Pool( processes=BibleOrgSysGlobals.maxProcesses ) as pool: # start worker processes
-                results = pool.map( countBookWordsHelper, parameters ) # have the pool do our loads
-                assert len(results) == len(editWindowObject.internalBible.maximumPossibleFilenameTuples)
-                for (BBB,filename),counts in zip( editWindowObject.internalBible.maximumPossibleFilenameTuples, results ):
-                    #print( "XX", BBB, filename, len(counts) if counts else counts )
-                    bookWordCounts[BBB] = counts
-                BibleOrgSysGlobals.alreadyMultiprocessing = False
-        else: # Just single threaded
-            # Load the books one by one -- assuming that they have regular Paratext style filenames
-            for BBB,filename in editWindowObject.internalBible.maximumPossibleFilenameTuples:
-                #if BibleOrgSysGlobals.verbosityLevel>1 or BibleOrgSysGlobals.debugFlag:
-                    #print( _("  USFMBible: Loading {} from {} from {}…").format( BBB, editWindowObject.internalBible.getAName(), editWindowObject.internalBible.sourceFolder ) )
-                bookWordCounts[BBB] = countBookWords( BBB, editWindowObject.internalBible, filename, BBB==currentBBB ) # also saves it
-    else:
-        logging.critical( exp("No books to load in {}!").format( editWindowObject.internalBible.sourceFolder ) )
-
-    # Now combine the books
-    autocompleteCounts = {}
-    for BBB,counts in bookWordCounts.items(): # combine word counts for all books
-        #print( "here", BBB, len(counts) )
-        if counts:
-            for word, count in counts.items():
-                #print( "  ", word, count )
-                if len(word) >= editWindowObject.autocompleteMinLength:
-                    if word in autocompleteCounts: autocompleteCounts[word] += count
-                    else: autocompleteCounts[word] = count
-    #print( "there", len(autocompleteCounts) )
-
-    # Now make our list sorted with most common words first
-    autocompleteWords = []
-    #if BibleOrgSysGlobals.debugFlag: # add some multi-word entries just for testing
-        #autocompleteWords = [ 'Lord God', 'Lord your(pl) God', '(is)', '(are)', '(were)', '(one who)', ]
-    for word,count in sorted( autocompleteCounts.items(), key=lambda duple: -duple[1] ):
-        if ' ' not in word or count > 9:
-            autocompleteWords.append( word )
-        #else:
-            #print( 'loadBibleAutocompleteWords discarding', repr(word) )
-            #if ' ' not in word: halt
-    #if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'acW', autocompleteWords )
+    loadAutocompleteWordsInBackground( editWindowObject,
+            generateBibleAutocompleteWords( editWindowObject.internalBible, currentBBB, editWindowObject.autocompleteMinLength ),
+            addAllNewWords=True )
+# end of AutocompleteFunctions.loadBibleAutocompleteWords
 
-    #print( 'autocompleteWords', len(autocompleteWords) )
-    setAutocompleteWords( editWindowObject, autocompleteWords )
+
+
+def updateBibleBookAutocompleteWords( editWindowObject, BBB, bookText ):
+    """
+    Recount the words in a Bible book which has just been saved
+        and adjust the autocomplete words and their ranking to match
+        (which is much faster than reloading all the words).
+
+    The counting is done in a worker thread (see updateBookWordCountsInBackground).
+    If the words are still being loaded or updated, the book is remembered until that's finished
+        (because the loader might have already used either the old or the new counts for the book).
+
+    editWindowObject here is a USFM or ESFM edit window.
+    """
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-        print( "loadBibleAutocompleteWords took", time.time()-startTime )
-    editWindowObject.addAllNewWords = True
-# end of AutocompleteFunctions.loadBibleAutocompleteWords
+        print( exp("updateBibleBookAutocompleteWords( {}, {:,} chars )").format( BBB, len(bookText) ) )
 
+    if editWindowObject.autocompleteMode not in ( 'Bible', 'BibleBook', ) or BBB in AVOID_BOOKS: return
+    sharingKey = editWindowObject.autocompleteSharingKey
+    bookUpdate = editWindowObject.filename, editWindowObject.folderPath, bookText
+    bookUpdates = getAutocompleteBookUpdates( editWindowObject, sharingKey )
+    if bookUpdates is not None: # the words are busy being loaded or updated
+        bookUpdates[BBB] = bookUpdate # Only the last save of each book matters
+        return
+    updateBookWordCountsInBackground( editWindowObject, sharingKey, {BBB:bookUpdate} )
+# end of AutocompleteFunctions.updateBibleBookAutocompleteWords
 
 
-def loadHunspellAutocompleteWords( editWindowObject, dictionaryFilepath, encoding='utf-8' ):
+def updateBookWordCountsInBackground( editWindowObject, sharingKey, bookUpdates ):
     """
-    Load all the existing words in a Hunspell-type dictionary
-        to fill the autocomplete mechanism
+    Recount the words of the saved books in a worker thread
+        and then adjust the autocomplete words in the GUI thread.
 
-    editWindowObject here is a text edit window or derivation.
+    bookUpdates is a dictionary (indexed by BBB) of 3-tuples containing the filename, folder path, and book text.
 
-    NOTE: This list maybe should be updated as the user enters new words
-        or else have an additional user dictionary.
+    If the previous counts for the books aren't kept in memory,
+        they're got from (and then replaced in) the word counts cache files by the worker thread.
     """
-    logging.info( exp("loadHunspellAutocompleteWords( {}, {} )").format( dictionaryFilepath, encoding ) )
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-        print( exp("loadHunspellAutocompleteWords( {}, {} )").format( dictionaryFilepath, encoding ) )
-        editWindowObject.parentApp.setDebugText( "loadHunspellAutocompleteWords…" )
+        print( exp("updateBookWordCountsInBackground( {}, {} )").format( sharingKey, list( bookUpdates ) ) )
+
+    sharingWindows = getAutocompleteSharingWindows( editWindowObject, sharingKey )
+    if not sharingWindows: return # the windows have all been closed
+    autocompleteWords = sharingWindows[0].autocompleteWords
+    if autocompleteWords.phraseThreshold is None: # The words aren't counted from the Bible (e.g., the load failed)
+        setAutocompleteBookUpdates( editWindowObject, sharingKey, None )
+        return
+    laterBookUpdates = {} # Any more saves must wait for these
+    setAutocompleteBookUpdates( editWindowObject, sharingKey, laterBookUpdates )
+    internalBible = editWindowObject.internalBible
+    countsInMemory = autocompleteWords.bookWordCounts is not None
+    resultsQueue = queue.Queue()
+
+    def bookUpdateThreadProducer():
+        """
+        In the worker thread: count the words of each book
+            and find the counts that it previously added to the totals.
+        """
+        try:
+            for BBB,(filename,folderPath,bookText) in bookUpdates.items():
+                newCounts = countBookWords( BBB, internalBible, filename, False, bookText )
+                if countsInMemory: oldCounts = None # They're got from the index in the GUI thread
+                else: # the previous counts are in the cache file for the book
+                    cacheFolderPath = getWordCountsCacheFolderPath( internalBible )
+                    cachedStuff = loadCachedBookWordCounts( cacheFolderPath, BBB )
+                    if cachedStuff is None: # so we can't tell how much this book already added to the totals
+                        logging.info( "updateBookWordCountsInBackground: No cached word counts for {} so can't update them".format( BBB ) )
+                        continue
+                    oldCounts = cachedStuff[2]
+                    fileDetails = getFileDetails( os.path.join( folderPath, filename ) )
+                    if fileDetails is not None:
+                        saveCachedBookWordCounts( cacheFolderPath, BBB, filename, fileDetails, newCounts )
+                resultsQueue.put( (BBB, oldCounts, dict(newCounts)) )
+        except Exception as err:
+            logging.error( "Unable to update autocomplete words: {}".format( err ) )
+            if BibleOrgSysGlobals.debugFlag: raise
+        finally:
+            resultsQueue.put( None ) # stop the consumer loop
+    # end of bookUpdateThreadProducer
+
+    threading.Thread( target=bookUpdateThreadProducer, daemon=True ).start()
+    bookUpdateThreadConsumer( editWindowObject, resultsQueue, sharingKey, autocompleteWords, laterBookUpdates )
+# end of AutocompleteFunctions.updateBookWordCountsInBackground
+
+
+def bookUpdateThreadConsumer( editWindowObject, resultsQueue, sharingKey, autocompleteWords, laterBookUpdates ):
+    """
+    In the GUI thread: watch the queue for recounted books and adjust the autocomplete words.
+
+    The results are dropped if the windows are now using different words.
+    """
+    while True:
+        try: result = resultsQueue.get( block=False )
+        except queue.Empty:
+            # Keep polling from any window which is still using these words
+            for window in [editWindowObject] + getAutocompleteSharingWindows( editWindowObject, sharingKey ):
+                try: window.after( 250, bookUpdateThreadConsumer, window, resultsQueue, sharingKey, autocompleteWords, laterBookUpdates )
+                except tk.TclError: continue # that window has been closed
+                break
+            return
+        if result is None: break # the worker is finished
+
+        sharingWindows = getAutocompleteSharingWindows( editWindowObject, sharingKey )
+        if not sharingWindows or sharingWindows[0].autocompleteWords is not autocompleteWords: # the words were changed
+            if getAutocompleteBookUpdates( editWindowObject, sharingKey ) is laterBookUpdates:
+                setAutocompleteBookUpdates( editWindowObject, sharingKey, None ) # The saves were for the old words
+            return
+        BBB, oldCounts, newCounts = result
+        if oldCounts is None: # the counts are all in memory
+            if BBB not in autocompleteWords.bookWordCounts: continue # The words were only loaded from a different book
+            oldCounts = autocompleteWords.bookWordCounts[BBB]
+        addedWords = autocompleteWords.updateBookWordCounts( BBB, oldCounts, newCounts, sharingWindows[0].autocompleteMinLength )
+        newWordChars = getNewWordChars( addedWords, sharingWindows[0].autocompleteWordChars )
+        if newWordChars:
+            for window in sharingWindows:
+                window.autocompleteWordChars += newWordChars
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( "  bookUpdateThreadConsumer added {} words for {}".format( len(addedWords), BBB ) )
+
+    finishAutocompleteBookUpdates( editWindowObject, sharingKey, laterBookUpdates )
+# end of AutocompleteFunctions.bookUpdateThreadConsumer
+
+
+
+# Hunspell affix rules as used by the en_AU dictionary (see the .aff file)
+#   B -able, -ability, last syllable of stem stressed, -ate words &gt; 2 syllables
+#   b -ible, very basic rules, only dropped e
+#   D -ed, regular verb past tenses, last syllable of stem stressed
+#   d -ed, -ing, regular verb past tenses and adverbial form, last syllable NOT stressed
+#   E dis- Prefix for negation
+#   e out- Prefix
+#   h -edly, adverbial, simplified rules
+#   I in- im- il- ir- Prefix, opposite of.
+#   i -edness, degree, simplified rules
+#   j -fully, suffix
+#   K pre-, prefix
+#   k -ingly, adverbial form, simplified rules
+#   L -ment, -ments, -ment's, suffix, both generated
+#   l -ably, simplified rules
+#   N -ion, noun from verb, stress on last syllable of stem
+#   n -ion, -ions, noun from verb, stress NOT on last syllable of stem
+#   q -isation, -isations, -ization, -izations, all generated
+#   S -s, noun plurals, verb conjugation
+#   s -iser, -isers, -izer, -izers, -iser's, -izer's, all generated
+#   T -er, -est, adjectival comparatives, both generated
+#   t -isable, -isability, -izable, -izability, all generated
+#   u -iveness, ending for verbs
+#   V -ive, ending for verbs (simplified rules)
+#   v -ively, ending for verbs
+#   W -ic, adjectival ending, simplified rules
+#   w -ical, adjectival ending, simplified rules
+#   X -ions, noun plural, stress on last syllable of stem, simplified rules
+#   x -ional, -ionally, simplified rules, both endings formed
+#   Y -ly, adverb endings for adjectives
+#   y -ry, adjectival and noun forms, simplified rules.
+#   0 -al, noun from verb, simplified rules
+#   1 -ically, adverbial double suffix, simplified rules
+#   2 -iness, y+ness ending, simplified rules
+#   3 -ist, -ists, -ists's, professions
+#   5 -woman, -women, -woman's suffixes, all generated
+#   7 -able, last syllable NOT stressed, -ate words <= 2 syllables
+# Each code gives a tuple of rules: (stem, prefix, suffix, firstLetters)
+#   where stem is an index into the list made by getHunspellStems
+#   and firstLetters (if given) are the letters that the word must start with ('^' = must not start with)
+HUNSPELL_AFFIX_RULES = {
+    'A': ( (0,'re','',None), ),
+    'a': ( (0,'mis','',None), ),
+    'B': ( (0,'','able',None), (0,'','ability',None), ),
+    'b': ( (2,'','ible',None), (2,'','ibility',None), ),
+    'C': ( (0,'de','',None), ),
+    'c': ( (0,'over','',None), ),
+    'D': ( (2,'','ed',None), ), # last syllable of stem stressed
+    'd': ( (0,'','ed',None), (0,'','ing',None), ),
+    'E': ( (0,'dis','',None), ),
+    'e': ( (0,'out','',None), ),
+    'F': ( (0,'com','','mbp'), (0,'con','','^mbp'), ), # e.g., ment -> prefix
+    'f': ( (0,'under','',None), ),
+    'G': ( (2,'','ing',None), ), # e.g., XXX -> ending for verbs, stress on last syllable of stem
+    'g': ( (2,'','ability',None), ), # e.g., palate -> last syllable NOT stressed
+    'H': ( (0,'','th',None), (0,'','fold',None), ), # e.g., eighty-four -> number specific suffixes, both generated
+    'h': ( (2,'','edly',None), ), # e.g., abash -> adverbial, simplified rules
+    'I': ( (0,'im','','mbp'), (0,'il','','l'), (0,'ir','','r'), (0,'in','','^mbplr'), ),
+    'i': ( (3,'','edness',None), ),
+    'J': ( (0,'','ings',None), ), # e.g., band -> plural noun version of verb ing ending, simplified rules
+    'j': ( (0,'','fully',None), ), # e.g., bliss, wonder -> suffix
+    'K': ( (0,'pre','',None), ),
+    'k': ( (2,'','ingly',None), ),
+    'L': ( (0,'','ment',None), (0,'','ments',None), (0,'',"ment's",None), ),
+    'l': ( (0,'','ably',None), ), # e.g., avoid
+    'M': ( (0,'',"'s",None), ), # e.g., abalone -> possessive form (What about other apostrophe types?)
+    'm': ( (0,'','man',None), (0,'',"man's",None), (0,'','men',None), (0,'',"men's",None), ), # e.g., artillery -> suffixes, all generated
+    'N': ( (2,'','ion',None), ), # e.g., assume
+    'n': ( (2,'','ion',None), (2,'','ions',None), ),
+    'O': ( (0,'non','',None), ), # e.g., fiction -> prefix
+    'o': ( (1,'','ally',None), ), # e.g., apocrypha -> adverb from verb, simplified rules
+    'P': ( (5,'','ness',None), (5,'',"ness's",None), ), # e.g., absolute -> adjective degree of comparison
+    'p': ( (0,'','less',None), ), # e.g., body -> comparative suffix
+    'Q': ( (2,'','ise',None), (2,'','ised',None), (2,'','ises',None), (2,'','ising',None),
+           (2,'','ize',None), (2,'','ized',None), (2,'','izes',None), (2,'','izing',None), ), # e.g., pre -> all generated
+    'R': ( (2,'','er',None), (2,'','ers',None), (2,'',"er's",None), ), # e.g., abjure -> doer, last syllable stressed, both forms generated
+    'r': ( (0,'','er',None), (0,'','ers',None), (0,'',"er's",None), ), # e.g., backslid -> doer, last syllable NOT stressed, both forms generated
+    'S': ( (4,'','s',None), ),
+    'T': ( (3,'','er',None), (3,'','est',None), ),
+    'U': ( (0,'un','',None), ),
+    'u': ( (3,'','iveness',None), ),
+    'V': ( (3,'','ive',None), ),
+    'v': ( (3,'','ively',None), ),
+    'W': ( (3,'','ic',None), ),
+    'w': ( (3,'','ical',None), ),
+    'X': ( (3,'','ions',None), ), # e.g., assume
+    'x': ( (3,'','ional',None), (0,'','ionally',None), ),
+    'Y': ( (5,'','ly',None), ),
+    'y': ( (0,'','ry',None), ),
+    'Z': ( (2,'','y',None), ), # e.g., academe -> diminutive and adjectival form, simplified rules
+    'z': ( (3,'','ily',None), ), # e.g., cage -> adverbial ending where adjective adds y
+    '1': (), # -ically isn't handled (yet)
+    '2': ( (3,'','iness',None), ), # e.g., bone -> y+ness ending, simplified rules
+    '3': ( (3,'','ist',None), (2,'','ists',None), (2,'',"ist's",None), ),
+    '4': ( (0,'trans','',None), ),
+    '5': ( (0,'','woman',None), (0,'',"woman's",None), (0,'','women',None), (0,'',"women's",None), ), # e.g., chair
+    '6': ( (0,'','ful',None), ), # e.g., bliss, wonder -> suffix
+    '7': ( (0,'','able',None), ),
+    }
+HUNSPELL_CACHE_VERSION = 1 # Increment this whenever the affix rules are changed
+HUNSPELL_CACHE_FOLDER_NAME = 'DictionaryCache/' # Inside the Biblelator data folder (if we can't write next to the dictionary)
+
+
+def compileHunspellAffixRules( affixRules ):
+    """
+    Convert the affix rules into lookup tables which are faster to apply.
+
+    Returns a dictionary indexed by code containing lists of 5-tuples:
+        stem index, prefix, suffix, firstLetters (or None), and a flag for negated firstLetters.
+    """
+    compiledRules = {}
+    for code, rules in affixRules.items():
+        compiledRules[code] = []
+        for stemIndex, prefix, suffix, firstLetters in rules:
+            if firstLetters and firstLetters[0] == '^':
+                compiledRules[code].append( (stemIndex, prefix, suffix, firstLetters[1:], True) )
+            else: compiledRules[code].append( (stemIndex, prefix, suffix, firstLetters, False) )
+    return compiledRules
+# end of AutocompleteFunctions.compileHunspellAffixRules
+
+compiledHunspellAffixRules = compileHunspellAffixRules( HUNSPELL_AFFIX_RULES )
+
+
+def getHunspellStems( word ):
+    """
+    Returns a list of the stems (used by HUNSPELL_AFFIX_RULES) for the word.
+    """
+    lastLetter = word[-1]
+    wordDeleteE = word[:-1] if lastLetter=='e' else word
+    wordAddEAfterSY = word+'e' if lastLetter=='s' else word
+    if wordAddEAfterSY[-1]=='y': wordAddEAfterSY = wordAddEAfterSY[:-1]+'ie'
+    return [ word,
+             word[:-1] if lastLetter=='a' else word, # wordDeleteA
+             wordDeleteE,
+             word[:-1] if lastLetter in ('e','y',) else word, # wordDeleteEY
+             wordAddEAfterSY,
+             word[:-1]+'i' if lastLetter=='y' else word, # wordYtoI
+           ]
+# end of AutocompleteFunctions.getHunspellStems
+
+
+def expandHunspellDictionary( dictionaryFilepath, encoding='utf-8' ):
+    """
+    Load all the words in a Hunspell-type dictionary
+        along with all the words generated from them by the affix rules.
+
+    Returns the list of words.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("expandHunspellDictionary( {}, {} )").format( dictionaryFilepath, encoding ) )
 
-    editWindowObject.parentApp.setWaitStatus( _("Loading dictionary…") )
     internalCount = None
     autocompleteWords = []
     lineCount = 0
@@ -487,7 +1498,7 @@ def loadHunspellAutocompleteWords( editWindowObject, dictionaryFilepath, encodin
         for line in dictionaryFile:
             lineCount += 1
             if lineCount==1 and encoding.lower()=='utf-8' and line[0]==chr(65279): #U+FEFF or \ufeff
-                logging.info( "loadHunspellAutocompleteWords: Detected Unicode Byte Order Marker (BOM) in {}".format( dictionaryFilepath ) )
+                logging.info( "expandHunspellDictionary: Detected Unicode Byte Order Marker (BOM) in {}".format( dictionaryFilepath ) )
                 line = line[1:] # Remove the Unicode Byte Order Marker (BOM)
             if line and line[-1]=='\n': line=line[:-1] # Remove trailing newline character
             if not line: continue # Just discard blank lines
@@ -502,179 +1513,126 @@ def loadHunspellAutocompleteWords( editWindowObject, dictionaryFilepath, encodin
             if word in ('3GPP','AA','ACAS',): continue # Throw out rubbish
             #print( "word", repr(word), repr(codes) )
             autocompleteWords.append( word )
+            if not codes: continue
 
-            wordDeleteA = word[:-1] if word[-1]=='a' else word
-            wordDeleteE = word[:-1] if word[-1]=='e' else word
-            wordDeleteEY = word[:-1] if word[-1] in ('e','y',) else word
-            wordDeleteEChangeY = wordDeleteE[:-1]+'i' if wordDeleteE[-1]=='y' else wordDeleteE
-            wordAddEAfterSY = word+'e' if word[-1]=='s' else word
-            wordAddEAfterSY = wordAddEAfterSY[:-1]+'ie' if wordAddEAfterSY[-1]=='y' else wordAddEAfterSY
-            wordYtoI = word[:-1]+'i' if word[-1]=='y' else word
-
-            generatedWords = []
-            """
-            B -able, -ability, last syllable of stem stressed, -ate words &gt; 2 syllables
-            b -ible, very basic rules, only dropped e
-            D -ed, regular verb past tenses, last syllable of stem stressed
-            d -ed, -ing, regular verb past tenses and adverbial form, last syllable NOT stressed
-            E dis- Prefix for negation
-            e out- Prefix
-            h -edly, adverbial, simplified rules
-            I in- im- il- ir- Prefix, opposite of.
-            i -edness, degree, simplified rules
-            j -fully, suffix
-            K pre-, prefix
-            k -ingly, adverbial form, simplified rules
-            L -ment, -ments, -ment's, suffix, both generated
-            l -ably, simplified rules
-            N -ion, noun from verb, stress on last syllable of stem
-            n -ion, -ions, noun from verb, stress NOT on last syllable of stem
-            q -isation, -isations, -ization, -izations, all generated
-            S -s, noun plurals, verb conjugation
-            s -iser, -isers, -izer, -izers, -iser's, -izer's, all generated
-            T -er, -est, adjectival comparatives, both generated
-            t -isable, -isability, -izable, -izability, all generated
-            u -iveness, ending for verbs
-            V -ive, ending for verbs (simplified rules)
-            v -ively, ending for verbs
-            W -ic, adjectival ending, simplified rules
-            w -ical, adjectival ending, simplified rules
-            X -ions, noun plural, stress on last syllable of stem, simplified rules
-            x -ional, -ionally, simplified rules, both endings formed
-            Y -ly, adverb endings for adjectives
-            y -ry, adjectival and noun forms, simplified rules.
-            0 -al, noun from verb, simplified rules
-            1 -ically, adverbial double suffix, simplified rules
-            2 -iness, y+ness ending, simplified rules
-            3 -ist, -ists, -ists's, professions
-            5 -woman, -women, -woman's suffixes, all generated
-            7 -able, last syllable NOT stressed, -ate words <= 2 syllables
-            """
+            stems = getHunspellStems( word )
             for code in codes:
-                #print( "  code", code, "for", repr(word) )
-                if code == 'A': generatedWords.append( 're' + word )
-                elif code == 'a': generatedWords.append( 'mis' + word )
-                elif code == 'B': generatedWords.append( word+'able' ); generatedWords.append( word+'ability' )
-                elif code == 'b': generatedWords.append( wordDeleteE + 'ible' ); generatedWords.append( wordDeleteE + 'ibility' )
-                elif code == 'C': generatedWords.append( 'de' + word )
-                elif code == 'c': generatedWords.append( 'over' + word )
-                elif code == 'D': generatedWords.append( wordDeleteE + 'ed' ) # last syllable of stem stressed
-                elif code == 'd': generatedWords.append( word+'ed' ); generatedWords.append( word+'ing' )
-                elif code == 'E': generatedWords.append( 'dis' + word )
-                elif code == 'e': generatedWords.append( 'out' + word )
-                elif code == 'F': # e.g., ment -> prefix
-                    if word[0] in ( 'm','b','p',): generatedWords.append( 'com' + word )
-                    #elif word[0] == 'l': generatedWords.append( 'il' + word )
-                    #elif word[0] == 'r': generatedWords.append( 'ir' + word )
-                    else: generatedWords.append( 'con' + word )
-                elif code == 'f': generatedWords.append( 'under' + word )
-                elif code == 'G': # e.g., XXX -> ending for verbs, stress on last syllable of stem
-                    generatedWords.append( wordDeleteE + 'ing' )
-                elif code == 'g': # e.g., palate -> last syllable NOT stressed
-                    generatedWords.append( wordDeleteE + 'ability' )
-                elif code == 'H': # e.g., eighty-four -> number specific suffixes, both generated
-                    generatedWords.append( word + 'th' ); generatedWords.append( word + 'fold' )
-                elif code == 'h': # e.g., abash -> adverbial, simplified rules
-                    generatedWords.append( wordDeleteE + 'edly' )
-                elif code == 'I':
-                    if word[0] in ( 'm','b','p',): generatedWords.append( 'im' + word )
-                    elif word[0] == 'l': generatedWords.append( 'il' + word )
-                    elif word[0] == 'r': generatedWords.append( 'ir' + word )
-                    else: generatedWords.append( 'in' + word )
-                elif code == 'i': generatedWords.append( wordDeleteEY + 'edness' )
-                elif code == 'J': # e.g., band -> plural noun version of verb ing ending, simplified rules
-                    generatedWords.append( word + 'ings' )
-                elif code == 'j': # e.g., bliss, wonder -> suffix
-                    generatedWords.append( word + 'fully' )
-                elif code == 'K': generatedWords.append( 'pre' + word )
-                elif code == 'k': generatedWords.append( wordDeleteE + 'ingly' )
-                elif code == 'L': generatedWords.append( word+'ment' ); generatedWords.append( word+'ments' ); generatedWords.append( word+"ment's" )
-                elif code == 'l': # e.g., avoid
-                    generatedWords.append( word + 'ably' )
-                elif code == 'M': # e.g., abalone -> possessive form
-                    generatedWords.append( word + "'s" ) # What about other apostrophe types
-                elif code == 'm': # e.g., artillery -> suffixes, all generated
-                    generatedWords.append( word+'man' ); generatedWords.append( word+"man's" ); generatedWords.append( word+'men' ); generatedWords.append( word+"men's" )
-                elif code == 'N': # e.g., assume
-                    generatedWords.append( wordDeleteE + 'ion' )
-                elif code == 'n': generatedWords.append( wordDeleteE+'ion' ); generatedWords.append( wordDeleteE+'ions' )
-                elif code == 'O': # e.g., fiction -> prefix
-                    generatedWords.append( 'non' + word )
-                elif code == 'o': # e.g., apocrypha -> adverb from verb, simplified rules
-                    generatedWords.append( wordDeleteA + 'ally' )
-                elif code == 'P': # e.g., absolute -> adjective degree of comparison
-                    generatedWords.append( wordYtoI+'ness' ); generatedWords.append( wordYtoI+"ness's" )
-                elif code == 'p': # e.g., body -> comparative suffix
-                    generatedWords.append( word+'less' )
-                elif code == 'Q': # e.g., pre -> all generated
-                    generatedWords.append( wordDeleteE+'ise' ); generatedWords.append( wordDeleteE+'ised' ); generatedWords.append( wordDeleteE+'ises' ); generatedWords.append( wordDeleteE+'ising' )
-                    generatedWords.append( wordDeleteE+'ize' ); generatedWords.append( wordDeleteE+'ized' ); generatedWords.append( wordDeleteE+'izes' ); generatedWords.append( wordDeleteE+'izing' )
-                elif code == 'R': # e.g., abjure -> doer, last syllable stressed, both forms generated
-                    generatedWords.append( wordDeleteE+'er' ); generatedWords.append( wordDeleteE+'ers' ); generatedWords.append( wordDeleteE+"er's" )
-                elif code == 'r': # e.g., backslid -> doer, last syllable NOT stressed, both forms generated
-                    generatedWords.append( word+'er' ); generatedWords.append( word+'ers' ); generatedWords.append( word+"er's" )
-                elif code == 'S': generatedWords.append( wordAddEAfterSY + 's' )
-                elif code == 'T': generatedWords.append( wordDeleteEY+'er' ); generatedWords.append( wordDeleteEY+'est' )
-                elif code == 'U': generatedWords.append( 'un' + word )
-                elif code == 'u': generatedWords.append( wordDeleteEY + 'iveness' )
-                elif code == 'V': generatedWords.append( wordDeleteEY + 'ive' )
-                elif code == 'v': generatedWords.append( wordDeleteEY + 'ively' )
-                elif code == 'W': generatedWords.append( wordDeleteEY + 'ic' )
-                elif code == 'w': generatedWords.append( wordDeleteEY + 'ical' )
-                elif code == 'X': # e.g., assume
-                    generatedWords.append( wordDeleteEY + 'ions' )
-                elif code == 'x': generatedWords.append( wordDeleteEY + 'ional' ); generatedWords.append( word + 'ionally' )
-                elif code == 'Y': generatedWords.append( wordYtoI + 'ly' )
-                elif code == 'y': generatedWords.append( word + 'ry' )
-                elif code == 'Z': # e.g., academe -> diminutive and adjectival form, simplified rules
-                    generatedWords.append( wordDeleteE + 'y' )
-                elif code == 'z': # e.g., cage -> adverbial ending where adjective adds y
-                    generatedWords.append( wordDeleteEY + 'ily' )
-                elif code == '1': print( ' 1 on', repr(word), 'ignored' )
-                elif code == '2': # e.g., bone -> y+ness ending, simplified rules
-                    generatedWords.append( wordDeleteEY + 'iness' )
-                elif code == '3': generatedWords.append( wordDeleteEY+'ist' ); generatedWords.append( wordDeleteE+'ists' ); generatedWords.append( wordDeleteE+"ist's" )
-                elif code == '5': # e.g., chair
-                    generatedWords.append( word+'woman' ); generatedWords.append( word+"woman's" ); generatedWords.append( word+'women' ); generatedWords.append( word+"women's" )
-                elif code == '4': generatedWords.append( 'trans' + word )
-                elif code == '6': # e.g., bliss, wonder -> suffix
-                    generatedWords.append( word + 'ful' )
-                elif code == '7': generatedWords.append( word + 'able' )
-                elif BibleOrgSysGlobals.debugFlag:
-                    print( lineCount, "code", code, "for", repr(word), repr(codes) )
-                    halt
-            print( "  generated", generatedWords, 'from', repr(word), repr(codes) )
-            autocompleteWords.extend( generatedWords )
+                try: rules = compiledHunspellAffixRules[code]
+                except KeyError:
+                    if BibleOrgSysGlobals.debugFlag:
+                        print( lineCount, "code", code, "for", repr(word), repr(codes) )
+                    continue
+                for stemIndex, prefix, suffix, firstLetters, negated in rules:
+                    if firstLetters is None or (word[0] in firstLetters) != negated:
+                        autocompleteWords.append( prefix + stems[stemIndex] + suffix )
 
             #lastLine = line
             #if lineCount > 60: break
     #print( 'acW', len(autocompleteWords), autocompleteWords )
+    return autocompleteWords
+# end of AutocompleteFunctions.expandHunspellDictionary
 
-    if editWindowObject.autocompleteMinLength < 4:
-        print( "NOTE: Lengthened autocompleteMinLength from {} to {}".format( editWindowObject.autocompleteMinLength, 4 ) )
-        editWindowObject.autocompleteMinLength = 4 # Show the window after this many characters have been typed
-    setAutocompleteWords( editWindowObject, autocompleteWords )
-    editWindowObject.addAllNewWords = False
-# end of AutocompleteFunctions.loadHunspellAutocompleteWords
 
+def getHunspellCacheFilepaths( dictionaryFilepath ):
+    """
+    Returns a list of the places where the expanded word list for the dictionary might be cached:
+        next to the dictionary, or in the Biblelator data folder (if the dictionary folder is read-only).
+    """
+    cacheFilename = os.path.splitext( os.path.basename( dictionaryFilepath ) )[0] + '.' + APP_NAME + 'Words.pickle'
+    return [ os.path.join( os.path.dirname( dictionaryFilepath ), cacheFilename ),
+             os.path.join( findHomeFolderPath(), DATA_FOLDER_NAME, HUNSPELL_CACHE_FOLDER_NAME, cacheFilename ) ]
+# end of AutocompleteFunctions.getHunspellCacheFilepaths
 
 
-def loadILEXAutocompleteWords( editWindowObject, dictionaryFilepath, lgCodes=None ):
+def getHunspellCacheKey( dictionaryFilepath, encoding ):
     """
-    Load all the existing words in an ILEX dictionary
+    Returns something that will change if the dictionary or its affix file change.
+    """
+    affixFilepath = os.path.splitext( dictionaryFilepath )[0] + '.aff'
+    affixMTime = os.stat( affixFilepath ).st_mtime if os.path.exists( affixFilepath ) else None
+    return HUNSPELL_CACHE_VERSION, os.stat( dictionaryFilepath ).st_mtime, affixMTime, encoding
+# end of AutocompleteFunctions.getHunspellCacheKey
+
+
+def generateHunspellAutocompleteWords( dictionaryFilepath, encoding='utf-8' ):
+    """
+    A generator to find all the existing words in a Hunspell-type dictionary
+        (designed to be run in a worker thread -- see loadAutocompleteWordsInBackground).
+
+    The expanded word list is cached so that the dictionary only needs to be expanded again
+        if the .dic or .aff file changes.
+
+    Yields a single 2-tuple containing the list of words and None.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("generateHunspellAutocompleteWords( {}, {} )").format( dictionaryFilepath, encoding ) )
+
+    cacheKey = getHunspellCacheKey( dictionaryFilepath, encoding )
+    cacheFilepaths = getHunspellCacheFilepaths( dictionaryFilepath )
+    for cacheFilepath in cacheFilepaths:
+        try:
+            with open( cacheFilepath, 'rb' ) as cacheFile:
+                cachedKey, autocompleteWords = pickle.load( cacheFile )
+        except FileNotFoundError: continue
+        except ( OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError ) as err:
+            logging.warning( "generateHunspellAutocompleteWords: Unable to load {}: {}".format( cacheFilepath, err ) )
+            continue
+        if cachedKey == cacheKey:
+            yield autocompleteWords, None
+            return
+
+    autocompleteWords = expandHunspellDictionary( dictionaryFilepath, encoding )
+    for cacheFilepath in cacheFilepaths:
+        try:
+            os.makedirs( os.path.dirname( cacheFilepath ), exist_ok=True )
+            tempFilepath = cacheFilepath + '.tmp'
+            with open( tempFilepath, 'wb' ) as cacheFile:
+                pickle.dump( (cacheKey,autocompleteWords), cacheFile, pickle.HIGHEST_PROTOCOL )
+            os.replace( tempFilepath, cacheFilepath ) # So we never leave a half-written cache file
+            break
+        except OSError as err:
+            logging.info( "generateHunspellAutocompleteWords: Unable to save {}: {}".format( cacheFilepath, err ) )
+    yield autocompleteWords, None
+# end of AutocompleteFunctions.generateHunspellAutocompleteWords
+
+
+def loadHunspellAutocompleteWords( editWindowObject, dictionaryFilepath, encoding='utf-8' ):
+    """
+    Load all the existing words in a Hunspell-type dictionary
         to fill the autocomplete mechanism
 
+    The words are loaded in the background so the user can continue editing.
+
     editWindowObject here is a text edit window or derivation.
 
     NOTE: This list maybe should be updated as the user enters new words
         or else have an additional user dictionary.
     """
-    logging.info( exp("loadILEXAutocompleteWords( {}, {} )").format( dictionaryFilepath, lgCodes ) )
+    logging.info( exp("loadHunspellAutocompleteWords( {}, {} )").format( dictionaryFilepath, encoding ) )
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-        print( exp("loadILEXAutocompleteWords( {}, {} )").format( dictionaryFilepath, lgCodes ) )
-        editWindowObject.parentApp.setDebugText( "loadILEXAutocompleteWords…" )
+        print( exp("loadHunspellAutocompleteWords( {}, {} )").format( dictionaryFilepath, encoding ) )
+        editWindowObject.parentApp.setDebugText( "loadHunspellAutocompleteWords…" )
 
     editWindowObject.parentApp.setWaitStatus( _("Loading dictionary…") )
+    if editWindowObject.autocompleteMinLength < 4:
+        print( "NOTE: Lengthened autocompleteMinLength from {} to {}".format( editWindowObject.autocompleteMinLength, 4 ) )
+        editWindowObject.autocompleteMinLength = 4 # Show the window after this many characters have been typed
+    loadAutocompleteWordsInBackground( editWindowObject,
+            generateHunspellAutocompleteWords( dictionaryFilepath, encoding ), addAllNewWords=False )
+# end of AutocompleteFunctions.loadHunspellAutocompleteWords
+
+
+
+def generateILEXAutocompleteWords( dictionaryFilepath, lgCodes=None ):
+    """
+    A generator to find all the existing words in an ILEX dictionary
+        (designed to be run in a worker thread -- see loadAutocompleteWordsInBackground).
+
+    Yields a single 2-tuple containing the list of words and None.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("generateILEXAutocompleteWords( {}, {} )").format( dictionaryFilepath, lgCodes ) )
+
     autocompleteWords = []
     lineCount = 0
     with open( dictionaryFilepath, 'rt', encoding='utf-8' ) as dictionaryFile:
@@ -710,12 +1668,33 @@ def loadILEXAutocompleteWords( editWindowObject, dictionaryFilepath, lgCodes=Non
             #lastLine = line
             #if lineCount > 600: break
     #print( 'acW', len(autocompleteWords), autocompleteWords )
+    yield autocompleteWords, None
+# end of AutocompleteFunctions.generateILEXAutocompleteWords
+
+
+def loadILEXAutocompleteWords( editWindowObject, dictionaryFilepath, lgCodes=None ):
+    """
+    Load all the existing words in an ILEX dictionary
+        to fill the autocomplete mechanism
+
+    The words are loaded in the background so the user can continue editing.
+
+    editWindowObject here is a text edit window or derivation.
 
+    NOTE: This list maybe should be updated as the user enters new words
+        or else have an additional user dictionary.
+    """
+    logging.info( exp("loadILEXAutocompleteWords( {}, {} )").format( dictionaryFilepath, lgCodes ) )
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("loadILEXAutocompleteWords( {}, {} )").format( dictionaryFilepath, lgCodes ) )
+        editWindowObject.parentApp.setDebugText( "loadILEXAutocompleteWords…" )
+
+    editWindowObject.parentApp.setWaitStatus( _("Loading dictionary…") )
     if editWindowObject.autocompleteMinLength < 4:
         print( "NOTE: Lengthened autocompleteMinLength from {} to {}".format( editWindowObject.autocompleteMinLength, 4 ) )
         editWindowObject.autocompleteMinLength = 4 # Show the window after this many characters have been typed
-    setAutocompleteWords( editWindowObject, autocompleteWords )
-    editWindowObject.addAllNewWords = False
+    loadAutocompleteWordsInBackground( editWindowObject,
+            generateILEXAutocompleteWords( dictionaryFilepath, lgCodes ), addAllNewWords=False )
 # end of AutocompleteFunctions.loadILEXAutocompleteWords
 
 
@@ -867,28 +1846,22 @@ def addNewAutocompleteWord( self, possibleNewWord ):
         assert isinstance( possibleNewWord, str )
         assert possibleNewWord
 
-    if ' ' in possibleNewWord: # bring each separate word to the top
-        remainder = possibleNewWord
-        while ' ' in remainder:
-            individualWord, remainder = remainder.split( None, 1 )
-            #print( "  word={!r}, remainder={!r}".format( individualWord, remainder ) )
-            #print( "Recursive1 of {!r}".format( individualWord ) )
-            addNewAutocompleteWord( self, individualWord ) # recursive call
-            #print( "Recursive2 of {!r}".format( remainder ) )
-            addNewAutocompleteWord( self, remainder ) # recursive call
-
-    while possibleNewWord and possibleNewWord[-1] in END_CHARS_TO_REMOVE:
-        possibleNewWord = possibleNewWord[:-1] # Remove certain final punctuation
-
-    if len( possibleNewWord ) > self.autocompleteMinLength:
-        #print( "Adding new autocomplete word: {!r}".format( possibleNewWord ) )
-        # Put this word at the beginning of the list so it comes up on top next time
-        firstLetter, remainder = possibleNewWord[0], possibleNewWord[1:]
-        try: self.autocompleteWords[firstLetter].remove( remainder )
-        except ValueError: pass # remove will fail if this really is a new word
-        except KeyError: # There's no list existing for this letter
-            self.autocompleteWords[firstLetter] = []
-        self.autocompleteWords[firstLetter].insert( 0, remainder )
+    # Bring each separate word (followed by the rest of the phrase) to the top
+    #   and then the whole phrase (so that it ends up on top)
+    wordsToPromote = []
+    if ' ' in possibleNewWord:
+        individualWords = possibleNewWord.split()
+        for wx,individualWord in enumerate( individualWords[:-1] ):
+            wordsToPromote.append( individualWord )
+            wordsToPromote.append( ' '.join( individualWords[wx+1:] ) )
+    wordsToPromote.append( possibleNewWord )
+
+    for word in wordsToPromote:
+        word = word.rstrip( END_CHARS_TO_REMOVE ) # Remove certain final punctuation
+        if len( word ) > self.autocompleteMinLength:
+            #print( "Adding new autocomplete word: {!r}".format( word ) )
+            # Give this word the best rank so it comes up on top next time
+            self.autocompleteWords.promoteWord( word )
 # end of AutocompleteFunctions.addNewAutocompleteWord
 
 
@@ -23,11 +23,17 @@
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
+Functions to support the autocorrect function in text editors.
+
+    setAutocorrectEntries( self, autocorrectEntryList, append=False )
+    setDefaultAutocorrectEntries( self )
+    compileAutocorrectTrie( autocorrectEntries )
+    findAutocorrectEntry( autocorrectTrie, previousText )
 """
 
 from gettext import gettext as _
 
-LastModifiedDate = '2017-04-10' # by RJH
+LastModifiedDate = '2017-11-20' # by RJH
 ShortProgName = "AutocorrectFunctions"
 ProgName = "Biblelator Autocorrect Functions"
 ProgVersion = '0.40'
@@ -78,12 +84,58 @@ def setAutocorrectEntries( self, autocorrectEntryList, append=False ):
     self.maxAutocorrectLength = 0
     for inChars,outChars in self.autocorrectEntries:
         self.maxAutocorrectLength = max( len(inChars), self.maxAutocorrectLength )
+    self.autocorrectTrie = compileAutocorrectTrie( self.autocorrectEntries )
 
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
         print( "  autocorrect total entries loaded = {:,}".format( len(self.autocorrectEntries) ) )
 # end of AutocorrectFunctions.setAutocorrectEntries
 
 
+
+def compileAutocorrectTrie( autocorrectEntries ):
+    """
+    Put the autocorrect entries into a trie of their reversed input characters
+        so that the entry matching the characters before the cursor
+        can be found by walking back from the cursor.
+
+    Each node is a dictionary from the previous character to the next node,
+        and None maps to (entryIndex,inChars,outChars) if an entry ends at that node.
+    If the same input characters occur more than once, the first entry is used.
+
+    Returns the root node.
+    """
+    autocorrectTrie = {}
+    for entryIndex,(inChars,outChars) in enumerate( autocorrectEntries ):
+        node = autocorrectTrie
+        for char in reversed( inChars ):
+            node = node.setdefault( char, {} )
+        if None not in node: node[None] = (entryIndex,inChars,outChars)
+    return autocorrectTrie
+# end of AutocorrectFunctions.compileAutocorrectTrie
+
+
+def findAutocorrectEntry( autocorrectTrie, previousText ):
+    """
+    Find the autocorrect entry whose input characters end previousText
+        in only as many steps as there are characters in previousText.
+
+    If more than one entry matches (e.g., both 'ab' and 'b'),
+        the one that came first in the list of entries is used
+        (the same as checking each entry with endswith in order).
+
+    Returns (inChars,outChars) or None.
+    """
+    node = autocorrectTrie
+    bestEntry = node.get( None )
+    for char in reversed( previousText ):
+        try: node = node[char]
+        except KeyError: break
+        entry = node.get( None )
+        if entry is not None and ( bestEntry is None or entry[0] < bestEntry[0] ): bestEntry = entry
+    return None if bestEntry is None else bestEntry[1:]
+# end of AutocorrectFunctions.findAutocorrectEntry
+
+
 def setDefaultAutocorrectEntries( self ):
     """
     Given a word list, set the entries into the autocorrect words
@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Benchmarks.py
+#
+# Timing benchmarks for some of the slower parts of Biblelator
+#
+# Copyright (C) 2017 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Timing benchmarks which are run on a folder of USFM Bible files, e.g.,
+    python3 Benchmarks.py ../../../../../Data/Work/Matigsalug/Bible/MBTV/
+
+    getUSFMTextLines( USFMFolder )
+    benchmarkGetTextWords( textLines, repeats=3 )
+    makeKeystrokeTrace( bookText, numKeystrokes=KEYSTROKE_TRACE_LENGTH, seed=0 )
+    saveKeystrokeTrace( trace, filepath )
+    loadKeystrokeTrace( filepath )
+    flushTextCheck( replayWindow )
+    replayKeystrokeTrace( replayWindow, trace )
+    benchmarkKeystrokeReplay( USFMFolder, traceFolder=None, maxBooks=MAX_REPLAY_BOOKS )
+    benchmarkHighlighting( USFMFolder, repeats=3 )
+
+Where code has been rewritten for speed, the previous code is kept here
+    so that the timings can be compared (and the results checked to be identical).
+
+The keystroke replay and highlighting benchmarks use Tk,
+    so on a server (or for repeatable timings) run it under a virtual X display, e.g.,
+    xvfb-run python3 Benchmarks.py --traces ../BenchmarkTraces/ ../../../../../Data/Work/Matigsalug/Bible/MBTV/
+If there's no display at all, they use a headless text box instead (see HeadlessTk)
+    which only times the Python (and Tcl) code and not Tk itself.
+"""
+
+from gettext import gettext as _
+
+LastModifiedDate = '2017-11-24' # by RJH
+ShortProgName = "Benchmarks"
+ProgName = "Biblelator Benchmarks"
+ProgVersion = '0.41'
+ProgNameVersion = '{} v{}'.format( ProgName, ProgVersion )
+ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), LastModifiedDate )
+
+debuggingThisModule = False
+
+
+import sys, os
+import time
+import json, random
+from collections import defaultdict, Counter
+
+import tkinter as tk
+from tkinter import font
+
+# Biblelator imports
+from BiblelatorGlobals import tkSTART
+from TextBoxes import CustomText, ChildBox
+from HeadlessTk import HeadlessRoot, HeadlessWidget, HeadlessCustomText, HeadlessListbox
+from TextEditWindow import TextEditWindow
+from USFMEditWindow import USFMEditWindow
+from USFMTextChecker import USFMTextChecker
+from AutocorrectFunctions import setDefaultAutocorrectEntries
+from AutocompleteFunctions import END_CHARS_TO_REMOVE, BIBLE_PHRASE_THRESHOLD, AutocompleteWordIndex, \
+                                    getInternalMarkersRegex, getTextWords, rankBibleWords, getNewWordChars
+
+# BibleOrgSys imports
+if __name__ == '__main__': sys.path.append( '../BibleOrgSys/' )
+import BibleOrgSysGlobals
+from VerseReferences import SimpleVerseKey
+
+
+DEFAULT_USFM_FOLDER = '../../../../../Data/Work/Matigsalug/Bible/MBTV/'
+USFM_FILE_EXTENSIONS = ( '.SFM', '.USFM', )
+KEYSTROKE_TRACE_LENGTH = 2000 # Number of keystrokes replayed for each book
+TYPING_MISTAKE_RATE = 0.03 # Fraction of keystrokes which are a mistake (then backspaced)
+MAX_REPLAY_BOOKS = 3 # The largest books are replayed
+
+
+
+def exp( messageString ):
+    """
+    Expands the message string in debug mode.
+    Prepends the module name to a error or warning message string
+        if we are in debug mode.
+    Returns the new string.
+    """
+    try: nameBit, errorBit = messageString.split( ': ', 1 )
+    except ValueError: nameBit, errorBit = '', messageString
+    if BibleOrgSysGlobals.debugFlag or debuggingThisModule:
+        nameBit = '{}{}{}'.format( ShortProgName, '.' if nameBit else '', nameBit )
+    return '{}{}'.format( nameBit+': ' if nameBit else '', errorBit )
+# end of exp
+
+
+
+def getUSFMTextLines( USFMFolder ):
+    """
+    Read all the USFM files in the folder.
+
+    Returns a list of the text fields (i.e., with the leading marker and any verse number removed).
+    """
+    textLines = []
+    for filename in sorted( os.listdir( USFMFolder ) ):
+        if os.path.splitext( filename )[1].upper() not in USFM_FILE_EXTENSIONS: continue
+        with open( os.path.join( USFMFolder, filename ), 'rt', encoding='utf-8-sig' ) as bookFile:
+            for line in bookFile:
+                line = line.rstrip( '\n' )
+                if not line: continue
+                if line[0] == '\\':
+                    try: marker, text = line[1:].split( None, 1 )
+                    except ValueError: continue # No text field
+                    if marker == 'v':
+                        try: text = text.split( None, 1 )[1]
+                        except IndexError: continue
+                else: text = line # a continuation line
+                textLines.append( text )
+    return textLines
+# end of getUSFMTextLines
+
+
+
+def previousStripMarkers( textLine, internalMarkers ):
+    """
+    The way that countBookWords used to remove the internal markers
+        with a string replace for each marker.
+    """
+    if '\\' in textLine: # we have internal markers to remove
+        for iMarker in internalMarkers:
+            textLine = textLine.replace( iMarker+' ',' ' ).replace( iMarker+'*',' ' )
+            if not '\\' in textLine: break
+    return textLine
+# end of previousStripMarkers
+
+
+def previousCountTextWords( textLine, wordCounts, countIncrement, internalMarkers ):
+    """
+    The way that countBookWords used to count words (before getTextWords was written)
+        with the phrases built by repeated concatenation
+        and each one counted as it was made.
+    """
+    textLine = previousStripMarkers( textLine, internalMarkers )
+    words = textLine.replace('—','— ').replace('–','– ').split() # Treat em-dash and en-dash as word break characters
+
+    # Now look for (and count) single and some multiple word sequences
+    for wx,word in enumerate( words ):
+        if not word: continue
+        if 'XXX' in word: continue # This is used in the Matigsalug project to mark errors
+        singleWord = word
+        while singleWord and singleWord[-1] in END_CHARS_TO_REMOVE:
+            singleWord = singleWord[:-1] # Remove certain final punctuation
+        if len(singleWord) > 2: wordCounts[singleWord] += countIncrement
+
+        if wx < len(words)-1: # it's not the last word in the line
+            doubleWord = word+' '+words[wx+1]
+            adjustedDoubleWord = doubleWord[:-1] if doubleWord[-1] in END_CHARS_TO_REMOVE else doubleWord
+            if '. ' not in adjustedDoubleWord: # don't go across sentence boundaries
+                wordCounts[adjustedDoubleWord] += countIncrement
+            if wx < len(words)-2: # there's still two words after this one
+                tripleWord = doubleWord+' '+words[wx+2]
+                adjustedTripleWord = tripleWord[:-1] if tripleWord[-1] in END_CHARS_TO_REMOVE else tripleWord
+                if '. ' not in adjustedTripleWord: # don't go across sentence boundaries
+                    wordCounts[adjustedTripleWord] += countIncrement
+                if wx < len(words)-3: # there's still three words after this one
+                    quadWord = tripleWord+' '+words[wx+3]
+                    adjustedQuadWord = quadWord[:-1] if quadWord[-1] in END_CHARS_TO_REMOVE else quadWord
+                    if '. ' not in adjustedQuadWord: # don't go across sentence boundaries
+                        wordCounts[adjustedQuadWord] += countIncrement
+                    if wx < len(words)-4: # there's still four words after this one
+                        quinWord = quadWord+' '+words[wx+4]
+                        adjustedQuinWord = quinWord[:-1] if quinWord[-1] in END_CHARS_TO_REMOVE else quinWord
+                        if '. ' not in adjustedQuinWord: # don't go across sentence boundaries
+                            wordCounts[adjustedQuinWord] += countIncrement
+# end of previousCountTextWords
+
+
+def benchmarkGetTextWords( textLines, repeats=3 ):
+    """
+    Compare the speed of the autocomplete word counting
+        before and after the tokeniser was rewritten.
+
+    The new code is timed in three stages (removing the internal markers,
+        making the words and phrases, and counting them).
+    The previous code counted each phrase as it was made so only its marker removal can be timed separately.
+
+    Returns the speed-up factor.
+    """
+    internalMarkers = BibleOrgSysGlobals.USFMMarkers.getNoteMarkersList() \
+        + BibleOrgSysGlobals.USFMMarkers.getCharacterMarkersList( includeBackslash=False, includeEndMarkers=False, includeNestedMarkers=True, expandNumberableMarkers=True )
+    internalMarkers = ['\\'+marker for marker in internalMarkers]
+    internalMarkersRegex = getInternalMarkersRegex()
+    numChars = sum( len(textLine) for textLine in textLines )
+    print( "\nCounting words in {:,} text lines ({:,} characters, {:,} with markers) (best of {})…" \
+            .format( len(textLines), numChars, sum( '\\' in textLine for textLine in textLines ), repeats ) )
+
+    bestTimes = {}
+    def timeStage( stageName, function, *args ):
+        """
+        Run the function and remember its best time.
+        """
+        startTime = time.perf_counter()
+        result = function( *args )
+        thisTime = time.perf_counter() - startTime
+        if stageName not in bestTimes or thisTime < bestTimes[stageName]: bestTimes[stageName] = thisTime
+        return result
+    # end of timeStage
+
+    def previousCount():
+        previousCounts = defaultdict( int )
+        for textLine in textLines: previousCountTextWords( textLine, previousCounts, 1, internalMarkers )
+        return previousCounts
+    def newTokenise( strippedLines ):
+        textWords = []
+        for textLine in strippedLines: textWords.extend( getTextWords( textLine ) )
+        return textWords
+    for j in range( repeats ):
+        previousCounts = timeStage( 'previous', previousCount )
+        timeStage( 'previousStrip', lambda: [previousStripMarkers( textLine, internalMarkers ) for textLine in textLines] )
+        strippedLines = timeStage( 'strip', lambda: [internalMarkersRegex.sub( ' ', textLine ) if '\\' in textLine else textLine for textLine in textLines] )
+        textWords = timeStage( 'tokenise', newTokenise, strippedLines )
+        newCounts = timeStage( 'count', Counter, textWords )
+        del textWords
+    newTime = bestTimes['strip'] + bestTimes['tokenise'] + bestTimes['count']
+    previousTime = bestTimes['previous']
+
+    if newCounts != previousCounts:
+        print( "  WARNING: Results differ!", len(previousCounts), len(newCounts) )
+    print( "  Previous: {:.3f}s ({:,.0f} chars/s) including removing markers {:.3f}s".format( previousTime, numChars/previousTime, bestTimes['previousStrip'] ) )
+    print( "  New:      {:.3f}s ({:,.0f} chars/s) = removing markers {:.3f}s + making {:,} words/phrases {:.3f}s + counting {:.3f}s" \
+            .format( newTime, numChars/newTime, bestTimes['strip'], sum( newCounts.values() ), bestTimes['tokenise'], bestTimes['count'] ) )
+    print( "  Speed-up: {:.2f}x overall ({:.1f}x removing markers) for {:,} different words/phrases" \
+            .format( previousTime/newTime, bestTimes['previousStrip']/bestTimes['strip'], len(newCounts) ) )
+    return previousTime / newTime
+# end of benchmarkGetTextWords
+
+
+
+def makeKeystrokeTrace( bookText, numKeystrokes=KEYSTROKE_TRACE_LENGTH, seed=0 ):
+    """
+    Make a keystroke trace by deleting and then retyping the text of some of the verses in the book
+        (with an occasional typing mistake which is then backspaced).
+    As long as nothing is autocorrected, the book ends up unchanged.
+
+    The trace is a list of steps, each being one of:
+        ('goto', startIndex, endIndex) -- delete the text ready to retype it (not timed)
+        ('key', char) -- type a character
+        ('backspace',) -- delete the previous character
+
+    The same seed always gives the same trace (so it's repeatable).
+    """
+    randomGenerator = random.Random( seed )
+    verseLines = []
+    for lineNumber,line in enumerate( bookText.split( '\n' ), start=1 ):
+        if line.startswith( '\\v ' ):
+            try: verseNumber, text = line[3:].split( None, 1 )
+            except ValueError: continue # No verse text
+            verseLines.append( (lineNumber, len(line)-len(text), text) )
+    randomGenerator.shuffle( verseLines )
+
+    trace, keystrokeCount = [], 0
+    for lineNumber,column,text in verseLines:
+        if keystrokeCount >= numKeystrokes: break
+        trace.append( ('goto', '{}.{}'.format( lineNumber, column ), '{}.{}'.format( lineNumber, column+len(text) )) )
+        for char in text:
+            if randomGenerator.random() < TYPING_MISTAKE_RATE:
+                trace.append( ('key', randomGenerator.choice( text )) )
+                trace.append( ('backspace',) )
+                keystrokeCount += 2
+            trace.append( ('key', char) )
+            keystrokeCount += 1
+    return trace
+# end of makeKeystrokeTrace
+
+
+def saveKeystrokeTrace( trace, filepath ):
+    """
+    Save the keystroke trace as JSON so that exactly the same keystrokes
+        can be replayed against later versions of Biblelator.
+    """
+    with open( filepath, 'wt', encoding='utf-8' ) as traceFile:
+        json.dump( trace, traceFile, ensure_ascii=False, indent=0 )
+# end of saveKeystrokeTrace
+
+
+def loadKeystrokeTrace( filepath ):
+    """
+    Load a keystroke trace saved by saveKeystrokeTrace.
+    """
+    with open( filepath, 'rt', encoding='utf-8' ) as traceFile:
+        return [tuple(step) for step in json.load( traceFile )]
+# end of loadKeystrokeTrace
+
+
+
+class KeystrokeReplayFunctions():
+    """
+    Just enough of a USFM edit window to run its text change callbacks
+        (used by KeystrokeReplayWindow and HeadlessKeystrokeReplayWindow).
+
+    The methods that are timed are the real ones from the edit window classes
+        but the calls to the main application (e.g., to display status messages
+        or to move other windows to the new verse) do nothing here.
+    """
+    onTextChange = USFMEditWindow.onTextChange
+    onTextNoChange = USFMEditWindow.onTextNoChange
+    setDefaultTextChecks = USFMEditWindow.setDefaultTextChecks
+    updateTextChecker = USFMEditWindow.updateTextChecker
+    startTextCheck = USFMEditWindow.startTextCheck
+    textCheckThreadProducer = USFMEditWindow.textCheckThreadProducer
+    textCheckThreadConsumer = USFMEditWindow.textCheckThreadConsumer
+    cancelTextCheck = USFMEditWindow.cancelTextCheck
+    checkUSFMTextForProblems = USFMEditWindow.checkUSFMTextForProblems
+    makeAutocompleteBox = TextEditWindow.makeAutocompleteBox
+    OnAutocompleteChar = TextEditWindow.OnAutocompleteChar
+    doAcceptAutocompleteSelection = TextEditWindow.doAcceptAutocompleteSelection
+    removeAutocompleteBox = TextEditWindow.removeAutocompleteBox
+    getAllText = ChildBox.getAllText
+
+    def __init__( self, BBB, bookText, rankedWords, enableAutocorrect=True, enableAutocomplete=True ):
+        """
+        Load the book text into self.textBox (which must already be made)
+            with the chapter/verse line index that the real edit window uses,
+            then enable the text change callback.
+        """
+        self.parentApp = self # Handle the (few) main application calls ourself
+        self.currentUserInitials = 'BM'
+        self.validationTime = 0.0 # Total time in scheduleTextCheck
+
+        self.defaultBackgroundColour = 'plum1'
+        self.textBox.configure( background=self.defaultBackgroundColour, undo=True, autoseparators=True )
+        self.textBox.pack( side=tk.TOP, fill=tk.BOTH, expand=tk.YES )
+        self.loading = True
+        self.textBox.startBulkLoad()
+        self.textBox.insert( tkSTART, bookText )
+        self.textBox.endBulkLoad()
+        C = '0'
+        for lineNumber,line in enumerate( bookText.split( '\n' ), start=1 ):
+            if line.startswith( '\\c ' ): C, V = line[3:].split()[0], '0'
+            elif line.startswith( '\\v ' ): V = line[3:].split()[0]
+            else: continue
+            self.textBox.appendVerseLine( 'C{}V{}'.format( C, V ), '{}.0'.format( lineNumber ) )
+        self.textBox.mark_set( tk.INSERT, tkSTART )
+        self.textBox.setTextChangeCallback( self.onTextChange )
+
+        self.onTextNoChangeID = None
+        self.markMultipleSpacesFlag = self.markTrailingSpacesFlag = True
+        self.autocorrectEntries = []
+        if enableAutocorrect: setDefaultAutocorrectEntries( self )
+
+        self.autocompleteBox, self.autocompleteWords, self.existingAutocompleteWordText = None, AutocompleteWordIndex(), ''
+        self.autocompleteWordChars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_'
+        self.autocompleteMinLength, self.autocompleteMaxLength = 3, 15
+        self.autocompleteMode = 'Bible' if enableAutocomplete else None
+        self.addAllNewWords = enableAutocomplete
+        self.autocompleteSharingKey = None
+        wantedWords = [word for word in rankedWords if len(word) >= self.autocompleteMinLength]
+        self.autocompleteWords.setWords( wantedWords )
+        self.autocompleteWordChars += getNewWordChars( wantedWords, self.autocompleteWordChars )
+
+        self.setDefaultTextChecks()
+        self.patternsToHighlight = [] # The text box isn't highlighted
+        self.textChecker = USFMTextChecker()
+        self.textChecker.setText( bookText, self.invalidCombinations, self.checkForPairs ) # As if the check after loading has finished
+        self.textCheckID = self.textCheckStopEvent = None
+        self.needsFullTextCheck = self.includeFormattingInTextCheck = False
+        self.currentVerseKey = SimpleVerseKey( BBB, '1', '1' )
+        self._groupCode, self._contextViewMode = 'A', 'ByBook'
+        self._showStatusBarVar = tk.BooleanVar( value=False )
+        self.numChapters, self.numTotalVerses = bookText.count( '\\c ' ), bookText.count( '\\v ' )
+        self.bookTextModified = self.hadTextWarning = False
+        self.lastCVMark = None
+        self.loading = False
+    # end of KeystrokeReplayFunctions.__init__
+
+
+    def scheduleTextCheck( self, includeFormatting=False, editArgs=None ):
+        """
+        Time the real validation (i.e., the part of it that's done for each keystroke).
+        """
+        startTime = time.perf_counter()
+        USFMEditWindow.scheduleTextCheck( self, includeFormatting, editArgs )
+        self.validationTime += time.perf_counter() - startTime
+    # end of KeystrokeReplayFunctions.scheduleTextCheck
+
+
+    def getNumChapters( self, BBB ): return self.numChapters
+    def gotoGroupBCV( self, groupCode, BBB, C, V, originator=None ): pass
+    def setErrorStatus( self, newStatusText ): pass
+    def setReadyStatus( self ): pass
+    def doSave( self, event=None ): pass
+# end of class KeystrokeReplayFunctions
+
+
+
+class KeystrokeReplayWindow( tk.Toplevel, KeystrokeReplayFunctions ):
+    """
+    A (Tk) keystroke replay window.
+    """
+    def __init__( self, rootWindow, BBB, bookText, rankedWords, enableAutocorrect=True, enableAutocomplete=True ):
+        """
+        See KeystrokeReplayFunctions.__init__.
+        """
+        tk.Toplevel.__init__( self, rootWindow )
+        self.textBox = CustomText( self, wrap='word' )
+        KeystrokeReplayFunctions.__init__( self, BBB, bookText, rankedWords, enableAutocorrect, enableAutocomplete )
+    # end of KeystrokeReplayWindow.__init__
+# end of class KeystrokeReplayWindow
+
+
+
+class HeadlessKeystrokeReplayWindow( HeadlessWidget, KeystrokeReplayFunctions ):
+    """
+    A keystroke replay window without a display (see HeadlessTk).
+
+    The autocomplete pop-up is just a list (so making it isn't timed like it is with Tk).
+    """
+    def __init__( self, rootWindow, BBB, bookText, rankedWords, enableAutocorrect=True, enableAutocomplete=True ):
+        """
+        See KeystrokeReplayFunctions.__init__.
+        """
+        HeadlessWidget.__init__( self, rootWindow )
+        self.textBox = HeadlessCustomText( self )
+        KeystrokeReplayFunctions.__init__( self, BBB, bookText, rankedWords, enableAutocorrect, enableAutocomplete )
+    # end of HeadlessKeystrokeReplayWindow.__init__
+
+
+    def makeAutocompleteBox( self ):
+        """
+        Make the pop-up listbox (in a frame in a toplevel like TextEditWindow.makeAutocompleteBox does).
+        """
+        self.autocompleteBox = HeadlessListbox( HeadlessWidget( HeadlessWidget( self ) ) )
+    # end of HeadlessKeystrokeReplayWindow.makeAutocompleteBox
+# end of class HeadlessKeystrokeReplayWindow
+
+
+
+def flushTextCheck( replayWindow ):
+    """
+    Run the text check that's waiting for TEXT_CHECK_DELAY msecs without edits now
+        (as if the typist had paused for that long)
+        rather than waiting for the Tk timer.
+
+    Returns the time taken by the check in the GUI thread
+        (or None if there was no check waiting).
+    """
+    if replayWindow.textCheckID is None or replayWindow.textCheckStopEvent is not None: # Nothing waiting (or just polling a thread)
+        return None
+    replayWindow.after_cancel( replayWindow.textCheckID )
+    startTime = time.perf_counter()
+    replayWindow.startTextCheck()
+    return time.perf_counter() - startTime
+# end of flushTextCheck
+
+
+def replayKeystrokeTrace( replayWindow, trace ):
+    """
+    Type the keystrokes from the trace into the text box of the window
+        (in the same way as the Tk key bindings do,
+        so that its text change callback is called for each one).
+
+    The keystrokes are replayed faster than TEXT_CHECK_DELAY,
+        so the typist is assumed to pause after each word and before moving to another verse
+        and the delayed text check is run (and timed) then.
+
+    Returns a list of the time taken by each keystroke
+        and a list of the time taken by each delayed text check.
+    """
+    textBox = replayWindow.textBox
+    keystrokeTimes, checkTimes = [], []
+    def pause():
+        checkTime = flushTextCheck( replayWindow )
+        if checkTime is not None: checkTimes.append( checkTime )
+        validationTime = replayWindow.validationTime
+        replayWindow.update()
+        replayWindow.validationTime = validationTime # Only the validation for each keystroke is counted
+    for step in trace:
+        if step[0] == 'goto': # not timed
+            pause()
+            validationTime = replayWindow.validationTime
+            if replayWindow.autocompleteBox is not None: replayWindow.removeAutocompleteBox()
+            textBox.delete( step[1], step[2] )
+            textBox.mark_set( tk.INSERT, step[1] )
+            replayWindow.update()
+            replayWindow.validationTime = validationTime
+            continue
+
+        startTime = time.perf_counter()
+        if step[0] == 'key': textBox.insert( tk.INSERT, step[1] )
+        elif step[0] == 'backspace': textBox.delete( tk.INSERT+'-1c' )
+        else: raise ValueError( "Unknown keystroke trace step {!r}".format( step ) )
+        keystrokeTimes.append( time.perf_counter() - startTime )
+        replayWindow.update() # Let Tk catch up (e.g., redraw the window) as it would between real keystrokes
+        if step[0] == 'key' and step[1] == ' ': pause()
+    pause()
+    return keystrokeTimes, checkTimes
+# end of replayKeystrokeTrace
+
+
+def getPercentile( sortedValues, percentile ):
+    """
+    Returns the (nearest rank) percentile of the sorted list of values.
+    """
+    return sortedValues[max( 0, -( -len(sortedValues)*percentile // 100 ) - 1 )]
+# end of getPercentile
+
+
+def benchmarkKeystrokeReplay( USFMFolder, traceFolder=None, maxBooks=MAX_REPLAY_BOOKS ):
+    """
+    Replay keystrokes into the largest USFM books from the folder
+        and report the time taken by each keystroke (and by the delayed text checks).
+
+    If traceFolder is given, the keystroke traces are loaded from it
+        (or made and saved into it the first time)
+        so that exactly the same keystrokes are used each time.
+
+    Each book is replayed three times (with everything enabled, without autocorrect,
+        and without autocomplete) so that the time spent in each can be estimated.
+
+    If Tk can't be started (e.g., there's no display), the keystrokes are replayed into a headless text box
+        (see HeadlessTk) so only the Python (and Tcl) code is timed.
+
+    Returns a dictionary of the results for each book.
+    """
+    try: rootWindow, replayWindowClass = tk.Tk(), KeystrokeReplayWindow
+    except tk.TclError as err:
+        print( "\nNo display so replaying keystrokes into a headless text box (Tk itself isn't timed): {}".format( err ) )
+        rootWindow, replayWindowClass = HeadlessRoot(), HeadlessKeystrokeReplayWindow
+    rootWindow.withdraw()
+
+    textLines = getUSFMTextLines( USFMFolder )
+    textWords = []
+    for textLine in textLines: textWords.extend( getTextWords( textLine ) )
+    rankedWords = rankBibleWords( Counter( textWords ), BIBLE_PHRASE_THRESHOLD )
+
+    bookFilenames = [filename for filename in os.listdir( USFMFolder ) if os.path.splitext( filename )[1].upper() in USFM_FILE_EXTENSIONS]
+    bookFilenames.sort( key=lambda filename: os.path.getsize( os.path.join( USFMFolder, filename ) ), reverse=True )
+    results = {}
+    for filename in bookFilenames[:maxBooks]:
+        with open( os.path.join( USFMFolder, filename ), 'rt', encoding='utf-8-sig' ) as bookFile:
+            bookText = bookFile.read()
+        USFMId = bookText[4:7] if bookText.startswith( '\\id ' ) else filename[:3]
+        BBB = BibleOrgSysGlobals.BibleBooksCodes.getBBBFromUSFM( USFMId )
+
+        traceFilepath = os.path.join( traceFolder, filename + '.trace.json' ) if traceFolder else None
+        if traceFilepath and os.path.isfile( traceFilepath ): trace = loadKeystrokeTrace( traceFilepath )
+        else:
+            trace = makeKeystrokeTrace( bookText )
+            if traceFilepath: saveKeystrokeTrace( trace, traceFilepath )
+        numKeystrokes = sum( 1 for step in trace if step[0] != 'goto' )
+        print( "\nReplaying {:,} keystrokes into {} ({:,} characters)…".format( numKeystrokes, BBB, len(bookText) ) )
+
+        totalTimes = {}
+        for runName,enableAutocorrect,enableAutocomplete in ( ('All',True,True), ('NoAutocorrect',False,True), ('NoAutocomplete',True,False), ):
+            replayWindow = replayWindowClass( rootWindow, BBB, bookText, rankedWords, enableAutocorrect, enableAutocomplete )
+            replayWindow.update()
+            keystrokeTimes, checkTimes = replayKeystrokeTrace( replayWindow, trace )
+            totalTimes[runName] = sum( keystrokeTimes )
+            if runName == 'All':
+                sortedTimes, validationTime = sorted( keystrokeTimes ), replayWindow.validationTime
+                sortedCheckTimes = sorted( checkTimes ) if checkTimes else [0.0]
+            replayWindow.cancelTextCheck()
+            if replayWindow.onTextNoChangeID: replayWindow.after_cancel( replayWindow.onTextNoChangeID )
+            replayWindow.destroy()
+
+        bookResults = { 'keystrokes':numKeystrokes, 'p50':getPercentile( sortedTimes, 50 ),
+                        'p95':getPercentile( sortedTimes, 95 ), 'p99':getPercentile( sortedTimes, 99 ),
+                        'max':sortedTimes[-1], 'total':totalTimes['All'], 'validation':validationTime,
+                        'autocorrect':totalTimes['All']-totalTimes['NoAutocorrect'],
+                        'autocomplete':totalTimes['All']-totalTimes['NoAutocomplete'],
+                        'checks':len(checkTimes), 'checkP50':getPercentile( sortedCheckTimes, 50 ),
+                        'checkP95':getPercentile( sortedCheckTimes, 95 ), 'checkMax':sortedCheckTimes[-1],
+                        'checkTotal':sum( sortedCheckTimes ), }
+        print( "  Per keystroke: p50 {:.2f}ms  p95 {:.2f}ms  p99 {:.2f}ms  max {:.2f}ms" \
+                .format( *(bookResults[name]*1000 for name in ('p50','p95','p99','max')) ) )
+        print( "  Per keystroke: validation {:.2f}ms  autocomplete ~{:.2f}ms  autocorrect ~{:.2f}ms (of {:.2f}ms)" \
+                .format( *(bookResults[name]*1000/numKeystrokes for name in ('validation','autocomplete','autocorrect','total')) ) )
+        print( "  Per delayed text check ({:,} pauses): p50 {:.2f}ms  p95 {:.2f}ms  max {:.2f}ms  total {:.2f}ms" \
+                .format( bookResults['checks'], *(bookResults[name]*1000 for name in ('checkP50','checkP95','checkMax','checkTotal')) ) )
+        results[BBB] = bookResults
+
+    rootWindow.destroy()
+    return results
+# end of benchmarkKeystrokeReplay
+
+
+
+def previousHighlightAllPatterns( textBox, patternCollection ):
+    """
+    The previous CustomText.highlightAllPatterns
+        which configured every tag and then used a Tk search (and a tag_add) for every match.
+    """
+    for regexpFlag, pattern, tagName, tagDict in patternCollection:
+        textBox.tag_configure( tagName, **tagDict )
+        textBox.highlightPattern( pattern, tagName, regexpFlag=regexpFlag )
+# end of previousHighlightAllPatterns
+
+
+def benchmarkHighlighting( USFMFolder, repeats=3 ):
+    """
+    Time highlighting the largest USFM book from the folder (with the USFM edit window patterns)
+        with the previous Tk search loop and with the current Python regex highlighting,
+        and check that they highlight the same text.
+
+    If Tk can't be started (e.g., there's no display), a headless text box is used (see HeadlessTk)
+        whose searches use the Tcl regexp command a line at a time (like Tk does)
+        but nothing is drawn, so Tk itself isn't timed.
+
+    Returns a dictionary of the results.
+    """
+    try: rootWindow, textBoxClass = tk.Tk(), CustomText
+    except tk.TclError as err:
+        print( "\nNo display so highlighting a headless text box (Tk itself isn't timed): {}".format( err ) )
+        rootWindow, textBoxClass = HeadlessRoot(), HeadlessCustomText
+    rootWindow.withdraw()
+
+    bookFilenames = [filename for filename in os.listdir( USFMFolder ) if os.path.splitext( filename )[1].upper() in USFM_FILE_EXTENSIONS]
+    filename = max( bookFilenames, key=lambda filename: os.path.getsize( os.path.join( USFMFolder, filename ) ) )
+    with open( os.path.join( USFMFolder, filename ), 'rt', encoding='utf-8-sig' ) as bookFile:
+        bookText = bookFile.read()
+    textBox = textBoxClass( rootWindow )
+    textBox.insert( tkSTART, bookText )
+
+    boldFont = font.Font( rootWindow, weight='bold' ) if textBoxClass is CustomText else 'TkDefaultFont' # No Tk fonts without Tk
+    patternCollection = [ (True,'\\\\.*?[ *\n]','green',{'foreground':'green'}), # The same as the USFM edit window
+                          (True,'\\d','blue',{'foreground':'blue'}),
+                          (True,'\\\\s .*?\n','redBold',{'font':boldFont, 'foreground':'red'}),
+                          (True,'\\\\r .*?\n','greenBold',{'font':boldFont, 'foreground':'green'}),
+                          (False,'XXX','redBack',{'background':'red'}), ]
+    def removeTags():
+        for regexpFlag, pattern, tagName, tagDict in patternCollection: textBox.tag_remove( tagName, tkSTART, tk.END )
+    def getTagRanges():
+        return { tagName:[str(index) for index in textBox.tag_ranges( tagName )] for regexpFlag, pattern, tagName, tagDict in patternCollection }
+
+    print( "\nHighlighting {} ({:,} characters) {} times…".format( filename, len(bookText), repeats ) )
+    previousTime = newTime = 0.0
+    for repeat in range( repeats ):
+        removeTags()
+        startTime = time.perf_counter()
+        previousHighlightAllPatterns( textBox, patternCollection )
+        previousTime += time.perf_counter() - startTime
+        previousTagRanges = getTagRanges()
+
+        removeTags()
+        textBox.highlightedPatterns = None # so that all of the text is highlighted
+        startTime = time.perf_counter()
+        textBox.highlightAllPatterns( patternCollection )
+        newTime += time.perf_counter() - startTime
+    sameFlag = getTagRanges() == previousTagRanges
+    rootWindow.destroy()
+
+    print( "  Tk search loop {:.3f}s  Python regex {:.3f}s  ({:.1f}x faster){}".format( previousTime/repeats, newTime/repeats,
+                previousTime/newTime if newTime else 0, '' if sameFlag else "  BUT THE HIGHLIGHTING IS DIFFERENT!" ) )
+    return { 'previous':previousTime/repeats, 'new':newTime/repeats, 'same':sameFlag }
+# end of benchmarkHighlighting
+
+
+
+def demo( USFMFolder=DEFAULT_USFM_FOLDER, traceFolder=None ):
+    """
+    Run all of the benchmarks on the given USFM folder.
+    """
+    if BibleOrgSysGlobals.verbosityLevel > 0: print( ProgNameVersion )
+    if BibleOrgSysGlobals.debugFlag: print( exp("Running demo on {}…").format( USFMFolder ) )
+
+    textLines = getUSFMTextLines( USFMFolder )
+    benchmarkGetTextWords( textLines )
+    benchmarkKeystrokeReplay( USFMFolder, traceFolder )
+    benchmarkHighlighting( USFMFolder )
+# end of demo
+
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    if 'win' in sys.platform: # Convert stdout so we don't get zillions of UnicodeEncodeErrors
+        from io import TextIOWrapper
+        sys.stdout = TextIOWrapper( sys.stdout.detach(), sys.stdout.encoding, 'namereplace' if sys.version_info >= (3,5) else 'backslashreplace' )
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( ProgName, ProgVersion )
+    parser.add_argument( 'USFMFolder', nargs='?', default=DEFAULT_USFM_FOLDER, help="folder containing the USFM Bible files to use" )
+    parser.add_argument( '--traces', dest='traceFolder', help="folder to load (or save) the keystroke traces" )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    demo( BibleOrgSysGlobals.commandLineArguments.USFMFolder, BibleOrgSysGlobals.commandLineArguments.traceFolder )
+
+    BibleOrgSysGlobals.closedown( ProgName, ProgVersion )
+# end of Benchmarks.py
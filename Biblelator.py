@@ -31,7 +31,7 @@ Note that many times in this application, where the term 'Bible' is used
 
 from gettext import gettext as _
 
-LastModifiedDate = '2017-11-09' # by RJH
+LastModifiedDate = '2017-11-24' # by RJH
 ShortProgName = "Biblelator"
 ProgName = "Biblelator"
 ProgVersion = '0.41'
@@ -67,6 +67,7 @@ from BiblelatorSettingsFunctions import parseAndApplySettings, writeSettingsFile
         saveNewWindowSetup, deleteExistingWindowSetup, applyGivenWindowsSettings, viewSettings, \
         doSendUsageStatistics
 from TextBoxes import BEntry, BCombobox
+from CallbackTimings import enableCallbackTimings, isCallbackTimingEnabled, getCallbackTimingsText, saveCallbackTimings
 from ChildWindows import ChildWindows
 from BibleResourceWindows import SwordBibleResourceWindow, InternalBibleResourceWindow, DBPBibleResourceWindow
 from BibleResourceCollection import BibleResourceCollectionWindow
@@ -157,6 +158,7 @@ class Application( Frame ):
         self.touchMode = False # True makes larger buttons
         self.tabletMode = False
         self.showDebugMenu = False
+        self.callbackTimingVar = tk.BooleanVar( value=isCallbackTimingEnabled() )
 
         self.lastFind = None
         #self.openDialog = None
@@ -230,6 +232,7 @@ class Application( Frame ):
 
         self.recentFiles = []
         self.internalBibles = [] # Contains 2-tuples being (internalBibleObject,list of window objects displaying that Bible)
+        self.sharedAutocompleteWords = {} # Contains 3-lists being [AutocompleteWordIndex,list of edit windows using it,waiting book updates] for each project folder
 
         #logging.critical( "Critical test" )
         #logging.error( "Error test" )
@@ -491,6 +494,10 @@ class Application( Frame ):
             debugMenu.add_separator()
             debugMenu.add_command( label=_('View log…'), underline=5, command=self.doViewLog )
             debugMenu.add_separator()
+            debugMenu.add_checkbutton( label=_('Time text callbacks'), underline=0, variable=self.callbackTimingVar, command=self.doToggleCallbackTimings )
+            debugMenu.add_command( label=_('View callback timings…'), underline=5, command=self.doViewCallbackTimings )
+            debugMenu.add_command( label=_('Save callback timings…'), underline=14, command=self.doSaveCallbackTimings )
+            debugMenu.add_separator()
             debugMenu.add_command( label=_('Submit bug…'), underline=0, command=self.doSubmitBug )
             debugMenu.add_separator()
             debugMenu.add_command( label=_('Options…'), underline=0, command=self.notWrittenYet )
@@ -647,6 +654,10 @@ class Application( Frame ):
             debugMenu.add_separator()
             debugMenu.add_command( label=_('View log…'), underline=5, command=self.doViewLog )
             debugMenu.add_separator()
+            debugMenu.add_checkbutton( label=_('Time text callbacks'), underline=0, variable=self.callbackTimingVar, command=self.doToggleCallbackTimings )
+            debugMenu.add_command( label=_('View callback timings…'), underline=5, command=self.doViewCallbackTimings )
+            debugMenu.add_command( label=_('Save callback timings…'), underline=14, command=self.doSaveCallbackTimings )
+            debugMenu.add_separator()
             debugMenu.add_command( label=_('Submit bug…'), underline=0, command=self.doSubmitBug )
             debugMenu.add_separator()
             debugMenu.add_command( label=_('Options…'), underline=0, command=self.notWrittenYet )
@@ -1931,6 +1942,48 @@ class Application( Frame ):
     # end of Application.doViewLog
 
 
+    def doToggleCallbackTimings( self ):
+        """
+        Turn the timing of the text box and entry callbacks on or off
+            (from the checkbutton on the Debug menu).
+        """
+        enableCallbackTimings( self.callbackTimingVar.get() )
+        if BibleOrgSysGlobals.debugFlag:
+            if debuggingThisModule: print( exp("doToggleCallbackTimings() now {}").format( isCallbackTimingEnabled() ) )
+            self.setDebugText( "Callback timing {}".format( 'on' if isCallbackTimingEnabled() else 'off' ) )
+    # end of Application.doToggleCallbackTimings
+
+
+    def doViewCallbackTimings( self ):
+        """
+        Display a summary of the text box and entry callback timings recorded so far.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( exp("doViewCallbackTimings()") )
+
+        timingsText = getCallbackTimingsText()
+        if BibleOrgSysGlobals.debugFlag: self.setDebugText( timingsText )
+        else: showInfo( self, APP_NAME, timingsText )
+    # end of Application.doViewCallbackTimings
+
+
+    def doSaveCallbackTimings( self ):
+        """
+        Write the text box and entry callback timings recorded so far
+            to a JSON file in the log folder.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( exp("doSaveCallbackTimings()") )
+
+        filename = APP_NAME.replace('/','-').replace(':','_').replace('\\','_') \
+                    + '_CallbackTimings_{}.json'.format( datetime.now().strftime( '%Y-%m-%d_%H%M%S' ) )
+        filepath = os.path.join( self.loggingFolderPath, filename )
+        try: saveCallbackTimings( filepath )
+        except OSError as err:
+            showError( self, APP_NAME, _("Sorry, unable to save callback timings: {}").format( err ) )
+            return
+        showInfo( self, APP_NAME, _("Callback timings saved to {}").format( filepath ) )
+    # end of Application.doSaveCallbackTimings
+
+
     def doStartNewProject( self ):
         """
         Asks the user for a project name and abbreviation,
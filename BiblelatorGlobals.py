@@ -86,6 +86,7 @@ DATA_FOLDER_NAME = APP_NAME + 'Data/'
 LOGGING_SUBFOLDER_NAME = APP_NAME + 'Logs/'
 SETTINGS_SUBFOLDER_NAME = APP_NAME + 'Settings/'
 PROJECTS_SUBFOLDER_NAME = APP_NAME + 'Projects/'
+INDEXES_SUBFOLDER_NAME = APP_NAME + 'Indexes/'
 
 
  # Constants for tkinter
@@ -24,6 +24,7 @@
 
 """
     createEmptyUSFMBookText( BBB, getNumChapters, getNumVerses )
+    readUSFMBookText( filepath, encoding )
     createEmptyUSFMBooks( folderPath, BBB, availableVersifications, availableVersions, requestDict )
     calculateTotalVersesForBook( BBB, getNumChapters, getNumVerses )
     mapReferenceVerseKey( mainVerseKey )
@@ -37,7 +38,7 @@ TODO: Can some of these functions be (made more general and) moved to the BOS?
 
 from gettext import gettext as _
 
-LastModifiedDate = '2017-08-04' # by RJH
+LastModifiedDate = '2017-11-24' # by RJH
 ShortProgName = "Biblelator"
 ProgName = "Biblelator helpers"
 ProgVersion = '0.41'
@@ -53,6 +54,7 @@ import re
 
 # Biblelator imports
 from BiblelatorGlobals import APP_NAME_VERSION, BIBLE_GROUP_CODES
+from MappedBookFile import MappedBookFile
 
 # BibleOrgSys imports
 #sys.path.append( '../BibleOrgSys/' )
@@ -105,6 +107,25 @@ def createEmptyUSFMBookText( BBB, getNumChapters, getNumVerses ):
 # end of BiblelatorHelpers.createEmptyUSFMBookText
 
 
+def readUSFMBookText( filepath, encoding ):
+    """
+    Reads a USFM book file and returns the text
+        without any Unicode Byte Order Marker (BOM) and with \n line endings.
+
+    The file is memory-mapped and decoded a chapter at a time straight from the mapped bytes
+        (see MappedBookFile for reading just some of the chapters).
+
+    If encoding is None, the locale's preferred encoding is used (like open() does).
+    Raises UnicodeDecodeError if the file can't be decoded with the given encoding.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("readUSFMBookText( {}, {} )").format( filepath, encoding ) )
+
+    with MappedBookFile( filepath, encoding ) as bookFile:
+        return bookFile.getText()
+# end of BiblelatorHelpers.readUSFMBookText
+
+
 
 def createEmptyUSFMBooks( folderPath, currentBBB, requestDict ):
     """
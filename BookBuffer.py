@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# BookBuffer.py
+#
+# A piece table for the text of a Bible book being edited
+#
+# Copyright (C) 2017 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+A piece table for the text of a Bible book being edited.
+
+The verses before and after the ones displayed in an edit window
+    are kept as a list of pieces (the cached verse strings themselves, so nothing is copied)
+    and the displayed verses are one more piece (the window)
+    which is simply replaced with the edited text when that's needed.
+So splicing the edits back in only costs the size of the edited text,
+    and the whole book is only joined together when it's really needed (e.g., to save it).
+If the lines of the book that the window was filled from are known,
+    the edited chapters can be cached again from just the window text.
+
+class BookBuffer
+    __init__( self )
+    clear( self )
+    appendVerseBefore( self, verseText )
+    appendVerseAfter( self, verseText )
+    setVersesAround( self, versesBefore, versesAfter, windowLineSpan=None )
+    startWindow( self )
+    setWindowText( self, windowText )
+    getWindowText( self )
+    setWindowLineSpan( self, windowLineSpan )
+    getWindowLineSpan( self )
+    getText( self )
+"""
+
+from gettext import gettext as _
+
+LastModifiedDate = '2017-11-24' # by RJH
+ShortProgName = "BookBuffer"
+ProgName = "Biblelator Book Buffer"
+ProgVersion = '0.41'
+ProgNameVersion = '{} v{}'.format( ProgName, ProgVersion )
+ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), LastModifiedDate )
+
+debuggingThisModule = False
+
+
+# BibleOrgSys imports
+if __name__ == '__main__': import sys; sys.path.append( '../BibleOrgSys/' )
+import BibleOrgSysGlobals
+
+
+
+def exp( messageString ):
+    """
+    Expands the message string in debug mode.
+    Prepends the module name to a error or warning message string
+        if we are in debug mode.
+    Returns the new string.
+    """
+    try: nameBit, errorBit = messageString.split( ': ', 1 )
+    except ValueError: nameBit, errorBit = '', messageString
+    if BibleOrgSysGlobals.debugFlag or debuggingThisModule:
+        nameBit = '{}{}{}'.format( ShortProgName, '.' if nameBit else '', nameBit )
+    return '{}{}'.format( nameBit+': ' if nameBit else '', errorBit )
+# end of exp
+
+
+
+class BookBuffer:
+    """
+    The text of a Bible book as a list of verse pieces
+        with one special piece (the window) for the verses displayed in the edit window.
+
+    The pieces are never changed (only the window piece is replaced).
+    """
+    def __init__( self ):
+        """
+        Start with an empty book.
+        """
+        self.clear()
+    # end of BookBuffer.__init__
+
+
+    def clear( self ):
+        """
+        Remove all the pieces.
+        """
+        self.pieces = []
+        self.windowIndex = None # Index into self.pieces once the window piece has been added
+        self.windowLineSpan = None # (startLineIndex,endLineIndex) of the book lines in the window (if known)
+    # end of BookBuffer.clear
+
+
+    def appendVerseBefore( self, verseText ):
+        """
+        Add the text of an undisplayed verse (if any) to the end of the pieces before the window.
+        """
+        if verseText:
+            if self.windowIndex is None:
+                self.pieces.append( verseText )
+            else: # Shouldn't normally happen as the verses are added in order
+                self.pieces.insert( self.windowIndex, verseText )
+                self.windowIndex += 1
+    # end of BookBuffer.appendVerseBefore
+
+
+    def appendVerseAfter( self, verseText ):
+        """
+        Add the text of an undisplayed verse (if any) to the end of the book (after the window).
+        """
+        self.startWindow()
+        if verseText: self.pieces.append( verseText )
+    # end of BookBuffer.appendVerseAfter
+
+
+    def setVersesAround( self, versesBefore, versesAfter, windowLineSpan=None ):
+        """
+        Replace all the pieces with the lists of verse texts before and after an (empty) window,
+            e.g., slices of the verse cache (so the verses don't have to be appended one at a time).
+
+        windowLineSpan (if known) is the (startLineIndex,endLineIndex) of the book lines
+            that the window will be filled with.
+        """
+        self.pieces = versesBefore + [''] + versesAfter
+        self.windowIndex = len( versesBefore )
+        self.windowLineSpan = windowLineSpan
+    # end of BookBuffer.setVersesAround
+
+
+    def startWindow( self ):
+        """
+        Add the (empty) window piece to the end of the book
+            unless it's already been added.
+        """
+        if self.windowIndex is None:
+            self.windowIndex = len( self.pieces )
+            self.pieces.append( '' )
+    # end of BookBuffer.startWindow
+
+
+    def setWindowText( self, windowText ):
+        """
+        Replace the window piece with the (edited) text from the window.
+
+        If the window wasn't started, it's added at the end of the book.
+        """
+        self.startWindow()
+        self.pieces[self.windowIndex] = windowText
+    # end of BookBuffer.setWindowText
+
+
+    def getWindowText( self ):
+        """
+        Returns the text last put into the window piece (or None if there's no window).
+        """
+        return None if self.windowIndex is None else self.pieces[self.windowIndex]
+    # end of BookBuffer.getWindowText
+
+
+    def setWindowLineSpan( self, windowLineSpan ):
+        """
+        Set (or forget with None) the (startLineIndex,endLineIndex) of the book lines
+            in the window, e.g., after the edited window text has been cached again.
+        """
+        self.windowLineSpan = windowLineSpan
+    # end of BookBuffer.setWindowLineSpan
+
+
+    def getWindowLineSpan( self ):
+        """
+        Returns the (startLineIndex,endLineIndex) of the book lines
+            that were put into the window (before any edits), or None if they aren't known.
+        """
+        return self.windowLineSpan
+    # end of BookBuffer.getWindowLineSpan
+
+
+    def getText( self ):
+        """
+        Returns the entire text of the book (with the window text spliced in).
+        """
+        return ''.join( self.pieces )
+    # end of BookBuffer.getText
+# end of BookBuffer class
+
+
+
+def demo():
+    """
+    Demonstrate splicing an edited window into a book.
+    """
+    if BibleOrgSysGlobals.verbosityLevel > 0: print( ProgNameVersion )
+
+    bookBuffer = BookBuffer()
+    bookBuffer.setVersesAround( ['\\id GEN\n', '\\c 1\n', '\\v 1 In the beginning\n'], ['\\v 3 Light\n'], (3,4) )
+    bookBuffer.setWindowText( '\\v 2 The earth (edited)\n' )
+    print( "Window line span={}".format( bookBuffer.getWindowLineSpan() ) )
+    print( bookBuffer.getText() )
+# end of BookBuffer.demo
+
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( ProgName, ProgVersion )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    demo()
+
+    BibleOrgSysGlobals.closedown( ProgName, ProgVersion )
+# end of BookBuffer.py
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# BookIndex.py
+#
+# Saved indexes of the verses in USFM book files
+#
+# Copyright (C) 2017 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Saved indexes of the verses in USFM book files
+    so that a USFM edit window can cache a book without parsing all of its lines again.
+
+Each index is a small JSON file in the BiblelatorIndexes folder
+    containing the line and character spans of each cached verse (with any section heading
+    already attached to the following verse like cacheBook does),
+    and where each chapter starts (for caching edited chapters again)
+    and the byte offset of each chapter line in the file (so the file needn't be scanned for them).
+It's only used if the modification time and size of the book file
+    are still the same as when the index was made.
+
+    getBookIndexFilepath( homeFolderPath, bookFilepath )
+    makeBookIndex( BBB, fileTime, fileSize, bookText, chapterLineIndices, chapterKeys, verseLineSpans, chunkByteOffsets=None )
+    loadBookIndex( indexFilepath, BBB, fileTime, fileSize )
+    getIndexedVerses( bookIndex, bookText )
+    saveBookIndex( indexFilepath, bookIndex )
+    saveBookIndexInBackground( indexFilepath, bookIndex )
+"""
+
+from gettext import gettext as _
+
+LastModifiedDate = '2017-11-24' # by RJH
+ShortProgName = "BookIndex"
+ProgName = "Biblelator Book Index"
+ProgVersion = '0.41'
+ProgNameVersion = '{} v{}'.format( ProgName, ProgVersion )
+ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), LastModifiedDate )
+
+debuggingThisModule = False
+
+
+import os, logging
+import json, hashlib, tempfile
+import threading
+from collections import OrderedDict
+from itertools import accumulate
+
+from BiblelatorGlobals import DATA_FOLDER_NAME, INDEXES_SUBFOLDER_NAME
+
+# BibleOrgSys imports
+if __name__ == '__main__': import sys; sys.path.append( '../BibleOrgSys/' )
+import BibleOrgSysGlobals
+
+
+BOOK_INDEX_VERSION = 1 # Increment this if cacheBook changes the way that verses are split up
+
+
+
+def exp( messageString ):
+    """
+    Expands the message string in debug mode.
+    Prepends the module name to a error or warning message string
+        if we are in debug mode.
+    Returns the new string.
+    """
+    try: nameBit, errorBit = messageString.split( ': ', 1 )
+    except ValueError: nameBit, errorBit = '', messageString
+    if BibleOrgSysGlobals.debugFlag or debuggingThisModule:
+        nameBit = '{}{}{}'.format( ShortProgName, '.' if nameBit else '', nameBit )
+    return '{}{}'.format( nameBit+': ' if nameBit else '', errorBit )
+# end of exp
+
+
+
+def getBookIndexFilepath( homeFolderPath, bookFilepath ):
+    """
+    Returns the filepath of the index for the given book file (whether or not it exists yet),
+        e.g., '~/BiblelatorData/BiblelatorIndexes/41-MATxyz.SFM_0123456789ab.json'.
+
+    The hash of the full path keeps the indexes for books in different projects apart.
+    """
+    bookFilepath = os.path.abspath( bookFilepath )
+    return os.path.join( homeFolderPath, DATA_FOLDER_NAME, INDEXES_SUBFOLDER_NAME,
+                    '{}_{}.json'.format( os.path.basename( bookFilepath ),
+                                        hashlib.md5( bookFilepath.encode( 'utf-8' ) ).hexdigest()[:12] ) )
+# end of BookIndex.getBookIndexFilepath
+
+
+def makeBookIndex( BBB, fileTime, fileSize, bookText, chapterLineIndices, chapterKeys, verseLineSpans, chunkByteOffsets=None ):
+    """
+    Returns a new index (a dictionary which can be saved as JSON) for the book file
+        with the given modification time and size (and text).
+
+    chapterLineIndices and chapterKeys are the starting line and cached verse keys for each chapter
+        and verseLineSpans gives the (startLineIndex,endLineIndex) for each verse key.
+
+    Each verse entry is [verseKeyHash, startLineIndex, endLineIndex, startCharIndex, endCharIndex]
+        where the character indexes are into bookText + '\n' (so that every line ends with a newline).
+
+    chunkByteOffsets (if known) are where each chunk of the file starts (see MappedBookFile).
+    """
+    bookLines = bookText.split( '\n' )
+    lineStartIndices = [0]
+    lineStartIndices.extend( accumulate( len(line)+1 for line in bookLines ) )
+    verses = []
+    for verseKeyHash in ( verseKeyHash for keys in chapterKeys for verseKeyHash in keys ):
+        startIndex, endIndex = verseLineSpans[verseKeyHash]
+        verses.append( (verseKeyHash, startIndex, endIndex, lineStartIndices[startIndex], lineStartIndices[endIndex]) )
+    return { 'version':BOOK_INDEX_VERSION, 'BBB':BBB, 'fileTime':fileTime, 'fileSize':fileSize,
+            'numLines':len(bookLines), 'numChars':len(bookText),
+            'chapterLineIndices':list( chapterLineIndices ),
+            'chapterNumVerses':[len(keys) for keys in chapterKeys],
+            'verses':verses,
+            'chunkByteOffsets':None if chunkByteOffsets is None else list( chunkByteOffsets ) }
+# end of BookIndex.makeBookIndex
+
+
+def loadBookIndex( indexFilepath, BBB, fileTime, fileSize ):
+    """
+    Returns the saved index for the book
+        if it was made for the book file with the given modification time and size,
+        otherwise returns None.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("loadBookIndex( {}, {}, {}, {} )").format( indexFilepath, BBB, fileTime, fileSize ) )
+
+    try:
+        with open( indexFilepath, 'rt', encoding='utf-8' ) as indexFile:
+            bookIndex = json.load( indexFile )
+    except FileNotFoundError: return None
+    except (OSError, ValueError) as err:
+        logging.warning( exp("loadBookIndex: Unable to load {}: {}").format( indexFilepath, err ) )
+        return None
+    if isinstance( bookIndex, dict ) and bookIndex.get( 'version' ) == BOOK_INDEX_VERSION \
+    and bookIndex.get( 'BBB' ) == BBB and bookIndex.get( 'fileTime' ) == fileTime and bookIndex.get( 'fileSize' ) == fileSize:
+        return bookIndex
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( "  Index is out of date" )
+    return None
+# end of BookIndex.loadBookIndex
+
+
+def getIndexedVerses( bookIndex, bookText ):
+    """
+    Use the saved spans of each verse in the index to cache the verses of the book text
+        (without having to parse all the lines again like USFMEditWindow.cacheBook does).
+
+    This doesn't use any GUI objects so it can be done in a worker thread.
+
+    Returns a 5-tuple with the (ordered) verse cache dictionary, chapterLineIndices, chapterKeys, verseLineSpans,
+            and the number of lines (or None if the cached verses aren't exactly the lines that they came from),
+        or None if the index doesn't fit the book text.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("getIndexedVerses( {}, {:,} chars )").format( bookIndex.get( 'BBB' ), len(bookText) ) )
+
+    if bookIndex.get( 'numChars' ) != len( bookText ) \
+    or bookIndex.get( 'numLines' ) != bookText.count( '\n' ) + 1: return None
+
+    bookText += '\n' # So that the last line ends with a newline (like in cacheBook)
+    chapterKeys = []
+    try:
+        verses = bookIndex['verses']
+        verseCache = OrderedDict( (verseKeyHash, bookText[startCharIndex:endCharIndex].replace( '\n\n', '\n' )) # like cacheBook
+                                for verseKeyHash,startIndex,endIndex,startCharIndex,endCharIndex in verses )
+        verseLineSpans = { verseKeyHash:(startIndex,endIndex)
+                                for verseKeyHash,startIndex,endIndex,startCharIndex,endCharIndex in verses }
+        verseKeys = list( verseCache )
+        for numVerses in bookIndex['chapterNumVerses']:
+            chapterKeys.append( verseKeys[:numVerses] ); del verseKeys[:numVerses]
+        chapterLineIndices = bookIndex['chapterLineIndices']
+    except (KeyError, TypeError, ValueError) as err:
+        logging.error( exp("getIndexedVerses: Bad index for {}: {}").format( bookIndex.get( 'BBB' ), err ) )
+        return None
+    if verseKeys or len(chapterKeys) != len(chapterLineIndices) \
+    or len(verseLineSpans) != len(verses): # the index doesn't fit together
+        return None
+    numLines = bookIndex['numLines']
+    allLinesExact = all( verseCache[verseKeyHash] == bookText[startCharIndex:endCharIndex-1] if endIndex == numLines # like cacheBook
+                            else len( verseCache[verseKeyHash] ) == endCharIndex - startCharIndex
+                        for verseKeyHash,startIndex,endIndex,startCharIndex,endCharIndex in verses )
+    return verseCache, chapterLineIndices, chapterKeys, verseLineSpans, numLines if allLinesExact else None
+# end of BookIndex.getIndexedVerses
+
+
+def saveBookIndex( indexFilepath, bookIndex ):
+    """
+    Write the index to a JSON file (replacing any old one).
+
+    It's written to a new temporary file first so that a half-written index never gets used
+        (even if the same index is being saved by another thread at the same time).
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("saveBookIndex( {}, {} )").format( indexFilepath, bookIndex['BBB'] ) )
+
+    tempFilepath = None
+    try:
+        os.makedirs( os.path.dirname( indexFilepath ), exist_ok=True )
+        tempFileDescriptor, tempFilepath = tempfile.mkstemp( suffix='.tmp', prefix=os.path.basename( indexFilepath )+'.',
+                                                                dir=os.path.dirname( indexFilepath ) )
+        with open( tempFileDescriptor, 'wt', encoding='utf-8' ) as indexFile:
+            json.dump( bookIndex, indexFile, separators=(',',':') )
+        os.replace( tempFilepath, indexFilepath )
+    except OSError as err:
+        logging.error( exp("saveBookIndex: Unable to save {}: {}").format( indexFilepath, err ) )
+        if tempFilepath is not None:
+            try: os.remove( tempFilepath )
+            except OSError: pass
+# end of BookIndex.saveBookIndex
+
+
+def saveBookIndexInBackground( indexFilepath, bookIndex ):
+    """
+    Write the index in a worker thread so that the GUI doesn't have to wait for it.
+
+    The index mustn't be changed afterwards (makeBookIndex always makes a new one).
+    """
+    threading.Thread( target=saveBookIndex, args=(indexFilepath, bookIndex), daemon=True ).start()
+# end of BookIndex.saveBookIndexInBackground
+
+
+
+def demo():
+    """
+    Demonstrate making, saving, and loading an index.
+    """
+    if BibleOrgSysGlobals.verbosityLevel > 0: print( ProgNameVersion )
+
+    bookIndex = makeBookIndex( 'JDE', 1511913600.0, 123, '\\id JDE\n\\h Jude\n\\c 1\n\\p\n\\v 1 Jude\n',
+                    [0,2], [['JDE_0:0','JDE_0:1'],['JDE_1:0','JDE_1:1']],
+                    { 'JDE_0:0':(0,1), 'JDE_0:1':(1,2), 'JDE_1:0':(2,3), 'JDE_1:1':(3,5) } )
+    with tempfile.TemporaryDirectory() as homeFolderPath:
+        indexFilepath = getBookIndexFilepath( homeFolderPath, 'Test/66-JDExyz.SFM' )
+        saveBookIndex( indexFilepath, bookIndex )
+        print( "Up-to-date:", loadBookIndex( indexFilepath, 'JDE', 1511913600.0, 123 ) )
+        print( "Changed file:", loadBookIndex( indexFilepath, 'JDE', 1511913600.0, 124 ) )
+        print( "Verses:", getIndexedVerses( bookIndex, '\\id JDE\n\\h Jude\n\\c 1\n\\p\n\\v 1 Jude\n' )[0] )
+# end of BookIndex.demo
+
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( ProgName, ProgVersion )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    demo()
+
+    BibleOrgSysGlobals.closedown( ProgName, ProgVersion )
+# end of BookIndex.py
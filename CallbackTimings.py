@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# CallbackTimings.py
+#
+# Optional timing of the change callbacks of the Biblelator text widgets
+#
+# Copyright (C) 2017 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Optional timing of the change callbacks of the Biblelator text widgets
+    (CustomText, BEntry, and BCombobox) so that we can see how often
+    each type of event fires in each window, and how long they take to handle.
+
+Timing is off by default, and then costs nothing more than one function call per event.
+
+    enableCallbackTimings( enableFlag=True )
+    isCallbackTimingEnabled()
+    recordCallbackTime( widget, eventType, elapsedSeconds )
+    clearCallbackTimings()
+    getCallbackTimingsText()
+    saveCallbackTimings( filepath )
+"""
+
+from gettext import gettext as _
+
+LastModifiedDate = '2017-11-24' # by RJH
+ShortProgName = "CallbackTimings"
+ProgName = "Biblelator Callback Timings"
+ProgVersion = '0.41'
+ProgNameVersion = '{} v{}'.format( ProgName, ProgVersion )
+ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), LastModifiedDate )
+
+debuggingThisModule = False
+
+
+import json
+from bisect import bisect_left
+
+# BibleOrgSys imports
+if __name__ == '__main__': import sys; sys.path.append( '../BibleOrgSys/' )
+import BibleOrgSysGlobals
+
+
+HISTOGRAM_LIMITS = ( 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500 ) # Upper limits of the buckets in milliseconds (plus one more bucket for slower ones)
+
+callbackTimingEnabled = False
+callbackTimings = {} # Indexed by (windowName,eventType) with [count,totalSeconds,maxSeconds,histogramCounts] entries
+
+
+
+def exp( messageString ):
+    """
+    Expands the message string in debug mode.
+    Prepends the module name to a error or warning message string
+        if we are in debug mode.
+    Returns the new string.
+    """
+    try: nameBit, errorBit = messageString.split( ': ', 1 )
+    except ValueError: nameBit, errorBit = '', messageString
+    if BibleOrgSysGlobals.debugFlag or debuggingThisModule:
+        nameBit = '{}{}{}'.format( ShortProgName, '.' if nameBit else '', nameBit )
+    return '{}{}'.format( nameBit+': ' if nameBit else '', errorBit )
+# end of exp
+
+
+
+def enableCallbackTimings( enableFlag=True ):
+    """
+    Turn the timing of the widget callbacks on or off.
+
+    Any timings already recorded are kept.
+    """
+    global callbackTimingEnabled
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("enableCallbackTimings( {} )").format( enableFlag ) )
+
+    callbackTimingEnabled = bool( enableFlag )
+# end of CallbackTimings.enableCallbackTimings
+
+
+def isCallbackTimingEnabled():
+    """
+    Returns True if the widgets should time their callbacks.
+    """
+    return callbackTimingEnabled
+# end of CallbackTimings.isCallbackTimingEnabled
+
+
+def getWindowName( widget ):
+    """
+    Returns a name for the window that the widget is in,
+        e.g., 'USFMEditWindow .!usfmeditwindow2'.
+
+    The name is remembered in the widget so it's only worked out once.
+    """
+    try: return widget.callbackTimingWindowName
+    except AttributeError:
+        try:
+            toplevel = widget.winfo_toplevel()
+            windowName = '{} {}'.format( getattr( toplevel, 'windowType', toplevel.winfo_class() ), toplevel )
+        except Exception: windowName = str( widget ) # e.g., the widget is already destroyed
+        widget.callbackTimingWindowName = windowName
+        return windowName
+# end of CallbackTimings.getWindowName
+
+
+def recordCallbackTime( widget, eventType, elapsedSeconds ):
+    """
+    Add the time taken to handle one event for the widget into the statistics.
+
+    eventType is the widget subcommand, e.g., 'insert', 'delete', or 'mark'.
+    """
+    key = getWindowName( widget ), eventType
+    try: entry = callbackTimings[key]
+    except KeyError: entry = callbackTimings[key] = [0, 0.0, 0.0, [0]*(len(HISTOGRAM_LIMITS)+1)]
+    entry[0] += 1
+    entry[1] += elapsedSeconds
+    if elapsedSeconds > entry[2]: entry[2] = elapsedSeconds
+    entry[3][bisect_left( HISTOGRAM_LIMITS, elapsedSeconds * 1000 )] += 1
+# end of CallbackTimings.recordCallbackTime
+
+
+def clearCallbackTimings():
+    """
+    Forget all of the timings recorded so far.
+    """
+    callbackTimings.clear()
+# end of CallbackTimings.clearCallbackTimings
+
+
+def getCallbackTimingsText():
+    """
+    Returns a multiline string summarising the recorded timings
+        with the events that took the most total time first.
+    """
+    if not callbackTimings: return _("No callback timings have been recorded")
+
+    bucketNames = ['<={}ms'.format( limit ) for limit in HISTOGRAM_LIMITS] + ['>{}ms'.format( HISTOGRAM_LIMITS[-1] )]
+    resultLines = [_("Callback timings:")]
+    for (windowName,eventType),(count,totalSeconds,maxSeconds,histogram) \
+                in sorted( callbackTimings.items(), key=lambda item: -item[1][1] ):
+        resultLines.append( "  {} {!r}: {:,} calls, {:.1f}ms total, {:.2f}ms mean, {:.2f}ms max" \
+                    .format( windowName, eventType, count, totalSeconds*1000, totalSeconds*1000/count, maxSeconds*1000 ) )
+        resultLines.append( "    " + ' '.join( '{}:{}'.format( bucketName, bucketCount ) \
+                    for bucketName,bucketCount in zip( bucketNames, histogram ) if bucketCount ) )
+    return '\n'.join( resultLines )
+# end of CallbackTimings.getCallbackTimingsText
+
+
+def saveCallbackTimings( filepath ):
+    """
+    Write the recorded timings to a JSON file (so they can be compared or graphed later).
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("saveCallbackTimings( {} )").format( filepath ) )
+
+    timingsList = [ { 'window':windowName, 'event':eventType, 'count':count,
+                        'totalSeconds':totalSeconds, 'maxSeconds':maxSeconds, 'histogram':histogram }
+                    for (windowName,eventType),(count,totalSeconds,maxSeconds,histogram) in sorted( callbackTimings.items() ) ]
+    with open( filepath, 'wt', encoding='utf-8' ) as timingsFile:
+        json.dump( { 'histogramLimitsMilliseconds':HISTOGRAM_LIMITS, 'timings':timingsList }, timingsFile, indent=2 )
+# end of CallbackTimings.saveCallbackTimings
+
+
+
+def demo():
+    """
+    Demonstrate recording and displaying some timings.
+    """
+    if BibleOrgSysGlobals.verbosityLevel > 0: print( ProgNameVersion )
+
+    class FakeWidget: callbackTimingWindowName = 'DemoWindow'
+    widget = FakeWidget()
+    for eventType,elapsedSeconds in ( ('insert',0.0003), ('insert',0.004), ('mark',0.0001), ('delete',0.7) ):
+        recordCallbackTime( widget, eventType, elapsedSeconds )
+    print( getCallbackTimingsText() )
+# end of CallbackTimings.demo
+
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( ProgName, ProgVersion )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    demo()
+
+    BibleOrgSysGlobals.closedown( ProgName, ProgVersion )
+# end of CallbackTimings.py
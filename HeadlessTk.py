@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# HeadlessTk.py
+#
+# Stand-ins for the Tk widgets used by the benchmarks when there's no display
+#
+# Copyright (C) 2017 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Stand-ins for the Tk widgets used by the benchmarks
+    so that they can still be run on a server without any (real or virtual) X display.
+
+The root is a Tcl interpreter without Tk, so after, after_idle, after_cancel, update,
+    and Tk variables are the real Tcl ones, but there are no windows.
+The text box keeps its text as a list of lines (and its marks and tags as line.column positions)
+    and calls the CustomText callback for each insert, delete, and cursor move
+    just like the Tcl proxy in CustomText does.
+Regular expression searches use the Tcl regexp command on each line
+    (like the Tk text search does).
+
+NOTE: Nothing is drawn (and there's no B-tree or display line layout to update)
+    so timings using these are only of the Python code (and Tcl calls) and not of Tk.
+
+class HeadlessRoot( tk.Tk )
+    __init__( self )
+    destroy( self )
+
+class HeadlessWidget( tk.Misc )
+    __init__( self, master )
+
+class HeadlessText( HeadlessWidget )
+    __init__( self, master, **kwargs )
+    index( self, index )
+    get( self, index1, index2=None )
+    insert( self, index, chars, *args )
+    delete( self, index1, index2=None )
+    mark_set( self, markName, index )
+    tag_add( self, tagName, index1, *args )
+    tag_remove( self, tagName, index1, index2=None )
+    tag_ranges( self, tagName )
+    search( self, pattern, index, stopindex=None, forwards=None, backwards=None, exact=None,
+                                    regexp=None, nocase=None, count=None, elide=None )
+
+class HeadlessCustomText( HeadlessText )
+    (with the CustomText methods)
+
+class HeadlessListbox( HeadlessWidget )
+    __init__( self, master, **kwargs )
+"""
+
+from gettext import gettext as _
+
+LastModifiedDate = '2017-11-24' # by RJH
+ShortProgName = "HeadlessTk"
+ProgName = "Biblelator Headless Tk"
+ProgVersion = '0.41'
+ProgNameVersion = '{} v{}'.format( ProgName, ProgVersion )
+ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), LastModifiedDate )
+
+debuggingThisModule = False
+
+
+import re
+import traceback
+from bisect import bisect_left
+
+import tkinter as tk
+
+# Biblelator imports
+from BiblelatorGlobals import tkSTART
+from TextBoxes import CustomText
+
+# BibleOrgSys imports
+if __name__ == '__main__': import sys; sys.path.append( '../BibleOrgSys/' )
+import BibleOrgSysGlobals
+
+
+INDEX_BASE_REGEX = re.compile( r'\s*(?:([0-9]+)\.([0-9]+|end)|([A-Za-z_][\w]*))' ) # line.column, or a mark name, or end
+INDEX_MODIFIER_REGEX = re.compile( r'\s*(?:([+-])\s*([0-9]+)\s*(c|l)[a-z]*|(linestart|lineend))' )
+
+
+
+def exp( messageString ):
+    """
+    Expands the message string in debug mode.
+    Prepends the module name to a error or warning message string
+        if we are in debug mode.
+    Returns the new string.
+    """
+    try: nameBit, errorBit = messageString.split( ': ', 1 )
+    except ValueError: nameBit, errorBit = '', messageString
+    if BibleOrgSysGlobals.debugFlag or debuggingThisModule:
+        nameBit = '{}{}{}'.format( ShortProgName, '.' if nameBit else '', nameBit )
+    return '{}{}'.format( nameBit+': ' if nameBit else '', errorBit )
+# end of exp
+
+
+
+class HeadlessRoot( tk.Tk ):
+    """
+    A Tcl interpreter (without Tk) to use as the root window.
+    """
+    def __init__( self ):
+        """
+        Make the interpreter and make it the default root (like a real Tk root does)
+            so that Tk variables can be made without a master.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( exp("HeadlessRoot.__init__()") )
+        tk.Tk.__init__( self, useTk=False )
+        tk._default_root = self
+    # end of HeadlessRoot.__init__
+
+
+    def withdraw( self ): pass
+
+
+    def destroy( self ):
+        """
+        There's no Tk destroy command so just delete our Tcl commands.
+        """
+        for child in list( self.children.values() ): child.destroy()
+        tk.Misc.destroy( self )
+        if tk._default_root is self: tk._default_root = None
+    # end of HeadlessRoot.destroy
+# end of HeadlessRoot class
+
+
+
+class HeadlessWidget( tk.Misc ):
+    """
+    A widget without a window.
+
+    The tk.Misc methods that only use Tcl commands (e.g., after, update) work as usual.
+    """
+    def __init__( self, master ):
+        """
+        """
+        self.master, self.tk = master, master.tk
+        self._name = 'headless{}'.format( id(self) )
+        self._w = '{}.{}'.format( '' if master._w=='.' else master._w, self._name )
+        self.children, self._tclCommands = {}, None
+        master.children[self._name] = self
+    # end of HeadlessWidget.__init__
+
+
+    def destroy( self ):
+        """
+        Delete our Tcl commands (and those of any children).
+        """
+        for child in list( self.children.values() ): child.destroy()
+        tk.Misc.destroy( self )
+        self.master.children.pop( self._name, None )
+    # end of HeadlessWidget.destroy
+
+
+    def configure( self, cnf=None, **kwargs ): pass
+    config = configure
+    def pack( self, **kwargs ): pass
+    def bind( self, sequence=None, func=None, add=None ): pass
+    def focus( self ): pass
+    focus_set = focus
+    def winfo_rootx( self ): return 0
+    def winfo_rooty( self ): return 0
+# end of HeadlessWidget class
+
+
+
+class HeadlessText( HeadlessWidget ):
+    """
+    Just enough of a Tk text widget for the edit window text callbacks and highlighting.
+
+    The text is kept as a list of lines (without their newlines)
+        and (like Tk) there's always a final newline after the last line which can't be deleted.
+    Positions are (lineNumber,column) 2-tuples.
+    """
+    def __init__( self, master, **kwargs ):
+        """
+        """
+        HeadlessWidget.__init__( self, master )
+        self.lines = ['']
+        self.marks = { tk.INSERT:(1,0) }
+        self.tagRanges, self.tagOptions = {}, {} # Sorted lists of (startPosition,endPosition) for each tag
+        self.modifiedFlag = False
+    # end of HeadlessText.__init__
+
+
+    def _getPosition( self, index ):
+        """
+        Returns the (lineNumber,column) position of a Tk text index (like 'insert-2c' or '4.0 lineend').
+
+        Raises tk.TclError for an index that we can't handle.
+        """
+        index = str( index )
+        match = INDEX_BASE_REGEX.match( index )
+        if match is None: raise tk.TclError( 'bad text index "{}"'.format( index ) )
+        numLines = len(self.lines)
+        if match.group( 3 ) is None:
+            lineNumber = int( match.group( 1 ) )
+            if lineNumber < 1: position = 1, 0
+            elif lineNumber > numLines: position = numLines+1, 0
+            else:
+                lineLength = len(self.lines[lineNumber-1])
+                position = lineNumber, lineLength if match.group( 2 )=='end' else min( int( match.group( 2 ) ), lineLength )
+        elif match.group( 3 ) == tk.END: position = numLines+1, 0
+        else:
+            try: position = self.marks[match.group( 3 )]
+            except KeyError: raise tk.TclError( 'bad text index "{}"'.format( index ) )
+
+        ix = match.end()
+        while ix < len(index):
+            match = INDEX_MODIFIER_REGEX.match( index, ix )
+            if match is None:
+                if index[ix:].isspace(): break
+                raise tk.TclError( 'bad text index "{}"'.format( index ) )
+            ix = match.end()
+            lineNumber, column = position
+            if match.group( 4 ) == 'linestart': position = lineNumber, 0
+            elif match.group( 4 ) == 'lineend':
+                if lineNumber <= numLines: position = lineNumber, len(self.lines[lineNumber-1])
+            elif match.group( 3 ) == 'l':
+                lineNumber += int( match.group( 2 ) ) if match.group( 1 )=='+' else -int( match.group( 2 ) )
+                lineNumber = min( max( 1, lineNumber ), numLines )
+                position = lineNumber, min( column, len(self.lines[lineNumber-1]) )
+            elif match.group( 1 ) == '+': position = self._addChars( position, int( match.group( 2 ) ) )
+            else: position = self._subtractChars( position, int( match.group( 2 ) ) )
+        return position
+    # end of HeadlessText._getPosition
+
+
+    def _addChars( self, position, numChars ):
+        """
+        Returns the position numChars characters after the given one (counting the newlines).
+        """
+        lineNumber, column = position
+        numLines = len(self.lines)
+        while lineNumber <= numLines:
+            numLeft = len(self.lines[lineNumber-1]) - column + 1 # including the newline
+            if numChars < numLeft: return lineNumber, column + numChars
+            numChars -= numLeft
+            lineNumber, column = lineNumber+1, 0
+        return numLines+1, 0
+    # end of HeadlessText._addChars
+
+
+    def _subtractChars( self, position, numChars ):
+        """
+        Returns the position numChars characters before the given one (counting the newlines).
+        """
+        lineNumber, column = position
+        while numChars > column:
+            if lineNumber == 1: return 1, 0
+            numChars -= column + 1
+            lineNumber -= 1
+            column = len(self.lines[lineNumber-1])
+        return lineNumber, column - numChars
+    # end of HeadlessText._subtractChars
+
+
+    def _getLastPosition( self ):
+        """
+        Returns the position of the final newline (which can't be edited).
+        """
+        return len(self.lines), len(self.lines[-1])
+    # end of HeadlessText._getLastPosition
+
+
+    def index( self, index ):
+        """
+        Returns the line.column index string for the given index.
+        """
+        return '{}.{}'.format( *self._getPosition( index ) )
+    # end of HeadlessText.index
+
+
+    def get( self, index1, index2=None ):
+        """
+        Returns the text between the indexes
+            (or the character at index1 if index2 isn't given).
+        """
+        startPosition = self._getPosition( index1 )
+        endPosition = self._addChars( startPosition, 1 ) if index2 is None else self._getPosition( index2 )
+        if endPosition <= startPosition: return ''
+        (startLineNumber,startColumn), (endLineNumber,endColumn) = startPosition, endPosition
+        if startLineNumber == endLineNumber: return self.lines[startLineNumber-1][startColumn:endColumn]
+        textBits = [self.lines[startLineNumber-1][startColumn:]]
+        textBits.extend( self.lines[startLineNumber:endLineNumber-1] )
+        textBits.append( self.lines[endLineNumber-1][:endColumn] if endLineNumber <= len(self.lines) else '' )
+        return '\n'.join( textBits )
+    # end of HeadlessText.get
+
+
+    def _callProxy( self, editFunction, args ):
+        """
+        Do the edit (or cursor move) like the Tcl proxy in CustomText does:
+            remember where an edit starts (and where the text ended) before doing it,
+            then call the callback for inserts, deletes, and cursor moves
+            (but not recursively, and ignoring any errors).
+
+        Text widgets without a _callback method just do the edit.
+        """
+        callback = getattr( self, '_callback', None )
+        if callback is None or getattr( self, 'inCallback', False ): return editFunction( *args[1:] )
+        editIndex = endIndex = ''
+        if args[0] in ('insert','delete') and not getattr( self, 'bulkLoading', False ):
+            try: editIndex, endIndex = self.index( args[1] ), self.index( tk.END )
+            except tk.TclError: pass
+        result = editFunction( *args[1:] )
+        self.inCallback = True
+        try: callback( '' if result is None else result, editIndex, endIndex, *(str(arg) for arg in args) )
+        except Exception: traceback.print_exc() # Like a Tk callback error
+        finally: self.inCallback = False
+        return result
+    # end of HeadlessText._callProxy
+
+
+    def insert( self, index, chars, *args ):
+        """
+        Insert the characters (and any more characters after their tag lists) at the index.
+        """
+        return self._callProxy( self._insert, ('insert', index, chars) + args )
+    def _insert( self, index, chars, *args ):
+        """
+        Do the insert (ignoring any tag lists).
+        """
+        text = chars + ''.join( args[1::2] )
+        if not text: return
+        position = min( self._getPosition( index ), self._getLastPosition() ) # Can't insert after the final newline
+        lineNumber, column = position
+        line = self.lines[lineNumber-1]
+        newLines = text.split( '\n' )
+        if len(newLines) == 1:
+            self.lines[lineNumber-1] = line[:column] + text + line[column:]
+            newPosition = lineNumber, column+len(text)
+        else:
+            newPosition = lineNumber+len(newLines)-1, len(newLines[-1])
+            newLines[0], newLines[-1] = line[:column]+newLines[0], newLines[-1]+line[column:]
+            self.lines[lineNumber-1:lineNumber] = newLines
+        self.modifiedFlag = True
+
+        def adjust( oldPosition ):
+            if oldPosition[0] != lineNumber: return oldPosition[0]+newPosition[0]-lineNumber, oldPosition[1]
+            return newPosition[0], newPosition[1]+oldPosition[1]-column
+        for markName,markPosition in self.marks.items():
+            if markPosition >= position: self.marks[markName] = adjust( markPosition ) # Marks have right gravity
+        for ranges in self.tagRanges.values(): # Text inserted at the start or end of a range isn't tagged
+            for j,(startPosition,endPosition) in enumerate( ranges ):
+                if endPosition > position:
+                    ranges[j] = ( adjust( startPosition ) if startPosition >= position else startPosition ), adjust( endPosition )
+    # end of HeadlessText.insert
+
+
+    def delete( self, index1, index2=None ):
+        """
+        Delete the text between the indexes
+            (or the character at index1 if index2 isn't given).
+        """
+        return self._callProxy( self._delete, ('delete', index1) + (() if index2 is None else (index2,)) )
+    def _delete( self, index1, index2=None ):
+        """
+        Do the delete.
+        """
+        lastPosition = self._getLastPosition()
+        startPosition = min( self._getPosition( index1 ), lastPosition ) # Can't delete the final newline
+        endPosition = self._addChars( startPosition, 1 ) if index2 is None else self._getPosition( index2 )
+        endPosition = min( endPosition, lastPosition )
+        if endPosition <= startPosition: return
+        (startLineNumber,startColumn), (endLineNumber,endColumn) = startPosition, endPosition
+        self.lines[startLineNumber-1:endLineNumber] = [self.lines[startLineNumber-1][:startColumn] + self.lines[endLineNumber-1][endColumn:]]
+        self.modifiedFlag = True
+
+        def adjust( oldPosition ):
+            if oldPosition <= startPosition: return oldPosition
+            if oldPosition < endPosition: return startPosition
+            if oldPosition[0] != endLineNumber: return oldPosition[0]-endLineNumber+startLineNumber, oldPosition[1]
+            return startLineNumber, startColumn+oldPosition[1]-endColumn
+        for markName,markPosition in self.marks.items():
+            self.marks[markName] = adjust( markPosition )
+        for tagName,ranges in self.tagRanges.items():
+            if ranges and ranges[-1][1] > startPosition:
+                self.tagRanges[tagName] = self._mergeRanges( [(adjust( rangeStart ),adjust( rangeEnd )) for rangeStart,rangeEnd in ranges] )
+    # end of HeadlessText.delete
+
+
+    def mark_set( self, markName, index ):
+        """
+        Set the mark (e.g., the cursor) to the index.
+        """
+        if markName == tk.INSERT: return self._callProxy( self._markSet, ('mark', 'set', markName, index) )
+        self._markSet( 'set', markName, index )
+    def _markSet( self, setWord, markName, index ):
+        """
+        Do the mark set.
+        """
+        self.marks[markName] = min( self._getPosition( index ), self._getLastPosition() )
+    # end of HeadlessText.mark_set
+
+
+    def mark_unset( self, *markNames ):
+        for markName in markNames: self.marks.pop( markName, None )
+
+
+    def _mergeRanges( self, ranges ):
+        """
+        Returns the ranges sorted, without any empty ones, and with any that touch or overlap joined together.
+        """
+        mergedRanges = []
+        for startPosition,endPosition in sorted( ranges ):
+            if endPosition <= startPosition: continue
+            if mergedRanges and startPosition <= mergedRanges[-1][1]:
+                if endPosition > mergedRanges[-1][1]: mergedRanges[-1] = mergedRanges[-1][0], endPosition
+            else: mergedRanges.append( (startPosition,endPosition) )
+        return mergedRanges
+    # end of HeadlessText._mergeRanges
+
+
+    def tag_add( self, tagName, index1, *args ):
+        """
+        Add the tag to the text between each pair of indexes
+            (or to a single character if the last index isn't paired).
+        """
+        indexes, newRanges = (index1,) + args, []
+        for j in range( 0, len(indexes), 2 ):
+            startPosition = self._getPosition( indexes[j] )
+            newRanges.append( (startPosition, self._getPosition( indexes[j+1] ) if j+1 < len(indexes) else self._addChars( startPosition, 1 )) )
+        ranges = self.tagRanges.setdefault( tagName, [] )
+        if len(newRanges) > 1: self.tagRanges[tagName] = self._mergeRanges( ranges + newRanges ); return
+
+        # Just one range (e.g., from a search) so don't sort them all again
+        startPosition, endPosition = newRanges[0]
+        if endPosition <= startPosition: return
+        startIndex = bisect_left( ranges, (startPosition,) ) # The first range starting at or after it
+        if startIndex and ranges[startIndex-1][1] >= startPosition: startIndex -= 1 # The previous range touches it
+        endIndex = startIndex
+        while endIndex < len(ranges) and ranges[endIndex][0] <= endPosition: endIndex += 1
+        if endIndex > startIndex: # Join the ranges that it touches
+            startPosition, endPosition = min( startPosition, ranges[startIndex][0] ), max( endPosition, ranges[endIndex-1][1] )
+        ranges[startIndex:endIndex] = [(startPosition,endPosition)]
+    # end of HeadlessText.tag_add
+
+
+    def tag_remove( self, tagName, index1, index2=None ):
+        """
+        Remove the tag from the text between the indexes
+            (or from the character at index1 if index2 isn't given).
+        """
+        ranges = self.tagRanges.get( tagName )
+        if not ranges: return
+        removeStart = self._getPosition( index1 )
+        removeEnd = self._addChars( removeStart, 1 ) if index2 is None else self._getPosition( index2 )
+        if removeEnd <= removeStart: return
+        newRanges = []
+        for startPosition,endPosition in ranges:
+            if endPosition <= removeStart or startPosition >= removeEnd: newRanges.append( (startPosition,endPosition) )
+            else:
+                if startPosition < removeStart: newRanges.append( (startPosition,removeStart) )
+                if endPosition > removeEnd: newRanges.append( (removeEnd,endPosition) )
+        self.tagRanges[tagName] = newRanges
+    # end of HeadlessText.tag_remove
+
+
+    def tag_ranges( self, tagName ):
+        """
+        Returns a tuple of the start and end indexes of each range of the tag.
+        """
+        return tuple( '{}.{}'.format( *position ) for positions in self.tagRanges.get( tagName, () ) for position in positions )
+    # end of HeadlessText.tag_ranges
+
+
+    def tag_configure( self, tagName, cnf=None, **kwargs ):
+        self.tagOptions.setdefault( tagName, {} ).update( cnf or {}, **kwargs )
+    tag_config = tag_configure
+
+
+    def search( self, pattern, index, stopindex=None, forwards=None, backwards=None, exact=None,
+                                    regexp=None, nocase=None, count=None, elide=None ):
+        """
+        Search forwards from the index for the pattern (a Tcl regular expression if regexp is set)
+            up to the stop index (or all the way around the text if it's not given)
+            and return the index of the start of the match (or an empty string).
+
+        Like Tk, the match is found a line at a time (so it can't go past the end of a line)
+            and the number of characters matched is set in the count variable.
+        """
+        if backwards: raise tk.TclError( "Headless text search can't go backwards" )
+        startPosition = self._getPosition( index )
+        if stopindex is None: # Wrap around
+            searchRanges = ( (startPosition, (len(self.lines)+1,0)), ((1,0), startPosition) )
+        else: searchRanges = ( (startPosition, self._getPosition( stopindex )), )
+
+        searchOptions = ['-indices', '-inline'] + (['-nocase'] if nocase else [])
+        for (startLineNumber,startColumn), (endLineNumber,endColumn) in searchRanges:
+            for lineNumber in range( startLineNumber, min( endLineNumber, len(self.lines) ) + 1 ):
+                line = self.lines[lineNumber-1] + '\n'
+                if lineNumber == endLineNumber: line = line[:endColumn]
+                column = startColumn if lineNumber == startLineNumber else 0
+                if regexp:
+                    result = self.tk.call( 'regexp', *searchOptions, '-start', column, '--', pattern, line )
+                    if not result: continue
+                    matchStart, matchLast = result[0] if isinstance( result[0], tuple ) else self.tk.splitlist( result[0] )
+                    matchStart, matchLength = int( matchStart ), int( matchLast ) - int( matchStart ) + 1
+                else:
+                    matchStart = line.lower().find( pattern.lower(), column ) if nocase else line.find( pattern, column )
+                    if matchStart < 0: continue
+                    matchLength = len( pattern )
+                if count is not None: count.set( matchLength )
+                return '{}.{}'.format( lineNumber, matchStart )
+        return ''
+    # end of HeadlessText.search
+
+
+    def edit_modified( self, arg=None ):
+        if arg is None: return self.modifiedFlag
+        self.modifiedFlag = bool( arg )
+    def edit_reset( self ): pass
+    def edit_separator( self ): pass
+    def see( self, index ): pass
+    def bbox( self, index ): return 0, 0, 8, 16 # Roughly one character
+# end of HeadlessText class
+
+
+
+class HeadlessCustomText( HeadlessText ):
+    """
+    A headless text box with the CustomText methods
+        (so that the callback and highlighting code that's timed is the real code).
+    """
+    _callback = CustomText._callback
+    _noteChangedLines = CustomText._noteChangedLines
+    _adjustVerseLines = CustomText._adjustVerseLines
+    clearVerseLines = CustomText.clearVerseLines
+    appendVerseLine = CustomText.appendVerseLine
+    getVerseMarkName = CustomText.getVerseMarkName
+    getVerseLineIndex = CustomText.getVerseLineIndex
+    setTextChangeCallback = CustomText.setTextChangeCallback
+    highlightPattern = CustomText.highlightPattern
+    getHighlightRegex = CustomText.getHighlightRegex
+    _getPythonPattern = CustomText._getPythonPattern
+    _getTextIndexes = CustomText._getTextIndexes
+    _findLiteralPatterns = CustomText._findLiteralPatterns
+    highlightAllPatterns = CustomText.highlightAllPatterns
+
+    def __init__( self, master, **kwargs ):
+        """
+        Set up the same variables as CustomText.__init__
+            (but the callback is called by HeadlessText rather than by a Tcl proxy).
+        """
+        HeadlessText.__init__( self, master, **kwargs )
+        self.callbackFunction = None
+        self.literalPatternAutomaton = None
+        self.compiledHighlightPatterns = {}
+        self.highlightedPatterns, self.highlightTagDicts = None, {}
+        self.changedLineRange = None
+        self.lastNumLines = 1
+        self.bulkLoading = False
+        self.verseLineNumbers, self.verseMarkNames = [], []
+    # end of HeadlessCustomText.__init__
+
+
+    def startBulkLoad( self ):
+        """
+        See CustomText.startBulkLoad.
+        """
+        self.bulkLoading = True
+    # end of HeadlessCustomText.startBulkLoad
+
+
+    def endBulkLoad( self ):
+        """
+        See CustomText.endBulkLoad.
+        """
+        self.bulkLoading = False
+        self.lastNumLines = int( self.index( tk.END+'-1c' ).split( '.' )[0] )
+        self.changedLineRange = 1, self.lastNumLines
+    # end of HeadlessCustomText.endBulkLoad
+# end of HeadlessCustomText class
+
+
+
+class HeadlessListbox( HeadlessWidget ):
+    """
+    Just enough of a Tk listbox for the autocomplete pop-up.
+    """
+    def __init__( self, master, **kwargs ):
+        """
+        """
+        HeadlessWidget.__init__( self, master )
+        self.items = []
+    # end of HeadlessListbox.__init__
+
+
+    def _getItemIndex( self, index ):
+        if index == tk.END: return len(self.items)
+        if index == tk.ACTIVE: return 0
+        return int( index )
+    # end of HeadlessListbox._getItemIndex
+
+
+    def delete( self, first, last=None ):
+        firstIndex = self._getItemIndex( first )
+        del self.items[firstIndex:firstIndex+1 if last is None else self._getItemIndex( last )+1]
+    def insert( self, index, *elements ):
+        itemIndex = self._getItemIndex( index )
+        self.items[itemIndex:itemIndex] = elements
+    def get( self, first, last=None ):
+        firstIndex = self._getItemIndex( first )
+        if last is None: return self.items[firstIndex] if firstIndex < len(self.items) else ''
+        return tuple( self.items[firstIndex:self._getItemIndex( last )+1] )
+    def select_set( self, first, last=None ): pass
+    def yview( self, *args ): pass
+# end of HeadlessListbox class
+
+
+
+def demo():
+    """
+    Demonstrate the headless text box.
+    """
+    if BibleOrgSysGlobals.verbosityLevel > 0: print( ProgNameVersion )
+
+    rootWindow = HeadlessRoot()
+    textBox = HeadlessCustomText( rootWindow )
+    textBox.setTextChangeCallback( lambda result, *args: print( "  Callback", args, textBox.changedLineRange ) )
+    textBox.insert( tkSTART, '\\id JDE\n\\c 1\n\\v 1 Jude a servant\n' )
+    textBox.delete( '3.4', '3.4 lineend' )
+    textBox.highlightAllPatterns( [(True,'\\\\.*?[ *\n]','green',{'foreground':'green'})] )
+    print( "Text:", repr( textBox.get( tkSTART, tk.END ) ), "Markers:", textBox.tag_ranges( 'green' ) )
+    rootWindow.destroy()
+# end of HeadlessTk.demo
+
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( ProgName, ProgVersion )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    demo()
+
+    BibleOrgSysGlobals.closedown( ProgName, ProgVersion )
+# end of HeadlessTk.py
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# MappedBookFile.py
+#
+# Memory-mapped reading of a USFM book file a chapter at a time
+#
+# Copyright (C) 2017 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Memory-mapped reading of a USFM book file a chapter at a time.
+
+The file is mapped (rather than read) and the raw bytes are scanned for the lines
+    that start each chapter, so the file is split into chunks:
+        chunk 0 is everything before the first chapter line (i.e., the book headers and introduction)
+        and each following chunk starts with a \\c line.
+Each chunk is only decoded (without any Unicode Byte Order Marker (BOM) and with \\n line endings)
+    when it's asked for, so the chapters being displayed can be decoded without decoding the whole book.
+
+The chapter lines can only be found in the bytes if the encoding is ASCII-compatible and not stateful
+    (e.g., UTF-8 or a single-byte code page). Otherwise the whole file is a single chunk.
+
+class MappedBookFile
+    __init__( self, filepath, encoding, chunkByteOffsets=None )
+    close( self )
+    getNumChunks( self )
+    getChunkByteOffsets( self )
+    findChapterChunk( self, chapterNumber )
+    getChunkText( self, chunkIndex )
+    getChunkNumChars( self )
+    getText( self )
+"""
+
+from gettext import gettext as _
+
+LastModifiedDate = '2017-11-24' # by RJH
+ShortProgName = "MappedBookFile"
+ProgName = "Biblelator Mapped Book File"
+ProgVersion = '0.41'
+ProgNameVersion = '{} v{}'.format( ProgName, ProgVersion )
+ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), LastModifiedDate )
+
+debuggingThisModule = False
+
+
+import logging, re
+import mmap, codecs, locale
+
+# BibleOrgSys imports
+if __name__ == '__main__': import sys; sys.path.append( '../BibleOrgSys/' )
+import BibleOrgSysGlobals
+
+
+CHAPTER_LINE_REGEX = re.compile( rb'\n\\c ([0-9]+)' ) # A chapter line (after a newline) with its number
+
+
+
+def exp( messageString ):
+    """
+    Expands the message string in debug mode.
+    Prepends the module name to a error or warning message string
+        if we are in debug mode.
+    Returns the new string.
+    """
+    try: nameBit, errorBit = messageString.split( ': ', 1 )
+    except ValueError: nameBit, errorBit = '', messageString
+    if BibleOrgSysGlobals.debugFlag or debuggingThisModule:
+        nameBit = '{}{}{}'.format( ShortProgName, '.' if nameBit else '', nameBit )
+    return '{}{}'.format( nameBit+': ' if nameBit else '', errorBit )
+# end of exp
+
+
+
+def canSplitAtChapters( encoding ):
+    """
+    Returns True if the chapter lines can be found in the bytes of a file with the given encoding
+        (and each chunk can then be decoded by itself).
+    """
+    codecName = codecs.lookup( encoding ).name
+    if codecName.startswith( 'iso2022' ) or codecName in ( 'utf-7', 'hz', ): return False # ASCII bytes can be part of other characters
+    if codecName == 'utf-8-sig': return True # The BOM is removed first
+    try: return '\n\\c 0'.encode( encoding ) == b'\n\\c 0'
+    except UnicodeError: return False
+# end of MappedBookFile.canSplitAtChapters
+
+
+
+class MappedBookFile:
+    """
+    A memory-mapped USFM book file which is decoded a chunk (i.e., usually a chapter) at a time.
+
+    The file must be closed when it's no longer needed (or used in a with statement)
+        as it can't be written while it's mapped on some systems.
+    """
+    def __init__( self, filepath, encoding, chunkByteOffsets=None ):
+        """
+        Map the file and find where each chunk starts.
+
+        If encoding is None, the locale's preferred encoding is used (like open() does).
+        If chunkByteOffsets is given (e.g., from a saved index) and they're still at chapter lines,
+            the file isn't scanned for them.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("MappedBookFile.__init__( {}, {}, {} )").format( filepath, encoding, chunkByteOffsets ) )
+        self.filepath = filepath
+        self.encoding = locale.getpreferredencoding( False ) if encoding is None else encoding
+        self.chunkTexts, self.chunkNumChars = {}, {} # The decoded chunks (until the whole text is made) and their lengths
+
+        with open( filepath, 'rb' ) as bookFile:
+            try: self.mappedFile = mmap.mmap( bookFile.fileno(), 0, access=mmap.ACCESS_READ )
+            except ValueError: # Empty files can't be mapped
+                self.mappedFile = None
+                self.chunkByteOffsets, self.chapterNumbers = [], []
+                return
+
+        startIndex = 0
+        if self.mappedFile[:3] == b'\xef\xbb\xbf': # 0xEF,0xBB,0xBF
+            logging.info( "MappedBookFile: Detected Unicode (UTF-8) Byte Order Marker (BOM) in {}".format( filepath ) )
+            startIndex = 3
+        elif self.mappedFile[:2] in ( b'\xff\xfe', b'\xfe\xff' ) and codecs.lookup( self.encoding ).name in ( 'utf-16-le', 'utf-16-be' ):
+            # NOTE: utf-16 itself needs the BOM to find the byte order
+            logging.info( "MappedBookFile: Detected Unicode (UTF-16) Byte Order Marker (BOM) in {}".format( filepath ) )
+            startIndex = 2
+
+        self.chunkByteOffsets, self.chapterNumbers = [startIndex], [0]
+        if not canSplitAtChapters( self.encoding ): return
+        if chunkByteOffsets and chunkByteOffsets[0] == startIndex:
+            for chunkByteOffset in chunkByteOffsets[1:]:
+                match = CHAPTER_LINE_REGEX.match( self.mappedFile, chunkByteOffset-1 ) if chunkByteOffset > startIndex else None
+                if match is None: # The offsets don't fit this file
+                    self.chunkByteOffsets, self.chapterNumbers = [startIndex], [0]
+                    break
+                self.chunkByteOffsets.append( chunkByteOffset ); self.chapterNumbers.append( int( match.group( 1 ) ) )
+            else: return
+        for match in CHAPTER_LINE_REGEX.finditer( self.mappedFile, startIndex ):
+            self.chunkByteOffsets.append( match.start()+1 ); self.chapterNumbers.append( int( match.group( 1 ) ) )
+    # end of MappedBookFile.__init__
+
+
+    def __enter__( self ): return self
+    def __exit__( self, *args ): self.close()
+
+
+    def close( self ):
+        """
+        Unmap the file (any chunks that have already been decoded can still be got).
+        """
+        if self.mappedFile is not None:
+            self.mappedFile.close()
+            self.mappedFile = None
+    # end of MappedBookFile.close
+
+
+    def getNumChunks( self ):
+        """
+        Returns the number of chunks that the file is split into (0 for an empty file).
+        """
+        return len( self.chunkByteOffsets )
+    # end of MappedBookFile.getNumChunks
+
+
+    def getChunkByteOffsets( self ):
+        """
+        Returns a list of where each chunk starts in the file (so the file doesn't have to be scanned next time).
+        """
+        return list( self.chunkByteOffsets )
+    # end of MappedBookFile.getChunkByteOffsets
+
+
+    def findChapterChunk( self, chapterNumber ):
+        """
+        Returns the index of the chunk which starts with the given chapter (0 for the book introduction)
+            or None if the chapters aren't in order so it can't be sure which chunk it is.
+        """
+        if chapterNumber not in self.chapterNumbers: return None
+        if any( self.chapterNumbers[j] >= self.chapterNumbers[j+1] for j in range( len(self.chapterNumbers)-1 ) ):
+            return None # Chapters are missing their numbers, duplicated, or out of order
+        return self.chapterNumbers.index( chapterNumber )
+    # end of MappedBookFile.findChapterChunk
+
+
+    def getChunkText( self, chunkIndex ):
+        """
+        Returns the decoded text of the chunk (decoding it if that hasn't already been done).
+
+        Raises UnicodeDecodeError if it can't be decoded with the given encoding.
+        """
+        try: return self.chunkTexts[chunkIndex]
+        except KeyError: pass
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("MappedBookFile.getChunkText( {} ) for {}").format( chunkIndex, self.filepath ) )
+
+        startIndex = self.chunkByteOffsets[chunkIndex]
+        endIndex = self.chunkByteOffsets[chunkIndex+1] if chunkIndex+1 < len(self.chunkByteOffsets) else len(self.mappedFile)
+        chunkBytes = memoryview( self.mappedFile )[startIndex:endIndex]
+        try: chunkText = str( chunkBytes, self.encoding )
+        finally: chunkBytes.release() # so that the file can be unmapped
+        if '\r' in chunkText: # Convert the line endings like text mode does
+            chunkText = chunkText.replace( '\r\n', '\n' ).replace( '\r', '\n' )
+        self.chunkTexts[chunkIndex] = chunkText
+        self.chunkNumChars[chunkIndex] = len( chunkText )
+        return chunkText
+    # end of MappedBookFile.getChunkText
+
+
+    def getChunkNumChars( self ):
+        """
+        Returns a list of the number of decoded characters in each chunk
+            (once they've all been decoded, e.g., by getText).
+        """
+        return [self.chunkNumChars[chunkIndex] for chunkIndex in range( len(self.chunkByteOffsets) )]
+    # end of MappedBookFile.getChunkNumChars
+
+
+    def getText( self ):
+        """
+        Returns the decoded text of the whole book (decoding any chunks that haven't already been done).
+
+        The decoded chunks are then forgotten (so that the text isn't kept twice).
+
+        Raises UnicodeDecodeError if it can't be decoded with the given encoding.
+        """
+        bookText = ''.join( [self.getChunkText( chunkIndex ) for chunkIndex in range( len(self.chunkByteOffsets) )] )
+        self.chunkTexts = {}
+        return bookText
+    # end of MappedBookFile.getText
+# end of MappedBookFile class
+
+
+
+def demo():
+    """
+    Demonstrate reading a chapter of a book file.
+    """
+    import os, tempfile
+    if BibleOrgSysGlobals.verbosityLevel > 0: print( ProgNameVersion )
+
+    with tempfile.TemporaryDirectory() as folderPath:
+        filepath = os.path.join( folderPath, '66-JDExyz.SFM' )
+        with open( filepath, 'wb' ) as bookFile:
+            bookFile.write( '\ufeff\\id JDE\r\n\\h Jude\r\n\\c 1\r\n\\p\r\n\\v 1 Jude\r\n\\c 2\r\n\\v 1 More\r\n'.encode( 'utf-8' ) )
+        with MappedBookFile( filepath, 'utf-8' ) as bookFile:
+            print( "Chunks start at", bookFile.getChunkByteOffsets() )
+            print( "Chapter 1:", repr( bookFile.getChunkText( bookFile.findChapterChunk( 1 ) ) ) )
+            print( "Book:", repr( bookFile.getText() ) )
+# end of MappedBookFile.demo
+
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( ProgName, ProgVersion )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    demo()
+
+    BibleOrgSysGlobals.closedown( ProgName, ProgVersion )
+# end of MappedBookFile.py
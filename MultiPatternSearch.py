@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# MultiPatternSearch.py
+#
+# Functions to find many literal strings in a single pass through some text
+#
+# Copyright (C) 2017 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Functions to find many literal strings (e.g., invalid character combinations)
+    in a single pass through some text (using an Aho-Corasick automaton)
+    so that the time taken doesn't grow with the number of strings.
+
+    compileMultiPatternAutomaton( patterns )
+    findAllPatterns( automaton, text )
+"""
+
+from gettext import gettext as _
+
+LastModifiedDate = '2017-11-22' # by RJH
+ShortProgName = "MultiPatternSearch"
+ProgName = "Biblelator Multi-Pattern Search"
+ProgVersion = '0.41'
+ProgNameVersion = '{} v{}'.format( ProgName, ProgVersion )
+ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), LastModifiedDate )
+
+debuggingThisModule = False
+
+
+from collections import deque
+
+# BibleOrgSys imports
+if __name__ == '__main__': import sys; sys.path.append( '../BibleOrgSys/' )
+import BibleOrgSysGlobals
+
+
+
+def exp( messageString ):
+    """
+    Expands the message string in debug mode.
+    Prepends the module name to a error or warning message string
+        if we are in debug mode.
+    Returns the new string.
+    """
+    try: nameBit, errorBit = messageString.split( ': ', 1 )
+    except ValueError: nameBit, errorBit = '', messageString
+    if BibleOrgSysGlobals.debugFlag or debuggingThisModule:
+        nameBit = '{}{}{}'.format( ShortProgName, '.' if nameBit else '', nameBit )
+    return '{}{}'.format( nameBit+': ' if nameBit else '', errorBit )
+# end of exp
+
+
+
+def compileMultiPatternAutomaton( patterns ):
+    """
+    Build an automaton that finds all of the patterns (literal strings) at once.
+
+    Each state has a dictionary from the next character to the next state
+        (with the failure links already followed, so there's only ever one step per character).
+    Any character that's not in the dictionary goes back to the start state (0).
+
+    Empty patterns are ignored.
+
+    Returns a 2-tuple with the list of state dictionaries
+        and a list (for each state) of the (patternIndex,patternLength) tuples for the patterns that end there.
+    """
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        print( exp("compileMultiPatternAutomaton( {} )").format( patterns ) )
+
+    # Make the trie of the patterns
+    transitions, outputs = [{}], [[]]
+    for patternIndex,pattern in enumerate( patterns ):
+        if not pattern: continue
+        state = 0
+        for char in pattern:
+            if char not in transitions[state]:
+                transitions.append( {} ); outputs.append( [] )
+                transitions[state][char] = len(transitions) - 1
+            state = transitions[state][char]
+        outputs[state].append( (patternIndex,len(pattern)) )
+
+    # Add the failure links (going through the states in order of their depth)
+    #   so that each state also has the transitions and outputs of its longest proper suffix
+    failures = [0] * len(transitions)
+    stateQueue = deque( transitions[0].values() )
+    while stateQueue:
+        state = stateQueue.popleft()
+        for char,nextState in transitions[state].items():
+            stateQueue.append( nextState )
+            failures[nextState] = transitions[failures[state]].get( char, 0 ) if state else 0
+            outputs[nextState].extend( outputs[failures[nextState]] )
+        for char,failState in transitions[failures[state]].items():
+            if char not in transitions[state]: transitions[state][char] = failState
+
+    return transitions, [tuple( sorted( stateOutputs ) ) for stateOutputs in outputs]
+# end of MultiPatternSearch.compileMultiPatternAutomaton
+
+
+def findAllPatterns( automaton, text ):
+    """
+    Go through the text once and find every occurrence of every pattern (even if they overlap).
+
+    Returns a list of (index,patternIndex) tuples in order of where they start in the text
+        (or in pattern order if more than one starts at the same place).
+    """
+    transitions, outputs = automaton
+    matches = []
+    state = 0
+    for endIndex,char in enumerate( text ):
+        state = transitions[state].get( char, 0 )
+        for patternIndex,patternLength in outputs[state]:
+            matches.append( (endIndex-patternLength+1,patternIndex) )
+    matches.sort()
+    return matches
+# end of MultiPatternSearch.findAllPatterns
+
+
+
+def demo():
+    """
+    Demonstrate finding some patterns.
+    """
+    if BibleOrgSysGlobals.verbosityLevel > 0: print( ProgNameVersion )
+
+    patterns = ['he','she','his','hers',',,',' ,']
+    automaton = compileMultiPatternAutomaton( patterns )
+    for text in ( 'ushers', 'she said ,, this', 'nothing here' ):
+        print( "  {!r}: {}".format( text, [(index,patterns[patternIndex]) for index,patternIndex in findAllPatterns( automaton, text )] ) )
+# end of MultiPatternSearch.demo
+
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( ProgName, ProgVersion )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    demo()
+
+    BibleOrgSysGlobals.closedown( ProgName, ProgVersion )
+# end of MultiPatternSearch.py
@@ -39,6 +39,11 @@ class HTMLTextBox( BText )
 class CustomText( BText )
     __init__( self, *args, **kwargs )
     setTextChangeCallback( self, callableFunction )
+    startBulkLoad( self ), endBulkLoad( self )
+    clearVerseLines( self )
+    appendVerseLine( self, markName, index )
+    getVerseMarkName( self, index )
+    getVerseLineIndex( self, markName )
 
 class ChildBox
     __init__( self, parentApp )
@@ -69,7 +74,7 @@ class BibleBox( ChildBox )
 
 from gettext import gettext as _
 
-LastModifiedDate = '2017-11-09' # by RJH
+LastModifiedDate = '2017-11-24' # by RJH
 ShortProgName = "TextBoxes"
 ProgName = "Specialised text widgets"
 ProgVersion = '0.41'
@@ -79,7 +84,8 @@ ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), La
 debuggingThisModule = True
 
 
-import logging
+import logging, re, time
+from bisect import bisect_right
 
 import tkinter as tk
 from tkinter.ttk import Entry, Combobox
@@ -88,6 +94,8 @@ from tkinter.simpledialog import askstring, askinteger
 # Biblelator imports
 from BiblelatorGlobals import APP_NAME, tkSTART, DEFAULT, errorBeep, BIBLE_FORMAT_VIEW_MODES
 from BiblelatorSimpleDialogs import showError, showInfo
+from MultiPatternSearch import compileMultiPatternAutomaton, findAllPatterns
+from CallbackTimings import isCallbackTimingEnabled, recordCallbackTime
 
 
 # BibleOrgSys imports
@@ -98,6 +106,10 @@ from VerseReferences import SimpleVerseKey
 from BibleStylesheets import DEFAULT_FONTNAME
 
 
+TCL_REGEX_ESCAPES = { 'y':'\\b', 'Y':'\\B', 'm':'\\b(?=\\w)', 'M':'\\b(?<=\\w)' } # Python equivalents for highlight patterns
+SHARED_REGEX_ESCAPES = 'dDsSwWntrfv' # These mean the same in Tcl and Python regular expressions (as do escaped punctuation characters)
+
+
 
 def exp( messageString ):
     """
@@ -211,7 +223,11 @@ class BEntry( Entry ):
             to handle when the BEntry changes.
         """
         if self.callbackFunction is not None:
-            self.callbackFunction( result, *args )
+            if isCallbackTimingEnabled():
+                startTime = time.perf_counter()
+                self.callbackFunction( result, *args )
+                recordCallbackTime( self, args[0], time.perf_counter() - startTime )
+            else: self.callbackFunction( result, *args )
     # end of BEntry._callback
 
 
@@ -378,7 +394,11 @@ class BCombobox( Combobox ):
             to handle when the BCombobox changes.
         """
         if self.callbackFunction is not None:
-            self.callbackFunction( result, *args )
+            if isCallbackTimingEnabled():
+                startTime = time.perf_counter()
+                self.callbackFunction( result, *args )
+                recordCallbackTime( self, args[0], time.perf_counter() - startTime )
+            else: self.callbackFunction( result, *args )
     # end of BCombobox._callback
 
 
@@ -822,6 +842,13 @@ class CustomText( BText ):
         BText.__init__( self, *args, **kwargs ) # initialise the base class
 
         self.callbackFunction = None
+        self.literalPatternAutomaton = None # Patterns and the automaton made from them by _findLiteralPatterns
+        self.compiledHighlightPatterns = {} # Used by getHighlightRegex
+        self.highlightedPatterns, self.highlightTagDicts = None, {} # Used by highlightAllPatterns
+        self.changedLineRange = None # First and last line numbers changed since the last highlightAllPatterns
+        self.lastNumLines = 1
+        self.bulkLoading = False # Set by startBulkLoad
+        self.verseLineNumbers, self.verseMarkNames = [], [] # Sorted line numbers where each displayed verse starts (instead of Tk marks)
         # All widget changes happen via an internal Tcl command with the same name as the widget:
         #       all inserts, deletes, cursor changes, etc
         #
@@ -830,12 +857,25 @@ class CustomText( BText ):
         # original command and then calls a callback. We can then do whatever we want in the callback.
         private_callback = self.register( self._callback )
         self.tk.eval( """
-            proc widget_proxy {actual_widget callback args} {
+            proc customtext_proxy {actual_widget callback args} {
 
                 # this prevents recursion if the widget is called
                 # during the callback
                 set flag ::dont_recurse(actual_widget)
 
+                # remember where an edit starts (and where the text ended)
+                # before it's done, so the callback can adjust any line numbers
+                # (but not while lots of text is being loaded)
+                set editIndex {}
+                set endIndex {}
+                if {([lindex $args 0] in {insert replace delete}) &&
+                    ! [info exists ::customtext_bulkload($actual_widget)]} {
+                    catch {
+                        set editIndex [$actual_widget index [lindex $args 1]]
+                        set endIndex [$actual_widget index end]
+                    }
+                }
+
                 # call the real tk widget with the real args
                 set result [uplevel [linsert $args 0 $actual_widget]]
 
@@ -848,7 +888,7 @@ class CustomText( BText ):
                         # the flag makes sure that whatever happens in the
                         # callback doesn't cause the callbacks to be called again.
                         set $flag 1
-                        catch {$callback $result {*}$args } callback_result
+                        catch {$callback $result $editIndex $endIndex {*}$args } callback_result
                         unset -nocomplain $flag
                     }
                 }
@@ -859,21 +899,150 @@ class CustomText( BText ):
             """ )
         self.tk.eval( """
                 rename {widget} _{widget}
-                interp alias {{}} ::{widget} {{}} widget_proxy _{widget} {callback}
+                interp alias {{}} ::{widget} {{}} customtext_proxy _{widget} {callback}
             """.format( widget=str(self), callback=private_callback ) )
     # end of CustomText.__init__
 
 
-    def _callback( self, result, *args ):
+    def _callback( self, result, editIndex, endIndex, *args ):
         """
         This little function does the actual call of the user routine
             to handle when the CustomText changes.
+
+        For edits, editIndex and endIndex are where the edit started
+            and where the text ended before the edit was done (otherwise empty strings).
         """
+        startTime = time.perf_counter() if isCallbackTimingEnabled() else None
+        if args[0] in ('insert','replace','delete') and not self.bulkLoading:
+            self._noteChangedLines( args )
+            if self.verseLineNumbers: self._adjustVerseLines( editIndex, endIndex )
         if self.callbackFunction is not None:
             self.callbackFunction( result, *args )
+        if startTime is not None: recordCallbackTime( self, args[0], time.perf_counter() - startTime )
     # end of CustomText._callback
 
 
+    def startBulkLoad( self ):
+        """
+        Called before lots of text is inserted (e.g., a whole book or chapter)
+            so that the changed lines and verse line numbers aren't worked out again for every insert.
+            (The user function is still called.)
+
+        Any verse lines must be cleared first, and endBulkLoad must be called afterwards.
+        """
+        self.bulkLoading = True
+        self.tk.eval( 'set ::customtext_bulkload(_{}) 1'.format( self ) )
+    # end of CustomText.startBulkLoad
+
+
+    def endBulkLoad( self ):
+        """
+        Called after the text has been loaded: all of the lines are now counted as changed.
+        """
+        self.tk.eval( 'unset -nocomplain ::customtext_bulkload(_{})'.format( self ) )
+        self.bulkLoading = False
+        self.lastNumLines = int( self.index( tk.END+'-1c' ).split( '.' )[0] )
+        self.changedLineRange = 1, self.lastNumLines
+    # end of CustomText.endBulkLoad
+
+
+    def _noteChangedLines( self, editArgs ):
+        """
+        Given the arguments of an insert, replace, or delete (which has already been done),
+            extend self.changedLineRange to include the lines that might have changed.
+
+        The line numbers of any earlier changed lines after the edit are adjusted
+            for any lines that were inserted or deleted.
+        """
+        numLines = int( self.index( tk.END+'-1c' ).split( '.' )[0] )
+        numLinesAdded, self.lastNumLines = numLines - self.lastNumLines, numLines
+        if editArgs[0] == 'insert': numNewlines = sum( chars.count( '\n' ) for chars in editArgs[2::2] )
+        elif editArgs[0] == 'replace': numNewlines = sum( chars.count( '\n' ) for chars in editArgs[3::2] )
+        else: numNewlines = 0
+        try:
+            editLineNumber = int( self.index( editArgs[1] ).split( '.' )[0] )
+            cursorLineNumber = int( self.index( tk.INSERT ).split( '.' )[0] )
+        except tk.TclError: firstLineNumber, lastLineNumber = 1, numLines # e.g., a selection that was deleted
+        else: # Both the edit position (now) and the cursor are in the changed lines
+            firstLineNumber = max( 1, min( editLineNumber, cursorLineNumber ) - numNewlines )
+            lastLineNumber = min( numLines, max( editLineNumber, cursorLineNumber ) + numNewlines )
+
+        if self.changedLineRange is not None:
+            oldFirstLineNumber, oldLastLineNumber = self.changedLineRange
+            if oldFirstLineNumber > lastLineNumber - numLinesAdded: oldFirstLineNumber += numLinesAdded
+            if oldLastLineNumber > lastLineNumber - numLinesAdded: oldLastLineNumber += numLinesAdded
+            firstLineNumber = min( firstLineNumber, oldFirstLineNumber )
+            lastLineNumber = min( numLines, max( lastLineNumber, oldLastLineNumber ) )
+        self.changedLineRange = firstLineNumber, lastLineNumber
+    # end of CustomText._noteChangedLines
+
+
+    def _adjustVerseLines( self, editIndex, endIndex ):
+        """
+        Given where an edit started and where the text ended before the edit,
+            adjust the verse start line numbers after the edit
+            for any lines that were inserted or deleted.
+
+        Verses that started in deleted lines now start on the edited line
+            (like a Tk mark with left gravity would).
+        """
+        try:
+            editLineNumber = int( editIndex.split( '.' )[0] )
+            numLinesAdded = int( self.index( tk.END ).split( '.' )[0] ) - int( endIndex.split( '.' )[0] )
+        except ValueError: return # The edit couldn't be located (so it probably failed)
+        if not numLinesAdded: return
+
+        verseLineNumbers = self.verseLineNumbers
+        for j in range( bisect_right( verseLineNumbers, editLineNumber ), len(verseLineNumbers) ):
+            verseLineNumbers[j] = max( editLineNumber, verseLineNumbers[j] + numLinesAdded )
+    # end of CustomText._adjustVerseLines
+
+
+    def clearVerseLines( self ):
+        """
+        Forget where all the verses start (e.g., when the text box is cleared).
+        """
+        self.verseLineNumbers, self.verseMarkNames = [], []
+    # end of CustomText.clearVerseLines
+
+
+    def appendVerseLine( self, markName, index ):
+        """
+        Remember that the verse (with a mark name like 'C2V14') starts on the line of the given index.
+
+        Verses must be appended in order through the text.
+        """
+        lineNumber = int( self.index( index ).split( '.' )[0] )
+        if BibleOrgSysGlobals.debugFlag and self.verseLineNumbers:
+            assert lineNumber >= self.verseLineNumbers[-1]
+        self.verseLineNumbers.append( lineNumber )
+        self.verseMarkNames.append( markName )
+    # end of CustomText.appendVerseLine
+
+
+    def getVerseMarkName( self, index ):
+        """
+        Returns the mark name (like 'C2V14') of the verse containing the line of the given index,
+            or None if it's before the first verse.
+
+        If several verses start on the same line (e.g., missing verses), the last one is returned.
+        """
+        lineNumber = int( self.index( index ).split( '.' )[0] )
+        verseIndex = bisect_right( self.verseLineNumbers, lineNumber ) - 1
+        return self.verseMarkNames[verseIndex] if verseIndex >= 0 else None
+    # end of CustomText.getVerseMarkName
+
+
+    def getVerseLineIndex( self, markName ):
+        """
+        Returns the text index (like '55.0') of the start of the line where the verse starts,
+            or None if the verse isn't displayed.
+        """
+        try: return '{}.0'.format( self.verseLineNumbers[self.verseMarkNames.index( markName )] )
+        except ValueError: return None
+    # end of CustomText.getVerseLineIndex
+
+
     def setTextChangeCallback( self, callableFunction ):
         """
         Just a little function to remember the routine to call
@@ -907,6 +1076,99 @@ class CustomText( BText ):
     # end of CustomText.highlightPattern
 
 
+    def getHighlightRegex( self, pattern, regexpFlag=True ):
+        """
+        Returns the compiled Python regular expression for a Tk search pattern
+            (see _getPythonPattern),
+            or None if the pattern has to be left to Tk.
+        """
+        try: return self.compiledHighlightPatterns[(pattern,regexpFlag)]
+        except KeyError: pass
+        pythonPattern = self._getPythonPattern( pattern ) if regexpFlag else re.escape( pattern )
+        compiledPattern = None
+        if pythonPattern is not None:
+            try: compiledPattern = re.compile( pythonPattern, re.MULTILINE ) # Tk matches ^ and $ at each line
+            except re.error: pass
+        if compiledPattern is None:
+            logging.warning( exp("CustomText.getHighlightRegex: Leaving {!r} pattern to Tk").format( pattern ) )
+        self.compiledHighlightPatterns[(pattern,regexpFlag)] = compiledPattern
+        return compiledPattern
+    # end of CustomText.getHighlightRegex
+
+
+    def _getPythonPattern( self, pattern ):
+        """
+        Returns the Python equivalent of a Tcl (advanced) regular expression
+            (converting the Tcl-only escapes like \\y for a word boundary),
+            or None if it uses any other syntax that Python doesn't have or treats differently,
+            e.g., [[:alpha:]] classes, \\A, \\B (a backslash in Tcl), or (?n) options.
+
+        Like Tk, a negated bracket expression (e.g., [^ ]) doesn't match a newline.
+        """
+        if pattern.startswith( '***' ): return None # A Tcl director
+        pythonBits, inBrackets, ix = [], False, 0
+        while ix < len(pattern):
+            char = pattern[ix]
+            if char == '\\':
+                if ix+1 == len(pattern): return None
+                escapedChar = pattern[ix+1]; ix += 2
+                if not escapedChar.isalnum() or escapedChar in SHARED_REGEX_ESCAPES \
+                or (escapedChar.isdigit() and not inBrackets): # back-references
+                    pythonBits.append( char+escapedChar )
+                elif escapedChar in TCL_REGEX_ESCAPES and not inBrackets: pythonBits.append( TCL_REGEX_ESCAPES[escapedChar] )
+                else: return None
+                continue
+            if inBrackets:
+                if char == '[':
+                    if pattern[ix+1:ix+2] in ( ':', '.', '=', ): return None # POSIX character class, collating element, or equivalence class
+                    char = '\\[' # Python might take it as a nested set
+                elif char == ']' and ix > bracketStartIndex:
+                    inBrackets = False
+                    if negated: char = '\n]'
+            elif char == '[':
+                inBrackets, negated = True, pattern[ix+1:ix+2] == '^'
+                if negated: char = '[^'; ix += 1
+                bracketStartIndex = ix + 1 # A ] straight after the [ or [^ is just a character
+            elif char == '(' and pattern[ix+1:ix+2] == '?' and pattern[ix+2:ix+3] not in ( ':', '=', '!', ):
+                return None # Tcl embedded options (or a Python-only extension)
+            pythonBits.append( char )
+            ix += 1
+        if inBrackets: return None
+        return ''.join( pythonBits )
+    # end of CustomText._getPythonPattern
+
+
+    def _getTextIndexes( self, lineStartOffsets, offsets, firstLineNumber ):
+        """
+        Convert the sorted character offsets (into text starting at firstLineNumber)
+            into Tk line.column indexes (in a single pass).
+        """
+        textIndexes, lineIndex, numLines = [], 0, len(lineStartOffsets)
+        for offset in offsets:
+            while lineIndex+1 < numLines and lineStartOffsets[lineIndex+1] <= offset: lineIndex += 1
+            textIndexes.append( '{}.{}'.format( firstLineNumber+lineIndex, offset-lineStartOffsets[lineIndex] ) )
+        return textIndexes
+    # end of CustomText._getTextIndexes
+
+
+    def _findLiteralPatterns( self, literalPatterns, lines, firstLineNumber, tagIndexes ):
+        """
+        Given a list of (pattern,tagName) 2-tuples for literal (non-regex) patterns without newlines,
+            find all of the patterns in a single pass through each of the lines
+            and append the start and end indexes of the matches to the lists in tagIndexes.
+        """
+        patterns = tuple( pattern for pattern,tagName in literalPatterns )
+        if self.literalPatternAutomaton is None or self.literalPatternAutomaton[0] != patterns:
+            self.literalPatternAutomaton = patterns, compileMultiPatternAutomaton( patterns )
+        automaton = self.literalPatternAutomaton[1]
+
+        for lineNumber,line in enumerate( lines, start=firstLineNumber ):
+            for column,patternIndex in findAllPatterns( automaton, line ):
+                pattern, tagName = literalPatterns[patternIndex]
+                tagIndexes.setdefault( tagName, [] ).extend( ('{}.{}'.format( lineNumber, column ), '{}.{}'.format( lineNumber, column+len(pattern) )) )
+    # end of CustomText._findLiteralPatterns
+
+
     def highlightAllPatterns( self, patternCollection ):
         """
         Given a collection of 4-tuples, apply the styles to the patterns in the text.
@@ -916,13 +1178,55 @@ class CustomText( BText ):
             pattern to search for
             tagName
             tagDict, e.g, {"background":"red"}
+
+        Only the lines that have changed since the last call are highlighted again
+            (unless the patterns have changed) so it's cheap to call after edits.
+        Each tag is only configured the first time (or if its tagDict changes).
+
+        The patterns are all matched in Python on one copy of the text
+            (rather than with a Tk search for each match)
+            and then each tag is added to all of its matches with a single tag_add.
         """
         if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-            print( exp("CustomText.highlightAllPatterns( {} )").format( patternCollection ) )
-
+            print( exp("CustomText.highlightAllPatterns( {} ) {}").format( patternCollection, self.changedLineRange ) )
+
+        patterns = tuple( (regexpFlag, pattern, tagName) for regexpFlag, pattern, tagName, tagDict in patternCollection )
+        if patterns != self.highlightedPatterns: # Need to do everything
+            for regexpFlag, pattern, tagName in self.highlightedPatterns or (): self.tag_remove( tagName, tkSTART, tk.END )
+            self.highlightedPatterns = patterns
+            self.changedLineRange = 1, int( self.index( tk.END+'-1c' ).split( '.' )[0] )
+        if self.changedLineRange is None: return # Nothing has changed since last time
+        firstLineNumber, lastLineNumber = self.changedLineRange
+        self.changedLineRange = None
+        startIndex, endIndex = '{}.0'.format( firstLineNumber ), '{}.0 lineend+1c'.format( lastLineNumber )
+
+        text = self.get( startIndex, endIndex )
+        lines = text.split( '\n' )
+        lineStartOffsets = [0]
+        for line in lines[:-1]: lineStartOffsets.append( lineStartOffsets[-1] + len(line) + 1 )
+
+        for tagName in { tagName for regexpFlag, pattern, tagName, tagDict in patternCollection }:
+            self.tag_remove( tagName, startIndex, endIndex ) # Before any matches are tagged (as several patterns can share a tag)
+
+        tagIndexes = {} # Lists of start and end indexes for each tag
+        literalPatterns = [] # These are all found together below
         for regexpFlag, pattern, tagName, tagDict in patternCollection:
-            self.tag_configure( tagName, **tagDict )
-            self.highlightPattern( pattern, tagName, regexpFlag=regexpFlag )
+            if self.highlightTagDicts.get( tagName ) != tagDict:
+                self.tag_configure( tagName, **tagDict )
+                self.highlightTagDicts[tagName] = tagDict
+            if not regexpFlag and pattern and '\n' not in pattern:
+                literalPatterns.append( (pattern,tagName) ); continue
+            compiledPattern = self.getHighlightRegex( pattern, regexpFlag )
+            if compiledPattern is None: # Let Tk find them
+                self.highlightPattern( pattern, tagName, startIndex, endIndex, regexpFlag=regexpFlag ); continue
+            offsets = []
+            for match in compiledPattern.finditer( text ):
+                if match.end() > match.start(): offsets.extend( match.span() )
+            tagIndexes.setdefault( tagName, [] ).extend( self._getTextIndexes( lineStartOffsets, offsets, firstLineNumber ) )
+        if literalPatterns: self._findLiteralPatterns( literalPatterns, lines, firstLineNumber, tagIndexes )
+
+        for tagName,textIndexes in tagIndexes.items():
+            if textIndexes: self.tag_add( tagName, *textIndexes )
     # end of CustomText.highlightAllPatterns
 # end of CustomText class
 
@@ -1122,6 +1426,7 @@ class ChildBox():
     def clearText( self ): # Leaves in normal state
         self.textBox.configure( state=tk.NORMAL )
         self.textBox.delete( tkSTART, tk.END )
+        if isinstance( self.textBox, CustomText ): self.textBox.clearVerseLines()
     # end of ChildBox.clearText
 
 
@@ -1162,8 +1467,15 @@ class ChildBox():
             print( exp("ChildBox.setAllText( {!r} )").format( newText ) )
 
         self.textBox.configure( state=tk.NORMAL ) # In case it was disabled
-        self.textBox.delete( tkSTART, tk.END ) # Delete everything that's existing
-        self.textBox.insert( tk.END, newText )
+        isCustomText = isinstance( self.textBox, CustomText )
+        if isCustomText: # No need to keep track of the changed lines for each insert
+            self.textBox.clearVerseLines()
+            self.textBox.startBulkLoad()
+        try:
+            self.textBox.delete( tkSTART, tk.END ) # Delete everything that's existing
+            self.textBox.insert( tk.END, newText )
+        finally:
+            if isCustomText: self.textBox.endBulkLoad()
         self.textBox.mark_set( tk.INSERT, tkSTART ) # move insert point to top
         self.textBox.see( tk.INSERT ) # scroll to top, insert is set
 
@@ -1400,8 +1712,11 @@ class BibleBoxFunctions():
                     insertEnd( str(markerList)[1:-1], 'markers' ) # Display list without square brackets
 
         #print( "  Setting mark to {}".format( currentMarkName ) )
-        self.textBox.mark_set( currentMarkName, tk.INSERT )
-        self.textBox.mark_gravity( currentMarkName, tk.LEFT )
+        if isinstance( self.textBox, CustomText ): # Editable boxes keep a line index rather than thousands of Tk marks
+            self.textBox.appendVerseLine( currentMarkName, tk.INSERT )
+        else:
+            self.textBox.mark_set( currentMarkName, tk.INSERT )
+            self.textBox.mark_gravity( currentMarkName, tk.LEFT )
 
         if verseDataList is None:
             if BibleOrgSysGlobals.debugFlag and debuggingThisModule and C!=0 and V!=0:
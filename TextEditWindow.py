@@ -53,10 +53,11 @@ from BiblelatorDialogs import YesNoDialog, OkCancelDialog
 from TextBoxes import CustomText, TRAILING_SPACE_SUBSTITUTE, MULTIPLE_SPACE_SUBSTITUTE, \
                                 DOUBLE_SPACE_SUBSTITUTE, ALL_POSSIBLE_SPACE_CHARS
 from ChildWindows import ChildWindow #, HTMLWindow
-from AutocorrectFunctions import setDefaultAutocorrectEntries # setAutocorrectEntries
+from AutocorrectFunctions import setDefaultAutocorrectEntries, findAutocorrectEntry # setAutocorrectEntries
 from AutocompleteFunctions import getCharactersBeforeCursor, \
                                 getWordCharactersBeforeCursor, getCharactersAndWordBeforeCursor, \
-                                getWordBeforeSpace, addNewAutocompleteWord, acceptAutocompleteSelection
+                                getWordBeforeSpace, addNewAutocompleteWord, acceptAutocompleteSelection, \
+                                AutocompleteWordIndex
 
 # BibleOrgSys imports
 #if __name__ == '__main__': import sys; sys.path.append( '../BibleOrgSys/' )
@@ -146,13 +147,15 @@ class TextEditWindow( ChildWindow ):
         setDefaultAutocorrectEntries( self )
         #setAutocorrectEntries( self, ourAutocorrectEntries )
 
-        self.autocompleteBox, self.autocompleteWords, self.existingAutocompleteWordText = None, {}, ''
+        self.autocompleteBox, self.autocompleteWords, self.existingAutocompleteWordText = None, AutocompleteWordIndex(), ''
         self.autocompleteWordChars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_'
         # Note: I guess we could have used non-word chars instead (to stop the backwards word search)
         self.autocompleteMinLength = 3 # Show the normal window after this many characters have been typed
         self.autocompleteMaxLength = 15 # Remove window after this many characters have been typed
         self.autocompleteMode = None # None or Dictionary1 or Dictionary2 (or Bible or BibleBook)
         self.addAllNewWords = False
+        self.autocompleteSharingKey = None # Set if the words are shared with other windows (see shareBibleAutocompleteWords)
+        self.autocompleteBookUpdates = None # Saved books waiting for the (unshared) words to finish loading (see updateBibleBookAutocompleteWords)
 
         self.invalidCombinations = [] # characters or character combinations that shouldn't occur
         # Temporarily include some default invalid values
@@ -643,13 +646,13 @@ class TextEditWindow( ChildWindow ):
                 #print( "Handle autocorrect" )
                 previousText = getCharactersBeforeCursor( self, self.maxAutocorrectLength )
                 #print( "previousText", repr(previousText) )
-                for inChars,outChars in self.autocorrectEntries:
-                    if previousText.endswith( inChars ):
-                        #print( "Going to replace {!r} with {!r}".format( inChars, outChars ) )
-                        # Delete the typed character(s) and replace with the new one(s)
-                        self.textBox.delete( tk.INSERT+'-{}c'.format( len(inChars) ), tk.INSERT )
-                        self.textBox.insert( tk.INSERT, outChars )
-                        break
+                autocorrectEntry = findAutocorrectEntry( self.autocorrectTrie, previousText )
+                if autocorrectEntry is not None:
+                    inChars, outChars = autocorrectEntry
+                    #print( "Going to replace {!r} with {!r}".format( inChars, outChars ) )
+                    # Delete the typed character(s) and replace with the new one(s)
+                    self.textBox.delete( tk.INSERT+'-{}c'.format( len(inChars) ), tk.INSERT )
+                    self.textBox.insert( tk.INSERT, outChars )
             # end of auto-correct section
 
 
@@ -666,11 +669,7 @@ class TextEditWindow( ChildWindow ):
                     if len(self.existingAutocompleteWordText) >= self.autocompleteMinLength:
                         # See if we have any words that start with the already typed letters
                         #print( "Handle autocomplete1A with {!r}".format( self.existingAutocompleteWordText ) )
-                        firstLetter, remainder = self.existingAutocompleteWordText[0], self.existingAutocompleteWordText[1:]
-                        #print( "firstletter={!r} remainder={!r}".format( firstLetter, remainder ) )
-                        try: possibleWords = [firstLetter+thisBit for thisBit in self.autocompleteWords[firstLetter] \
-                                                            if thisBit.startswith(remainder) and thisBit != remainder]
-                        except KeyError: pass
+                        possibleWords = self.autocompleteWords.getCandidates( self.existingAutocompleteWordText )
                         self.autocompleteOverlap = self.existingAutocompleteWordText
                         #print( 'possibleWordsA', possibleWords )
 
@@ -678,13 +677,8 @@ class TextEditWindow( ChildWindow ):
                     if not possibleWords:
                         previousStuff = getCharactersAndWordBeforeCursor( self, self.autocompleteMaxLength )
                         #print( "Handle autocomplete1B with {!r}".format( previousStuff ) )
-                        firstLetter, remainder = previousStuff[0], previousStuff[1:]
-                        #print( "firstletter={!r} remainder={!r}".format( firstLetter, remainder ) )
-                        self.autocompleteOverlap = previousStuff
-                        #try: possibleWords = [thisBit[remainderLength:] for thisBit in self.autocompleteWords[firstLetter] \
-                        try: possibleWords = [firstLetter+thisBit for thisBit in self.autocompleteWords[firstLetter] \
-                                                            if thisBit.startswith(remainder) and thisBit != remainder]
-                        except KeyError: pass
+                        if previousStuff:
+                            possibleWords = self.autocompleteWords.getCandidates( previousStuff )
                         self.autocompleteOverlap = previousStuff
                         #print( 'possibleWordsB', possibleWords )
 
@@ -695,11 +689,10 @@ class TextEditWindow( ChildWindow ):
                         else: # the Listbox is already made -- just empty it
                             #print( 'empty listbox' )
                             self.autocompleteBox.delete( 0, tk.END ) # clear the listbox completely
-                        # Now fill the Listbox
+                        # Now fill the Listbox (in one call)
                         #print( 'fill listbox' )
-                        for word in possibleWords:
-                            if BibleOrgSysGlobals.debugFlag: assert possibleWords.count( word ) == 1
-                            self.autocompleteBox.insert( tk.END, word )
+                        if BibleOrgSysGlobals.debugFlag: assert len( set( possibleWords ) ) == len( possibleWords )
+                        self.autocompleteBox.insert( tk.END, *possibleWords )
                         # Do a bit more set-up
                         #self.autocompleteBox.pack( side=tk.LEFT, fill=tk.BOTH )
                         self.autocompleteBox.select_set( '0' )
@@ -764,10 +757,7 @@ class TextEditWindow( ChildWindow ):
         index = self.textBox.index( tk.INSERT )
         atLine, atColumn = index.split('.')
 
-        grandtotal = 0
-        for firstLetter in self.autocompleteWords:
-            print( "fL", firstLetter )
-            grandtotal += len( self.autocompleteWords[firstLetter] )
+        grandtotal = len( self.autocompleteWords )
 
         infoString = 'Current location:\n' \
             + '  Line, column: {}, {}\n'.format( atLine, atColumn ) \
@@ -1057,8 +1047,12 @@ class TextEditWindow( ChildWindow ):
             print( exp("TextEditWindow.setAllText( {!r} )").format( newText ) )
 
         self.textBox.configure( state=tk.NORMAL ) # In case it was disabled
-        self.textBox.delete( tkSTART, tk.END ) # Delete everything that's existing
-        self.textBox.insert( tk.END, newText )
+        self.textBox.clearVerseLines()
+        self.textBox.startBulkLoad() # No need to keep track of the changed lines for each insert
+        try:
+            self.textBox.delete( tkSTART, tk.END ) # Delete everything that's existing
+            self.textBox.insert( tk.END, newText )
+        finally: self.textBox.endBulkLoad()
         self.textBox.highlightAllPatterns( self.patternsToHighlight )
 
         self.textBox.mark_set( tk.INSERT, tkSTART ) # move insert point to top
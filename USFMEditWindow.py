@@ -28,7 +28,7 @@ xxx to allow editing of USFM Bibles using Python3 and Tkinter.
 
 from gettext import gettext as _
 
-LastModifiedDate = '2017-11-09' # by RJH
+LastModifiedDate = '2017-11-24' # by RJH
 ShortProgName = "USFMEditWindow"
 ProgName = "Biblelator USFM Edit Window"
 ProgVersion = '0.41'
@@ -38,7 +38,9 @@ ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), La
 debuggingThisModule = True
 
 import os.path, logging
+import threading, queue
 from collections import OrderedDict
+from bisect import bisect_right
 
 import tkinter as tk
 from tkinter.ttk import Style, Notebook, Frame, Label, Radiobutton
@@ -56,8 +58,13 @@ from ChildWindows import HTMLWindow
 from BibleResourceWindows import InternalBibleResourceWindowFunctions
 from BibleReferenceCollection import BibleReferenceCollectionWindow
 from TextEditWindow import TextEditWindow #, NO_TYPE_TIME
+from USFMTextChecker import USFMTextChecker
+from BookBuffer import BookBuffer
+from MappedBookFile import MappedBookFile
+from BookIndex import getBookIndexFilepath, makeBookIndex, loadBookIndex, getIndexedVerses, saveBookIndexInBackground
 from AutocompleteFunctions import loadBibleAutocompleteWords, loadBibleBookAutocompleteWords, \
-                                    loadHunspellAutocompleteWords, loadILEXAutocompleteWords
+                                    loadHunspellAutocompleteWords, loadILEXAutocompleteWords, \
+                                    updateBibleBookAutocompleteWords, releaseAutocompleteWords
 
 # BibleOrgSys imports
 import BibleOrgSysGlobals
@@ -65,6 +72,11 @@ from VerseReferences import SimpleVerseKey
 from USFMBible import findReplaceText
 
 
+TEXT_CHECK_DELAY = 150 # msecs without further edits before we display USFM problems
+TEXT_CHECK_POLL_TIME = 50 # msecs between looking for the results of a text check thread
+BOOK_LOAD_POLL_TIME = 50 # msecs between looking for the rest of a book being read by a thread
+QUICK_LOAD_VIEW_MODES = ( 'BeforeAndAfter', 'ByVerse', 'ByChapter', ) # Only display verses from one chapter
+
 
 def exp( messageString ):
     """
@@ -189,6 +201,10 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         self.editMode = DEFAULT
         self.editStatus = 'Editable'
         self.bookTextModified = False
+        self.textChecker = USFMTextChecker() # Needed as soon as the text box calls onTextChange
+        self.textCheckID = self.textCheckStopEvent = None # For scheduled or running checks of the whole text
+        self.needsFullTextCheck = self.includeFormattingInTextCheck = False
+        self.textProblemRange = None # Start and end indexes of the last invalid combination or pair problem found
         self.projectName = 'NoProjectName'
         self.projectAbbreviation = 'UNKNOWN'
         InternalBibleResourceWindowFunctions.__init__( self, parentApp, None, BIBLE_CONTEXT_VIEW_MODES[0], 'Unformatted' )
@@ -200,6 +216,15 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         self.windowType = 'USFMBibleEditWindow' # from 'PlainTextEditWindow'
         if editMode is not None: self.editMode = editMode
         self.verseCache = OrderedDict()
+        self.verseCacheIndices = self.verseCacheTexts = None # Positions and texts of the cache entries (made when first needed)
+        self.cachedBookText = None # The book text that the verse cache was made from (if we have it, for the saved index)
+        self.cachedNumLines = None # The number of lines that the verse cache was made from (if we can splice in edited chapters)
+        self.cachedChapterLineIndices, self.cachedChapterKeys = [], [] # Where each chapter starts in the cached book text and its verse keys
+        self.cachedVerseLineSpans = {} # The (startLineIndex,endLineIndex) in the cached book text for each verse key
+        self.bookFileChunkByteOffsets = None # Where each chapter starts in the book file (if it hasn't been saved since it was read)
+        self.bookLoadID = self.bookLoadQueue = None # For the rest of a book being read in the background
+        self.bookLoadChapter = None # The (BBB,intC) that was cached before the rest of the book was read
+        self.bookBufferArgs = None # What to fill the book buffer with once the rest of the book has been read
 
         #self.doToggleStatusBar( True ) # defaults to off in ChildWindow
 
@@ -234,34 +259,7 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
             self.textBox.configure( highlightbackground='orange' )
             self.textBox.configure( inactiveselectbackground='green' )
 
-        # Temporarily include some default invalid values
-        self.invalidCombinations = ['__',',,',' ,','..',' .',';;',' ;','!!',' !',
-                                    '"',
-                                    ' –','– ', ' —','— ',
-                                    '\\f*,','\\f*.','\\f*:','\\f*;','\\f*?','\\f*!',
-                                    '\\x*,','\\x*.','\\x* ',
-                                    ] # characters or character combinations that shouldn't occur
-
-        self.checkForPairs = [] # tuples with pairs of characters that should normally be together in the same verse
-                                # NOTE: don't include pairs (like quotes) that frequently occur across multiple verses
-                                #   i.e., are often NOT closed within the same line or verse.
-        # Temporarily include some pairs
-        self.checkForPairs.extend( ( ('(',')'), ('[',']'), ('_ ',' _'),) )
-        self.checkForPairs.extend( ( ('\\f ','\\f*'), ('\\x ','\\x*'), ('\\fe ','\\fe*'),) )
-        self.checkForPairs.extend( ( # Special text
-                                     ('\\add ','\\add*'), ('\\bk ','\\bk*'), ('\\dc ','\\dc*'),
-                                     ('\\k ','\\k*'), ('\\nd ','\\nd*'), ('\\ord ','\\ord*'),
-                                     ('\\pn ','\\pn*'), ('\\qt ','\\qt*'), ('\\sig ','\\sig*'),
-                                     ('\\sls ','\\sls*'), ('\\tl ','\\tl*'), ('\\wj ','\\wj*'),
-
-                                     # Character formatting
-                                     ('\\em ','\\em*'), ('\\bd ','\\bd*'), ('\\it ','\\it*'),
-                                     ('\\bdit ','\\bdit*'), ('\\no ','\\no*'), ('\\sc ','\\sc*'),
-
-                                     # Special features
-                                     ('\\fig ','\\fig*'), ('\\ndx ','\\ndx*'), ('\\pro ','\\pro*'),
-                                     ('\\w ','\\w*'), ('\\wg ','\\wg*'), ('\\wh ','\\wh*'),
-                                    ) )
+        self.setDefaultTextChecks()
 
         self.patternsToHighlight = []
         # Temporarily include some default values
@@ -270,6 +268,7 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         self.patternsToHighlight.append( (True,'\\\\s .*?\n','redBold',{'font':self.customFontBold, 'foreground':'red'}) ) # red section headings
         self.patternsToHighlight.append( (True,'\\\\r .*?\n','greenBold',{'font':self.customFontBold, 'foreground':'green'}) ) # green section references
         self.patternsToHighlight.append( (False,'XXX','redBack',{'background':'red'}) )
+        self.textBox.tag_configure( 'invalidCombination', underline=True, background='yellow' ) # Set by checkUSFMTextForProblems
         #boldDict = {'font':self.customFontBold } #, 'background':'green'}
         #for pythonKeyword in ( 'from','import', 'class','def', 'if','and','or','else','elif',
                               #'for','while', 'return', 'try','accept','finally', 'assert', ):
@@ -277,7 +276,8 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
 
         self.folderPath = self.filename = self.filepath = None
         self.lastBBB = None
-        self.bookTextBefore = self.bookText = self.bookTextAfter = None # The current text for this book
+        self.bookText = None # The text for this book (edits are only put into it from self.bookBuffer when it's saved)
+        self.bookBuffer = BookBuffer() # The undisplayed verses of the book around the displayed (edited) ones
         self.exportFolderPathname = None
 
         self.saveChangesAutomatically = True # different from AutoSave (which is in different files in different folders)
@@ -425,6 +425,7 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         gotoMenu.add_separator()
         gotoMenu.add_command( label=_('Next empty verse'), underline=5, command=self.doGotoNextEmptyVerse )
         gotoMenu.add_command( label=_('Next empty marker'), underline=11, command=self.doGotoNextEmptyMarker )
+        gotoMenu.add_command( label=_('USFM problem'), underline=0, command=self.doGotoTextProblem )
         gotoMenu.add_separator()
         gotoMenu.add_command( label=_('Previous list item'), underline=0, command=self.notWrittenYet )
         gotoMenu.add_command( label=_('Next list item'), underline=0, command=self.notWrittenYet )
@@ -548,6 +549,42 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
 
 
 
+    def setDefaultTextChecks( self ):
+        """
+        Set the default character combinations and pairs
+            that checkUSFMTextForProblems looks for.
+        """
+        # Temporarily include some default invalid values
+        self.invalidCombinations = ['__',',,',' ,','..',' .',';;',' ;','!!',' !',
+                                    '"',
+                                    ' –','– ', ' —','— ',
+                                    '\\f*,','\\f*.','\\f*:','\\f*;','\\f*?','\\f*!',
+                                    '\\x*,','\\x*.','\\x* ',
+                                    ] # characters or character combinations that shouldn't occur
+
+        self.checkForPairs = [] # tuples with pairs of characters that should normally be together in the same verse
+                                # NOTE: don't include pairs (like quotes) that frequently occur across multiple verses
+                                #   i.e., are often NOT closed within the same line or verse.
+        # Temporarily include some pairs
+        self.checkForPairs.extend( ( ('(',')'), ('[',']'), ('_ ',' _'),) )
+        self.checkForPairs.extend( ( ('\\f ','\\f*'), ('\\x ','\\x*'), ('\\fe ','\\fe*'),) )
+        self.checkForPairs.extend( ( # Special text
+                                     ('\\add ','\\add*'), ('\\bk ','\\bk*'), ('\\dc ','\\dc*'),
+                                     ('\\k ','\\k*'), ('\\nd ','\\nd*'), ('\\ord ','\\ord*'),
+                                     ('\\pn ','\\pn*'), ('\\qt ','\\qt*'), ('\\sig ','\\sig*'),
+                                     ('\\sls ','\\sls*'), ('\\tl ','\\tl*'), ('\\wj ','\\wj*'),
+
+                                     # Character formatting
+                                     ('\\em ','\\em*'), ('\\bd ','\\bd*'), ('\\it ','\\it*'),
+                                     ('\\bdit ','\\bdit*'), ('\\no ','\\no*'), ('\\sc ','\\sc*'),
+
+                                     # Special features
+                                     ('\\fig ','\\fig*'), ('\\ndx ','\\ndx*'), ('\\pro ','\\pro*'),
+                                     ('\\w ','\\w*'), ('\\wg ','\\wg*'), ('\\wh ','\\wh*'),
+                                    ) )
+    # end of USFMEditWindow.setDefaultTextChecks
+
+
     def prepareAutocomplete( self ):
         """
         """
@@ -558,6 +595,8 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
             self.parentApp.setDebugText( "prepareAutocomplete…" )
         self.parentApp.setWaitStatus( _("Preparing autocomplete words…") )
 
+        if self.autocompleteMode != 'Bible': releaseAutocompleteWords( self ) # Only the Bible words are shared
+
         # Choose ONE of the following options
         if self.autocompleteMode == 'Bible':
             loadBibleAutocompleteWords( self ) # Find words used in the Bible to fill the autocomplete mechanism
@@ -579,7 +618,10 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         Checks to see if they have moved to a new chapter/verse,
             and if so, informs the parent app.
         """
-        if self.loading: return # So we don't get called a million times for nothing
+        if self.loading: # So we don't get called a million times for nothing
+            self.cancelTextCheck()
+            self.textChecker.clear() # but the text will need to be checked again
+            return
         if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
             print( exp("USFMEditWindow.onTextChange( {}, {} )").format( repr(result), args ) )
 
@@ -637,7 +679,7 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
             self.bookTextModified = True
 
             # Check the text for USFM errors
-            try: self.checkUSFMTextForProblems()
+            try: self.scheduleTextCheck( editArgs=args )
             except KeyboardInterrupt:
                 print( "USFMEditWindow: Got keyboard interrupt (2) -- saving my file…" )
                 self.doSave() # Sometimes the above seems to lock up
@@ -647,19 +689,10 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
                     self.onTextNoChangeID = None
                 return
 
-        # Try to determine the CV mark
-        # It seems that we have to try various strategies because
-        #       sometimes we get a 'current' mark and sometimes an 'anchor1'
-        gotCV = False
-        # Try to put the most useful methods first (for efficiency)
-        for mark in (self.textBox.mark_previous(tk.INSERT), self.textBox.mark_previous(tk.INSERT+'-1c'),
-                    self.textBox.mark_previous(tk.INSERT+' linestart+1c'), self.textBox.mark_previous(tk.INSERT+' linestart'),):
-            if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                #print( "  mark", j, mark )
-                if mark is None: print( "    WHY is mark NONE?" )
-            if mark and mark[0]=='C' and mark[1].isdigit() and 'V' in mark:
-                gotCV = True; break
-        if gotCV and mark != self.lastCVMark:
+        # Determine the CV mark from the line that the cursor is on
+        #   (the text box keeps a sorted index of where each displayed verse starts)
+        mark = self.textBox.getVerseMarkName( tk.INSERT )
+        if mark is not None and mark != self.lastCVMark:
             self.lastCVMark = mark
             C, V = mark[1:].split( 'V', 1 )
             #self.parentApp.gotoGroupBCV( self._groupCode, self.currentVerseKey.getBBB(), C, V )
@@ -676,26 +709,158 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         #print( "USFMEditWindow.onTextNoChange" )
 
         # Check the text for formatting errors
-        try: self.checkUSFMTextForProblems( includeFormatting=True )
+        try: self.scheduleTextCheck( includeFormatting=True )
         except KeyboardInterrupt:
             print( "USFMEditWindow: Got keyboard interrupt (3) -- saving my file" )
             self.doSave() # Sometimes the above seems to lock up
     # end of USFMEditWindow.onTextNoChange
 
 
+    def updateTextChecker( self, editArgs ):
+        """
+        Check again just the lines that might have been changed by the edit
+            (from the arguments given to the CustomText callback).
+
+        Returns False if the whole text needs to be checked.
+        """
+        if not self.textChecker.isValid( self.invalidCombinations, self.checkForPairs ): return False
+        if editArgs[0] == 'mark': return True # Only the cursor has moved
+        if editArgs[0] == 'insert' and len(editArgs) > 2: numNewlines = ''.join( editArgs[2::2] ).count( '\n' )
+        elif editArgs[0] == 'replace' and len(editArgs) > 3: numNewlines = ''.join( editArgs[3::2] ).count( '\n' )
+        elif editArgs[0] == 'delete': numNewlines = 0
+        else: return False
+        try:
+            editLineNumber = int( self.textBox.index( editArgs[1] ).split( '.' )[0] )
+            cursorLineNumber = int( self.textBox.index( tk.INSERT ).split( '.' )[0] )
+            numLines = int( self.textBox.index( tk.END+'-1c' ).split( '.' )[0] )
+        except tk.TclError: return False # e.g., a selection that was deleted
+
+        # Both the edit position (now) and the cursor are in the edited lines
+        #   (and any autocorrect changes are at the cursor)
+        firstLineNumber = max( 1, min( editLineNumber, cursorLineNumber ) - numNewlines )
+        lastLineNumber = min( numLines, max( editLineNumber, cursorLineNumber ) + numNewlines )
+        oldLastLineNumber = lastLineNumber - ( numLines - len(self.textChecker) )
+        if oldLastLineNumber < firstLineNumber-1 or oldLastLineNumber > len(self.textChecker): return False
+        newText = self.textBox.get( '{}.0'.format( firstLineNumber ), '{}.0 lineend'.format( lastLineNumber ) )
+        self.textChecker.updateLines( firstLineNumber-1, oldLastLineNumber, newText.split( '\n' ) )
+        return True
+    # end of USFMEditWindow.updateTextChecker
+
+
+    def scheduleTextCheck( self, includeFormatting=False, editArgs=None ):
+        """
+        Called whenever the text (or just the cursor position) changes,
+            and also when the text box HASN'T CHANGED for NO_TYPE_TIME msecs.
+
+        If editArgs (from onTextChange) is given, the text checker is updated for the edited lines now,
+            but the problems are only displayed after there have been no more edits for TEXT_CHECK_DELAY msecs
+            so that fast typing doesn't keep redisplaying them.
+
+        If editArgs isn't given, the problems are just displayed again (e.g., with the formatting ones).
+
+        If the edit couldn't be located (or the text checker isn't up-to-date), all of the text is checked again,
+            but on a copy of the text in a separate thread so that the editor doesn't freeze.
+        """
+        #print( "USFMEditWindow.scheduleTextCheck", includeFormatting, editArgs )
+
+        if editArgs is None or editArgs[0] == 'mark': # The text hasn't changed
+            if self.textCheckStopEvent is not None: # Let the check that's running finish
+                if includeFormatting: self.includeFormattingInTextCheck = True
+                return
+        else: # The text has changed so any check that's scheduled or running is now out of date
+            self.cancelTextCheck()
+            if not self.updateTextChecker( editArgs ):
+                self.textChecker.clear()
+                self.needsFullTextCheck = True
+        if includeFormatting: self.includeFormattingInTextCheck = True
+
+        if self.textCheckID is not None: self.after_cancel( self.textCheckID )
+        self.textCheckID = self.after( TEXT_CHECK_DELAY, self.startTextCheck )
+    # end of USFMEditWindow.scheduleTextCheck
+
+
+    def startTextCheck( self ):
+        """
+        Called after there have been no edits for TEXT_CHECK_DELAY msecs.
+
+        Brings the highlighting up-to-date and displays any problems that the text checker already knows about,
+            then starts a thread to check a copy of the whole text if that's needed.
+        """
+        #print( "USFMEditWindow.startTextCheck", self.needsFullTextCheck, self.includeFormattingInTextCheck )
+        self.textCheckID = None
+        self.textBox.highlightAllPatterns( self.patternsToHighlight ) # Only does the edited lines
+        includeFormatting, self.includeFormattingInTextCheck = self.includeFormattingInTextCheck, False
+        if self.textChecker.isValid( self.invalidCombinations, self.checkForPairs ):
+            self.checkUSFMTextForProblems( includeFormatting )
+            if not self.needsFullTextCheck: return
+        self.needsFullTextCheck = False
+
+        self.textCheckStopEvent = threading.Event()
+        resultsQueue = queue.Queue()
+        threadArgs = ( self.getAllText(), tuple( self.invalidCombinations ), tuple( self.checkForPairs ),
+                                                            self.textCheckStopEvent, resultsQueue )
+        threading.Thread( target=self.textCheckThreadProducer, args=threadArgs, daemon=True ).start()
+        self.textCheckThreadConsumer( includeFormatting, resultsQueue )
+    # end of USFMEditWindow.startTextCheck
+
+
+    def textCheckThreadProducer( self, text, invalidCombinations, checkForPairs, stopEvent, resultsQueue ):
+        """
+        In a non-GUI parallel thread: check the copy of the text with a new text checker
+            and queue the checker (unless we were stopped first).
+        """
+        newTextChecker = USFMTextChecker()
+        if newTextChecker.setText( text, invalidCombinations, checkForPairs, stopEvent ):
+            resultsQueue.put( newTextChecker )
+    # end of USFMEditWindow.textCheckThreadProducer
+
+
+    def textCheckThreadConsumer( self, includeFormatting, resultsQueue ):
+        """
+        In the main GUI thread: watch the queue for the new text checker
+            then display any problems that it found.
+
+        This isn't called again if the check is cancelled.
+        """
+        try: newTextChecker = resultsQueue.get( block=False )
+        except queue.Empty:
+            self.textCheckID = self.after( TEXT_CHECK_POLL_TIME, self.textCheckThreadConsumer, includeFormatting, resultsQueue )
+            return
+        self.textCheckID = self.textCheckStopEvent = None
+        if self.includeFormattingInTextCheck: # It was asked for while we were checking
+            includeFormatting, self.includeFormattingInTextCheck = True, False
+        if newTextChecker.isValid( self.invalidCombinations, self.checkForPairs ): # The checks weren't changed meanwhile
+            self.textChecker = newTextChecker
+            self.checkUSFMTextForProblems( includeFormatting )
+    # end of USFMEditWindow.textCheckThreadConsumer
+
+
+    def cancelTextCheck( self ):
+        """
+        Cancel any scheduled check and stop any check that's running
+            (e.g., because the text has changed again or the window is closing).
+        """
+        if self.textCheckID is not None:
+            self.after_cancel( self.textCheckID )
+            self.textCheckID = None
+        if self.textCheckStopEvent is not None:
+            self.textCheckStopEvent.set()
+            self.textCheckStopEvent = None
+    # end of USFMEditWindow.cancelTextCheck
+
+
     def checkUSFMTextForProblems( self, includeFormatting=False ):
         """
-        Called whenever the text box HASN'T CHANGED for NO_TYPE_TIME msecs.
+        Displays the most important problem (if any) found by the text checker
+            (which must already be up-to-date with the text).
 
-        Checks for some types of formatting errors.
+        Checks for some types of formatting errors if includeFormatting is set.
         """
         #print( "USFMEditWindow.checkUSFMTextForProblems", includeFormatting )
 
-        editedText = self.getAllText()
-
         # Check counts of USFM chapter and verse markers
-        numChaps = editedText.count( '\\c ' )
-        numVerses = editedText.count( '\\v ' )
+        numChaps = self.textChecker.numChapterMarkers
+        numVerses = self.textChecker.numVerseMarkers
         BBB, C, V = self.currentVerseKey.getBCV()
         #intC, intV = newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
 
@@ -720,7 +885,7 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
             minVerseMarkers = maxVerseMarkers = 0 if C=='0' else self.getNumVerses( BBB, C )
         else: halt
 
-        errorMessage = warningMessage = suggestionMessage = None
+        errorMessage = warningMessage = suggestionMessage = self.textProblemRange = None
         if numChaps > maxChapterMarkers:
             errorMessage = _("Too many USFM chapter markers (max of {} expected)").format( maxChapterMarkers )
             #print( errorMessage )
@@ -733,56 +898,44 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         elif numVerses < minVerseMarkers:
             warningMessage = _("May have missing USFM verse markers (expected {}, found {})").format( maxVerseMarkers, numVerses )
             #print( warningMessage )
-        if '  ' in editedText:
+        if self.textChecker.hasMultipleSpaces():
             warningMessage = _("No good reason to have multiple spaces in a USFM book")
             #print( warningMessage )
-        elif includeFormatting and ' \n' in editedText:
+        elif includeFormatting and self.textChecker.hasTrailingSpace():
             suggestionMessage = _("No good reason to have a line ending with a space in a USFM book")
 
         if not errorMessage and not warningMessage: # and not suggestionMessage:
-            adjText = editedText
-            if adjText and adjText[-1] in ('\n','\r',): adjText = adjText[:-1] # Remove the final newline character
-            for line in adjText.split( '\n' ):
-                #print( "checkUSFMTextForProblems got line: {!r}".format( line ) )
-                if not line:
-                    warningMessage = _("No good reason to have a blank line in a USFM book")
-                if line:
-                    if line[0] == '\\':
-                        marker = line.split( None, 1)[0][1:] # First token, but without the first (backslash) character
-                        #print( "  Found marker: {!r}".format( marker ) )
-                        if marker not in BibleOrgSysGlobals.USFMMarkers:
-                            errorMessage = _("Not a recognized USFM marker {!r}").format( marker )
-                            break
-                    else:
-                        errorMessage = _("Line should start with backslash, not '{}{}'").format( line[:8], '…' if len(line)>8 else '' )
-                        break
+            errorMessage = self.textChecker.getFirstLineError()
+            if not errorMessage and self.textChecker.hasBlankLine():
+                warningMessage = _("No good reason to have a blank line in a USFM book")
 
         if not errorMessage and not warningMessage: # and not suggestionMessage:
-            for segment in self.invalidCombinations:
-                if segment in editedText:
-                    warningMessage = _("Found {!r} invalid character(s) in USFM text").format( segment ); break
+            invalidCombination = self.textChecker.getFirstInvalidCombination()
+            if invalidCombination is not None:
+                segment, lineIndex, column = invalidCombination
+                warningMessage = _("Found {!r} invalid character(s) in USFM text (line {})").format( segment, lineIndex+1 )
+                self.textProblemRange = '{}.{}'.format( lineIndex+1, column ), '{}.{}'.format( lineIndex+1, column+len(segment) )
 
         if not errorMessage and not warningMessage and not suggestionMessage:
-            for pairStart,pairEnd in self.checkForPairs:
-                if editedText.count( pairStart ) != editedText.count( pairEnd ):
-                    warningMessage = _("Counts of {!r} and {!r} differ in USFM text").format( pairStart, pairEnd ); break
-                # NOTE: Code below doesn't give error with ( ( ) -- that's why we have the counts above
-                ixl = -1
-                while True:
-                    ixl = editedText.find( pairStart, ixl+1 )
-                    if ixl == -1: break # none / no more found
-                    ixr = editedText.find( pairEnd, ixl+len(pairStart) )
-                    if ixr == -1: # no matching pair
-                        warningMessage = _("Found {!r} without matching {!r} in USFM text").format( pairStart, pairEnd ); break
-                if warningMessage: break # from outer loop
-                ixr = 99999 # Now work backwards
-                while True:
-                    ixr = editedText.rfind( pairEnd, 0, ixr )
-                    if ixr == -1: break
-                    ixl = editedText.rfind( pairStart, 0, ixr )
-                    if ixl == -1:
-                        warningMessage = _("Found {!r} without previous {!r} in USFM text").format( pairEnd, pairStart ); break
-                if warningMessage: break # from outer loop
+            pairProblem = self.textChecker.getFirstPairProblem()
+            if pairProblem is not None:
+                problem, pairStart, pairEnd, lineIndex, column = pairProblem
+                if problem == 'NoEnd':
+                    warningMessage = _("Found {!r} without matching {!r} in USFM text (line {})").format( pairStart, pairEnd, lineIndex+1 )
+                    problemLength = len( pairStart )
+                else:
+                    warningMessage = _("Found {!r} without previous {!r} in USFM text (line {})").format( pairEnd, pairStart, lineIndex+1 )
+                    problemLength = len( pairEnd )
+                self.textProblemRange = '{}.{}'.format( lineIndex+1, column ), '{}.{}'.format( lineIndex+1, column+problemLength )
+
+        changedLineRange = self.textChecker.takeChangedLineRange()
+        if changedLineRange is not None: # Only need to highlight the lines that were checked again
+            firstLineIndex, endLineIndex = changedLineRange
+            self.textBox.tag_remove( 'invalidCombination', '{}.0'.format( firstLineIndex+1 ), '{}.0'.format( endLineIndex+1 ) )
+            tagIndexes = []
+            for lineIndex, column, segment in self.textChecker.getInvalidCombinationPositions( firstLineIndex, endLineIndex ):
+                tagIndexes.extend( ('{}.{}'.format( lineIndex+1, column ), '{}.{}'.format( lineIndex+1, column+len(segment) )) )
+            if tagIndexes: self.textBox.tag_add( 'invalidCombination', *tagIndexes ) # Only one call into Tk
 
         haveOwnStatusBar = self._showStatusBarVar.get()
         if errorMessage:
@@ -830,9 +983,7 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         numVerses = text.count( '\\v ' )
         numSectionHeadings = text.count('\\s ')+text.count('\\s1 ')+text.count('\\s2 ')+text.count('\\s3 ')+text.count('\\s4 ')
 
-        grandtotal = 0
-        for firstLetter in self.autocompleteWords:
-            grandtotal += len( self.autocompleteWords[firstLetter] )
+        grandtotal = len( self.autocompleteWords )
 
         infoString = 'Current location:\n' \
             + '  BCV: {} {}:{}\n'.format( BBB, C, V ) \
@@ -855,16 +1006,21 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
     # end of USFMEditWindow.modified
 
 
-    def getBookDataFromDisk( self, BBB ):
+    def getBookDataFromDisk( self, BBB, displayedC=None ):
         """
         Fetches and returns the internal Bible data for the given book
-            by reading the USFM source file completely
+            by reading the USFM source file completely (memory-mapped)
             and returning the text.
+
+        If displayedC is given, only that chapter is decoded and cached now if possible
+            (see startBookLoad) and None is returned while the rest of the book is read in the background.
         """
         logging.debug( exp("USFMEditWindow.getBookDataFromDisk( {} ) was {} for {}").format( BBB, self.lastBBB, self.projectName ) )
         if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
             print( exp("USFMEditWindow.getBookDataFromDisk( {} ) was {} for {}").format( BBB, self.lastBBB, self.projectName ) )
 
+        self.finishBookLoad() # so the last book doesn't replace this one when it's been read
+        self.bookFileChunkByteOffsets = None
         if BBB != self.lastBBB:
             #self.bookText = None
             #self.bookTextModified = False
@@ -881,19 +1037,15 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
                 self.bookFilepath = os.path.join( self.internalBible.sourceFolder, self.bookFilename )
                 if self.setFilepath( self.bookFilepath ): # For title displays, etc.
                     #print( exp('gVD'), BBB, repr(self.bookFilepath), repr(self.internalBible.encoding) )
-                    bookText = open( self.bookFilepath, 'rt', encoding=self.internalBible.encoding ).read()
-                    if bookText == None:
-                        showError( self, APP_NAME, _("Couldn't decode and open file {} with encoding {}").format( self.bookFilepath, self.internalBible.encoding ) )
-                    elif bookText == '':
+                    bookIndex = self.getSavedBookIndex( BBB ) if displayedC is not None else None
+                    bookFile = MappedBookFile( self.bookFilepath, self.internalBible.encoding,
+                                                None if bookIndex is None else bookIndex.get( 'chunkByteOffsets' ) )
+                    self.bookFileChunkByteOffsets = bookFile.getChunkByteOffsets()
+                    if displayedC is not None and self.startBookLoad( BBB, displayedC, bookFile, bookIndex ): return None
+                    with bookFile: bookText = bookFile.getText() # Removes any BOM
+                    if bookText == '':
                         showWarning( self, APP_NAME, _("Seems that file {} with encoding {} is EMPTY").format( self.bookFilepath, self.internalBible.encoding ) )
-                    else:
-                        if bookText[0] == chr(65279): #U+FEFF
-                            logging.info( "getBookDataFromDisk: Detected Unicode (UTF-16) Byte Order Marker (BOM) in {}".format( self.bookFilepath ) )
-                            bookText = bookText[1:] # Remove the UTF-16 Unicode Byte Order Marker (BOM)
-                        elif bookText[:3] == 'ï»¿': # 0xEF,0xBB,0xBF
-                            logging.info( "getBookDataFromDisk: Detected Unicode (UTF-8) Byte Order Marker (BOM) in {}".format( self.bookFilepath ) )
-                            bookText = bookText[3:] # Remove the UTF-8 Unicode Byte Order Marker (BOM)
-                        # NOTE: We don't restore the BOM later
+                    # NOTE: We don't restore the BOM later
                     return bookText
             else:
                 showError( self, APP_NAME, _("Couldn't determine USFM filename for {!r} book").format( BBB ) )
@@ -901,7 +1053,7 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
     # end of USFMEditWindow.getBookDataFromDisk
 
 
-    def cacheBook( self, BBB, clearFirst=True ):
+    def cacheBook( self, BBB, clearFirst=True, onlyEditedVerses=False, chapterText=None, chaptersFollow=False ):
         """
         Puts the book data from self.bookText into the self.verseCache dictionary
             accessible by verse key.
@@ -911,41 +1063,66 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
 
         Normally clears the cache before starting,
             to prevent duplicate entries.
+
+        If onlyEditedVerses is set, only the chapters containing the displayed (and maybe edited) verses,
+            i.e., in the window of self.bookBuffer, are cached again from the cached verses around the window
+            and the window text, and spliced into the existing cache.
+            If that's not possible, self.bookText is made again from self.bookBuffer and the whole book is done.
+
+        If chapterText is given (the text of some whole chapters from the book file,
+            e.g., just the displayed ones while the rest of the book is still being read),
+            only it is cached (so the cache can't have edits spliced into it).
+            If chaptersFollow is set, it must end with the newline before the next chapter line.
         """
-        logging.debug( exp("USFMEditWindow.cacheBook( {}, {} ) for {}").format( BBB, clearFirst, self.projectName ) )
+        logging.debug( exp("USFMEditWindow.cacheBook( {}, {}, {} ) for {}").format( BBB, clearFirst, onlyEditedVerses, self.projectName ) )
         if BibleOrgSysGlobals.debugFlag:
-            print( exp("USFMEditWindow.cacheBook( {}, {} ) for {}").format( BBB, clearFirst, self.projectName ) )
+            print( exp("USFMEditWindow.cacheBook( {}, {}, {} ) for {}").format( BBB, clearFirst, onlyEditedVerses, self.projectName ) )
             assert isinstance( BBB, str )
+        if chapterText is None: self.finishBookLoad() # so the whole book is cached
 
         if clearFirst:
             if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( "  Clearing cache first!" )
-            self.verseCache = OrderedDict()
-
-        def addCacheEntry( BBB, C, V, data ):
+            newCache = OrderedDict()
+        else: newCache = self.verseCache
+        chapterLineIndices, chapterKeys = [], [] # Where each chapter starts in bookLines and the verse keys cached from it
+        verseLineSpans = {} # The lines in bookLines that each verse key was cached from
+        foundDuplicate = False
+        allLinesExact = True # The cached verses are exactly the lines that they were cached from
+
+        def addCacheEntry( BBB, C, V, data, startIndex, endIndex ):
             """
             Check for duplicates before
-                adding a new BCV entry to the book cache.
+                adding a new BCV entry (from bookLines startIndex up to endIndex) to the book cache.
             """
+            nonlocal foundDuplicate, allLinesExact
             #if debuggingThisModule: print( "addCacheEntry", BBB, C, V, data )
             assert BBB and C and V and data
             verseKeyHash = SimpleVerseKey( BBB, C, V ).makeHash()
-            if verseKeyHash in self.verseCache: # Oh, how come we already have this key???
-                if data == self.verseCache[verseKeyHash]:
+            if verseKeyHash in newCache: # Oh, how come we already have this key???
+                foundDuplicate = True
+                if data == newCache[verseKeyHash]:
                     logging.critical( "cacheBook: We have an identical duplicate {} {}: {!r}" \
                             .format( self.projectAbbreviation, verseKeyHash, data ) )
                 else:
                     logging.critical( "cacheBook: We have a duplicate {} {} -- already had {!r} and now appending {!r}" \
-                            .format( self.projectAbbreviation, verseKeyHash, self.verseCache[verseKeyHash], data ) )
-                    data = self.verseCache[verseKeyHash] + '\n' + data
-            self.verseCache[verseKeyHash] = data.replace( '\n\n', '\n' ) # Weed out blank lines
+                            .format( self.projectAbbreviation, verseKeyHash, newCache[verseKeyHash], data ) )
+                    data = newCache[verseKeyHash] + '\n' + data
+            else:
+                chapterKeys[-1].append( verseKeyHash )
+                verseLineSpans[verseKeyHash] = startIndex, endIndex
+            cacheData = data.replace( '\n\n', '\n' ) # Weed out blank lines
+            if cacheData != (data[:-1] if endIndex == numLines else data): # (The last line doesn't really end with a newline)
+                allLinesExact = False # so the cached verses aren't exactly the lines that they came from
+            newCache[verseKeyHash] = cacheData
         # end of USFMEditWindow.cacheBook.addCacheEntry
 
         def getMarkerText( blIndex ):
             """
-            Given an index to (nonlocal) bookLines,
+            Given a line index (into nonlocal bookLines after lineOffset),
                 get that line and break into 2-tuple (marker,text).
             """
-            gmtLine = bookLines[blIndex]
+            try: gmtLine = bookLines[blIndex-lineOffset]
+            except IndexError: return None, '' # Past the lines that we're caching
             #marker = text = None
             if gmtLine and gmtLine[0] == '\\':
                 try: marker, text = gmtLine[1:].split( None, 1 )
@@ -954,106 +1131,454 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
             return marker, text
         # end of USFMEditWindow.cacheBook.getMarkerText
 
-        # Main code for cacheBook
-        sectionHeadings = ( 's', 's1', 's2', 's3', 's4', )
-        C = V = '0' # So id line starts at 0:0
-        startedVerseEarly = False
-        currentEntry = ''
-        bookLines = self.bookText.split( '\n' )
-        numLines = len( bookLines )
-        for j in range( 0, numLines): # Do it this way to make it easy to look-ahead
-            line = bookLines[j]
-            marker, text = getMarkerText( j )
-            #print( "cacheBook line", repr(marker), repr(text) )
-
-            if marker in ( 'c', 'C' ):
-                newC = ''
-                for char in line[3:]: # Get chapter number digits
-                    if char.isdigit(): newC += char
-                    else: break
-                if newC:
-                    if currentEntry:
-                        addCacheEntry( BBB, C, V, currentEntry )
-                        currentEntry = ''
-                    C, V = newC, '0'
-            elif marker in sectionHeadings:
-                if j<numLines-2:
-                    marker1, text1 = getMarkerText( j+1 )
-                    if marker1 in ('r','sr','mr',):
-                        marker2, text2 = getMarkerText( j+2 )
-                        if marker2 in BibleOrgSysGlobals.USFMParagraphMarkers and not text2:
-                            marker3, text3 = getMarkerText( j+3 )
-                            if marker3 in ( 'v', 'V' ):
-                                # Start a new verse entry here if we have a section heading, cross-reference, empty paragraph marker, then the next verse
+        def cacheLines( startIndex, endIndex ):
+            """
+            Cache the (nonlocal) bookLines from startIndex up to (but not including) endIndex,
+                where startIndex is the start of the book or of a chapter
+                (as is endIndex if it's not the end of the book).
+
+            Returns True if the last verse was started early (so endIndex wasn't a clean place to stop).
+            """
+            sectionHeadings = ( 's', 's1', 's2', 's3', 's4', )
+            C = V = '0' # So id line starts at 0:0
+            startedVerseEarly = False
+            currentEntry, entryStartIndex = '', startIndex
+            chapterLineIndices.append( startIndex ); chapterKeys.append( [] )
+            for j in range( startIndex, endIndex ): # Do it this way to make it easy to look-ahead
+                line = bookLines[j-lineOffset]
+                marker, text = getMarkerText( j )
+                #print( "cacheBook line", repr(marker), repr(text) )
+
+                if marker in ( 'c', 'C' ):
+                    newC = ''
+                    for char in line[3:]: # Get chapter number digits
+                        if char.isdigit(): newC += char
+                        else: break
+                    if newC:
+                        if currentEntry:
+                            addCacheEntry( BBB, C, V, currentEntry, entryStartIndex, j )
+                            currentEntry = ''
+                        C, V = newC, '0'
+                        if j > startIndex and not startedVerseEarly: # We can start caching again from here
+                            chapterLineIndices.append( j ); chapterKeys.append( [] )
+                elif marker in sectionHeadings:
+                    if j<numLines-2:
+                        marker1, text1 = getMarkerText( j+1 )
+                        if marker1 in ('r','sr','mr',):
+                            marker2, text2 = getMarkerText( j+2 )
+                            if marker2 in BibleOrgSysGlobals.USFMParagraphMarkers and not text2:
+                                marker3, text3 = getMarkerText( j+3 )
+                                if marker3 in ( 'v', 'V' ):
+                                    # Start a new verse entry here if we have a section heading, cross-reference, empty paragraph marker, then the next verse
+                                    if currentEntry: # Save the previous CV entry
+                                        addCacheEntry( BBB, C, V, currentEntry, entryStartIndex, j )
+                                        currentEntry = ''
+                                        startedVerseEarly = True
+                        elif marker1 in ( 'v', 'V' ): # There's actually a missing paragraph marker but nevermind
+                            # Start a new verse entry here if we have a section heading, missing paragraph marker, then the next verse
+                            if currentEntry: # Save the previous CV entry
+                                addCacheEntry( BBB, C, V, currentEntry, entryStartIndex, j )
+                                currentEntry = ''
+                                startedVerseEarly = True
+                        elif marker1 in BibleOrgSysGlobals.USFMParagraphMarkers and not text1:
+                            marker2, text2 = getMarkerText( j+2 )
+                            if marker2 in ( 'v', 'V' ):
+                                # Start a new verse entry here if we have a section heading, empty paragraph marker, then the next verse
                                 if currentEntry: # Save the previous CV entry
-                                    addCacheEntry( BBB, C, V, currentEntry )
+                                    addCacheEntry( BBB, C, V, currentEntry, entryStartIndex, j )
                                     currentEntry = ''
                                     startedVerseEarly = True
-                    elif marker1 in ( 'v', 'V' ): # There's actually a missing paragraph marker but nevermind
-                        # Start a new verse entry here if we have a section heading, missing paragraph marker, then the next verse
-                        if currentEntry: # Save the previous CV entry
-                            addCacheEntry( BBB, C, V, currentEntry )
+                elif marker in ( 'v', 'V' ):
+                    newV = ''
+                    for char in line[3:]:
+                        if char.isdigit(): newV += char
+                        else: break
+                    if newV:
+                        if currentEntry and not startedVerseEarly:
+                            addCacheEntry( BBB, C, V, currentEntry, entryStartIndex, j )
                             currentEntry = ''
-                            startedVerseEarly = True
-                    elif marker1 in BibleOrgSysGlobals.USFMParagraphMarkers and not text1:
-                        marker2, text2 = getMarkerText( j+2 )
-                        if marker2 in ( 'v', 'V' ):
-                            # Start a new verse entry here if we have a section heading, empty paragraph marker, then the next verse
-                            if currentEntry: # Save the previous CV entry
-                                addCacheEntry( BBB, C, V, currentEntry )
+                        V = newV
+                        startedVerseEarly = False
+                elif marker in BibleOrgSysGlobals.USFMParagraphMarkers and not text and not startedVerseEarly: # already
+                    if j<numLines-1:
+                        marker1, text1 = getMarkerText( j+1 )
+                        if marker1 in ( 'v', 'V' ):
+                            # We want to move this empty paragraph marker into the next verse
+                            if currentEntry:
+                                addCacheEntry( BBB, C, V, currentEntry, entryStartIndex, j )
                                 currentEntry = ''
                                 startedVerseEarly = True
-            elif marker in ( 'v', 'V' ):
-                newV = ''
-                for char in line[3:]:
-                    if char.isdigit(): newV += char
-                    else: break
-                if newV:
-                    if currentEntry and not startedVerseEarly:
-                        addCacheEntry( BBB, C, V, currentEntry )
+                elif C=='0' and line.startswith( '\\' ):
+                    if currentEntry: # Should only happen if the file has blank lines before any chapter markers
+                        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+                            print( "cE", currentEntry )
+                            # NOTE: This can fail if there's a line in the file NOT beginning with a USFM
+                            #   i.e., a continuation line
+                            assert currentEntry == '\n' # Warn programmer if it's anything different
+                        addCacheEntry( BBB, C, V, currentEntry, entryStartIndex, j ) # Will give a duplicate entry error adding to newline
                         currentEntry = ''
-                    V = newV
-                    startedVerseEarly = False
-            elif marker in BibleOrgSysGlobals.USFMParagraphMarkers and not text and not startedVerseEarly: # already
-                if j<numLines-1:
-                    marker1, text1 = getMarkerText( j+1 )
-                    if marker1 in ( 'v', 'V' ):
-                        # We want to move this empty paragraph marker into the next verse
-                        if currentEntry:
-                            addCacheEntry( BBB, C, V, currentEntry )
-                            currentEntry = ''
-                            startedVerseEarly = True
-            elif C=='0' and line.startswith( '\\' ):
-                if currentEntry: # Should only happen if the file has blank lines before any chapter markers
-                    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                        print( "cE", currentEntry )
-                        # NOTE: This can fail if there's a line in the file NOT beginning with a USFM
-                        #   i.e., a continuation line
-                        assert currentEntry == '\n' # Warn programmer if it's anything different
-                    addCacheEntry( BBB, C, V, currentEntry ) # Will give a duplicate entry error adding to newline
-                    currentEntry = ''
-                addCacheEntry( BBB, C, V, line + '\n' )
-                V = str( int(V) + 1 )
-                continue # Don't save current entry in next line
-            currentEntry += line + '\n'
-        if currentEntry: # cache the final verse
-            addCacheEntry( BBB, C, V, currentEntry )
+                    addCacheEntry( BBB, C, V, line + '\n', j, j+1 )
+                    V = str( int(V) + 1 )
+                    continue # Don't save current entry in next line
+                if not currentEntry: entryStartIndex = j
+                currentEntry += line + '\n'
+            if currentEntry: # cache the final verse
+                addCacheEntry( BBB, C, V, currentEntry, entryStartIndex, endIndex )
+            return startedVerseEarly
+        # end of USFMEditWindow.cacheBook.cacheLines
+
+        def getEditedLines( windowStartIndex, windowEndIndex ):
+            """
+            Put the lines of the chapters around the window of self.bookBuffer back together
+                from the cached verses either side of the window and the (edited) window text,
+                where the window was filled from the lines windowStartIndex up to windowEndIndex.
+
+            Returns the first and last chapter indices and their (edited) lines
+                or None if the cached verses don't fit exactly around the window.
+            """
+            oldLineIndices, oldNumLines = self.cachedChapterLineIndices, self.cachedNumLines
+            firstChapter = bisect_right( oldLineIndices, windowStartIndex ) - 1
+            if firstChapter > 0 and oldLineIndices[firstChapter] == windowStartIndex:
+                firstChapter -= 1 # The chapter line itself might have been edited
+            lastChapter = bisect_right( oldLineIndices, min( windowEndIndex, oldNumLines-1 ) ) - 1 # The window might not end with a newline
+            chaptersEndIndex = oldLineIndices[lastChapter+1] if lastChapter+1 < len(oldLineIndices) else oldNumLines
+            textsBefore, textsAfter = [], []
+            nextBeforeIndex, nextAfterIndex = oldLineIndices[firstChapter], windowEndIndex
+            for verseKeyHash in ( verseKeyHash for keys in self.cachedChapterKeys[firstChapter:lastChapter+1] for verseKeyHash in keys ):
+                startIndex, endIndex = self.cachedVerseLineSpans[verseKeyHash]
+                if endIndex <= windowStartIndex:
+                    if startIndex != nextBeforeIndex: return None
+                    textsBefore.append( self.verseCache[verseKeyHash] )
+                    nextBeforeIndex = endIndex
+                elif startIndex >= windowEndIndex:
+                    if startIndex != nextAfterIndex: return None
+                    textsAfter.append( self.verseCache[verseKeyHash] )
+                    nextAfterIndex = endIndex
+                elif startIndex < windowStartIndex or endIndex > windowEndIndex: return None # Verse is only partly in the window
+            if nextBeforeIndex != windowStartIndex or nextAfterIndex != chaptersEndIndex: return None
+
+            editedLines = ( ''.join( textsBefore ) + self.bookBuffer.getWindowText() + ''.join( textsAfter ) ).split( '\n' )
+            if chaptersEndIndex < oldNumLines: # The next chapter has to start on a new line
+                if editedLines[-1]: return None
+                editedLines.pop()
+            return firstChapter, lastChapter, editedLines
+        # end of USFMEditWindow.cacheBook.getEditedLines
+
+        # Main code for cacheBook
+        lineOffset = 0 # The line index of bookLines[0]
+        firstChapter = None # Index into self.cachedChapterLineIndices if we only need to cache some chapters again
+        windowLineSpan = self.bookBuffer.getWindowLineSpan() if onlyEditedVerses and clearFirst and self.cachedNumLines is not None else None
+        if windowLineSpan is not None:
+            # Only the lines in the window of the book buffer can have changed since we last cached the book
+            #   so we don't need to join the whole book together
+            editedChapters = getEditedLines( *windowLineSpan )
+            if editedChapters is not None:
+                firstChapter, lastChapter, bookLines = editedChapters
+                oldLineIndices = self.cachedChapterLineIndices
+                lineOffset = oldLineIndices[firstChapter]
+                oldEndIndex = oldLineIndices[lastChapter+1] if lastChapter+1 < len(oldLineIndices) else self.cachedNumLines
+                lineShift = len(bookLines) - (oldEndIndex - lineOffset)
+                numLines = self.cachedNumLines + lineShift
+
+        if chapterText is not None: # Only cache these chapters for now
+            bookLines = chapterText.split( '\n' )
+            if chaptersFollow: bookLines.pop() # The next line is the next chapter line
+            numLines = len( bookLines ) + ( 1 if chaptersFollow else 0 ) # so the look-ahead goes past the last line like it does in the whole book
+            cacheLines( 0, len(bookLines) )
+        elif firstChapter is None:
+            if onlyEditedVerses: # Need to join the whole book together
+                self.bookText = self.bookBuffer.getText()
+                self.bookBuffer.setWindowLineSpan( None ) # as the window lines might be cached differently now
+            bookLines = self.bookText.split( '\n' )
+            numLines = len( bookLines )
+            cacheLines( 0, numLines )
+        else:
+            if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+                print( "  Only caching chapter lines {}-{} again".format( firstChapter, lastChapter ) )
+            # Keep the unchanged chapters before the edits
+            for verseKeyHash in ( verseKeyHash for keys in self.cachedChapterKeys[:firstChapter] for verseKeyHash in keys ):
+                newCache[verseKeyHash] = self.verseCache[verseKeyHash]
+                verseLineSpans[verseKeyHash] = self.cachedVerseLineSpans[verseKeyHash]
+            chapterLineIndices.extend( oldLineIndices[:firstChapter] ); chapterKeys.extend( self.cachedChapterKeys[:firstChapter] )
+            # Cache the edited chapters again
+            if cacheLines( lineOffset, lineOffset + len(bookLines) ): foundDuplicate = True # Can't splice on the old entries
+            # Keep the unchanged chapters after the edits
+            for verseKeyHash in ( verseKeyHash for keys in self.cachedChapterKeys[lastChapter+1:] for verseKeyHash in keys ):
+                if verseKeyHash in newCache: foundDuplicate = True
+                else:
+                    newCache[verseKeyHash] = self.verseCache[verseKeyHash]
+                    startIndex, endIndex = self.cachedVerseLineSpans[verseKeyHash]
+                    verseLineSpans[verseKeyHash] = startIndex + lineShift, endIndex + lineShift
+            chapterLineIndices.extend( lineIndex + lineShift for lineIndex in oldLineIndices[lastChapter+1:] )
+            chapterKeys.extend( self.cachedChapterKeys[lastChapter+1:] )
+            if foundDuplicate: # We can't be sure that we've combined the entries the same way
+                self.cachedNumLines = None
+                self.bookText = self.bookBuffer.getText()
+                self.bookBuffer.setWindowLineSpan( None )
+                self.cacheBook( BBB ) # so do the whole book
+                return
+
+            # Remember which lines are now in the window (if it still ends at the end of a line)
+            windowStartIndex, windowEndIndex = windowLineSpan
+            windowText = self.bookBuffer.getWindowText()
+            if windowEndIndex == oldEndIndex: self.bookBuffer.setWindowLineSpan( (windowStartIndex, lineOffset + len(bookLines)) )
+            elif windowText.endswith( '\n' ): self.bookBuffer.setWindowLineSpan( (windowStartIndex, windowStartIndex + windowText.count( '\n' )) )
+            else: self.bookBuffer.setWindowLineSpan( None )
+
+        self.verseCache = newCache
+        self.verseCacheIndices = self.verseCacheTexts = None # Need to be made again from the new cache
+        # Remember how the cache was made (if we'll be able to splice new entries into it)
+        wholeBook = clearFirst and not foundDuplicate and chapterText is None
+        self.cachedBookText = self.bookText if wholeBook and firstChapter is None else None
+        self.cachedNumLines = numLines if wholeBook and allLinesExact else None
+        self.cachedChapterLineIndices, self.cachedChapterKeys = chapterLineIndices, chapterKeys
+        self.cachedVerseLineSpans = verseLineSpans
         #from itertools import islice
         #print( "USFMEditWindow.cacheBook", BBB, "verseCache:", list( islice( self.verseCache, 0, 20 ) ) )
     # end of USFMEditWindow.cacheBook
 
 
+    def getSavedBookIndex( self, BBB ):
+        """
+        Returns the saved index for the book file if it's up-to-date, otherwise None.
+        """
+        if not self.filepath: return None
+        return loadBookIndex( getBookIndexFilepath( self.parentApp.homeFolderPath, self.filepath ),
+                                        BBB, self.lastFiletime, self.lastFilesize )
+    # end of USFMEditWindow.getSavedBookIndex
+
+
+    def cacheBookFromIndex( self, BBB, indexedVerses=None ):
+        """
+        Puts the book data from self.bookText (just read from disk) into the self.verseCache dictionary
+            using the saved spans of each verse
+            (without having to parse all the lines again in cacheBook).
+
+        indexedVerses is what getIndexedVerses returned if that's already been done (e.g., in a worker thread).
+
+        Returns False if there's no up-to-date index for the book file (and nothing is changed).
+        """
+        logging.debug( exp("USFMEditWindow.cacheBookFromIndex( {} ) for {}").format( BBB, self.projectName ) )
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("USFMEditWindow.cacheBookFromIndex( {} ) for {}").format( BBB, self.projectName ) )
+
+        if indexedVerses is None:
+            bookIndex = self.getSavedBookIndex( BBB )
+            if bookIndex is None: return False
+            indexedVerses = getIndexedVerses( bookIndex, self.bookText )
+            if indexedVerses is None: return False
+
+        self.verseCache, self.cachedChapterLineIndices, self.cachedChapterKeys, self.cachedVerseLineSpans, self.cachedNumLines = indexedVerses
+        self.verseCacheIndices = self.verseCacheTexts = None # Need to be made again from the new cache
+        self.cachedBookText = self.bookText
+        return True
+    # end of USFMEditWindow.cacheBookFromIndex
+
+
+    def saveBookIndex( self, BBB ):
+        """
+        Save the line spans of the verses in the book file (in the background)
+            so that cacheBookFromIndex can use them next time the book is opened.
+
+        Only done if self.verseCache was made from exactly what's in the file, i.e.,
+            just after reading it (with cacheBook) or saving it.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("USFMEditWindow.saveBookIndex( {} ) for {}").format( BBB, self.projectName ) )
+
+        if self.filepath and self.cachedBookText is not None and self.cachedBookText == self.bookText:
+            bookIndex = makeBookIndex( BBB, self.lastFiletime, self.lastFilesize, self.bookText,
+                            self.cachedChapterLineIndices, self.cachedChapterKeys, self.cachedVerseLineSpans,
+                            self.bookFileChunkByteOffsets )
+            saveBookIndexInBackground( getBookIndexFilepath( self.parentApp.homeFolderPath, self.filepath ), bookIndex )
+    # end of USFMEditWindow.saveBookIndex
+
+
+    def cacheLoadedBook( self, BBB, indexedVerses=None ):
+        """
+        Cache the book that was just read from disk into self.bookText,
+            using the saved index if it's up-to-date (or indexedVerses if they've already been got from it),
+            otherwise parsing the lines (and then saving a new index).
+        """
+        if not self.cacheBookFromIndex( BBB, indexedVerses ):
+            self.cacheBook( BBB )
+            self.saveBookIndex( BBB )
+    # end of USFMEditWindow.cacheLoadedBook
+
+
+    def startBookLoad( self, BBB, C, bookFile, bookIndex=None ):
+        """
+        Decode and cache just chapter C from the (memory-mapped) bookFile so it can be displayed straight away,
+            then start a thread to read the rest of the book (and close the file)
+            and get its verses from the saved bookIndex (if it's up-to-date).
+
+        Returns False (and does nothing) if the chapter can't be found by itself in the file.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("USFMEditWindow.startBookLoad( {}, {} ) for {}").format( BBB, C, self.projectName ) )
+
+        try: intC = int( C )
+        except ValueError: return False
+        chunkIndex = bookFile.findChapterChunk( intC )
+        if chunkIndex is None or bookFile.getNumChunks() < 2: return False # May as well read the whole book
+        try: chapterText = bookFile.getChunkText( chunkIndex )
+        except UnicodeDecodeError: return False # Let getBookDataFromDisk fail in the usual way
+
+        self.bookText = None
+        self.cacheBook( BBB, chapterText=chapterText, chaptersFollow=chunkIndex+1 < bookFile.getNumChunks() )
+        self.bookLoadChapter = BBB, intC
+        self.bookLoadQueue = queue.Queue()
+        threading.Thread( target=self.bookLoadThreadProducer, args=( BBB, bookFile, bookIndex, self.bookLoadQueue ), daemon=True ).start()
+        self.bookLoadThreadConsumer( self.bookLoadQueue )
+        return True
+    # end of USFMEditWindow.startBookLoad
+
+
+    def bookLoadThreadProducer( self, BBB, bookFile, bookIndex, resultsQueue ):
+        """
+        In a non-GUI parallel thread: decode the rest of the book file, close it,
+            and get the verses from the bookIndex (if there is one),
+            then queue the text (or the exception if it couldn't be read) and the verses.
+        """
+        try: result = bookFile.getText()
+        except Exception as err: result = err # so the GUI thread isn't left waiting
+        finally: bookFile.close()
+        indexedVerses = getIndexedVerses( bookIndex, result ) if bookIndex is not None and isinstance( result, str ) else None
+        resultsQueue.put( (BBB, result, indexedVerses) )
+    # end of USFMEditWindow.bookLoadThreadProducer
+
+
+    def bookLoadThreadConsumer( self, resultsQueue ):
+        """
+        In the main GUI thread: watch the queue for the rest of the book
+            then cache it (see finishBookLoad).
+        """
+        try: BBB, result, indexedVerses = resultsQueue.get( block=False )
+        except queue.Empty:
+            self.bookLoadID = self.after( BOOK_LOAD_POLL_TIME, self.bookLoadThreadConsumer, resultsQueue )
+            return
+        self.bookLoadID = None
+        self.cacheBackgroundBook( BBB, result, indexedVerses )
+    # end of USFMEditWindow.bookLoadThreadConsumer
+
+
+    def finishBookLoad( self ):
+        """
+        If the rest of the book is still being read in the background,
+            wait for it and cache it now (e.g., because the whole book is needed).
+        """
+        if self.bookLoadQueue is None: return
+        if self.bookLoadID is not None:
+            self.after_cancel( self.bookLoadID )
+            self.bookLoadID = None
+        self.cacheBackgroundBook( *self.bookLoadQueue.get() )
+    # end of USFMEditWindow.finishBookLoad
+
+
+    def cacheBackgroundBook( self, BBB, result, indexedVerses ):
+        """
+        Cache the whole book text (result) that was read in the background
+            (using the indexedVerses if they were got from the saved index)
+            and then fill the book buffer around the displayed verses.
+
+        If the book couldn't be read, editing is disabled (so that the book file can't be overwritten
+            with just the displayed chapter).
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("USFMEditWindow.cacheBackgroundBook( {} ) for {}").format( BBB, self.projectName ) )
+
+        self.bookLoadQueue = None
+        bookBufferArgs, self.bookBufferArgs = self.bookBufferArgs, None
+        if isinstance( result, Exception ):
+            logging.error( exp("USFMEditWindow.cacheBackgroundBook: Couldn't read {}: {}").format( self.bookFilepath, result ) )
+            showError( self, APP_NAME, _("Couldn't decode and open file {} with encoding {}").format( self.bookFilepath, self.internalBible.encoding ) )
+            self.textBox.edit_modified( tk.FALSE ) # clear Tkinter modified flag
+            self.bookTextModified = False
+            self.textBox.configure( state=tk.DISABLED ) # Don't allow editing
+            self.editStatus = 'DISABLED'
+            self.refreshTitle()
+            return
+        self.bookText = result
+        self.cacheLoadedBook( BBB, indexedVerses )
+        if bookBufferArgs is not None: self.fillBookBuffer( *bookBufferArgs )
+    # end of USFMEditWindow.cacheBackgroundBook
+
+
     def getCachedVerseData( self, verseKey ):
         """
         Returns the requested verse from our cache if it's there,
             otherwise returns None.
+
+        Waits for the rest of the book if it's still being read (and the verse isn't in the chapter already cached).
         """
         #if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( exp("getCachedVerseData( {} )").format( verseKey ) )
         try: return self.verseCache[verseKey.makeHash()]
-        except KeyError: return None
+        except KeyError:
+            if self.bookLoadQueue is None \
+            or ( verseKey.getBBB(), verseKey.getChapterNumberInt() ) == self.bookLoadChapter: return None
+        self.finishBookLoad() # It might be in the part of the book that's still being read
+        return self.verseCache.get( verseKey.makeHash() )
     # end of USFMEditWindow.getCachedVerseData
 
 
+    def getVerseCacheIndex( self, verseKey ):
+        """
+        Returns the position of the verse in our (ordered) cache if it's there,
+            otherwise returns None.
+
+        The positions (and a list of the cached texts in the same order)
+            are only made once each time the book is cached.
+        """
+        if self.verseCacheIndices is None:
+            self.verseCacheIndices = { verseKeyHash:j for j,verseKeyHash in enumerate( self.verseCache ) }
+            self.verseCacheTexts = list( self.verseCache.values() )
+        return self.verseCacheIndices.get( verseKey.makeHash() )
+    # end of USFMEditWindow.getVerseCacheIndex
+
+
+    def fillBookBuffer( self, BBB, startCV, endCV, displayedVerseKeys ):
+        """
+        Put the cached verses before startCV and after endCV (both (intC,intV) tuples)
+            into self.bookBuffer around the window for displayedVerseKeys.
+
+        If the displayed verses are together in the cache, we can just slice the cache
+            either side of them without going through every verse of the book,
+            otherwise (e.g., they're missing or out of order) we go through the book
+            in versification order like the displayed verses were.
+
+        If the rest of the book is still being read, this is done once it's been cached.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("fillBookBuffer( {}, {}, {}, {} )").format( BBB, startCV, endCV, len(displayedVerseKeys) ) )
+
+        if self.bookLoadQueue is not None: # Wait until the whole book has been cached
+            self.bookBufferArgs = BBB, startCV, endCV, displayedVerseKeys
+            return
+        cacheIndices, verseKeyHashes = [], []
+        for verseKey in displayedVerseKeys:
+            cacheIndex = self.getVerseCacheIndex( verseKey )
+            if cacheIndex is not None: cacheIndices.append( cacheIndex ); verseKeyHashes.append( verseKey.makeHash() )
+        if cacheIndices and cacheIndices == list( range( cacheIndices[0], cacheIndices[0]+len(cacheIndices) ) ):
+            windowLineSpan = ( self.cachedVerseLineSpans[verseKeyHashes[0]][0], self.cachedVerseLineSpans[verseKeyHashes[-1]][1] ) \
+                                if self.cachedNumLines is not None else None # so cacheBook can splice in the edited window text
+            self.bookBuffer.setVersesAround( self.verseCacheTexts[:cacheIndices[0]], self.verseCacheTexts[cacheIndices[-1]+1:], windowLineSpan )
+            return
+
+        self.bookBuffer.clear()
+        numChaps = self.getNumChapters( BBB )
+        if numChaps is None: numChaps = 0
+        for thisC in range( 0, numChaps+1 ):
+            try: numVerses = self.getNumVerses( BBB, thisC )
+            except KeyError: numVerses = 0
+            for thisV in range( 0, numVerses+1 ):
+                if (thisC,thisV) < startCV:
+                    self.bookBuffer.appendVerseBefore( self.getCachedVerseData( SimpleVerseKey( BBB, thisC, thisV ) ) )
+                elif (thisC,thisV) > endCV:
+                    self.bookBuffer.appendVerseAfter( self.getCachedVerseData( SimpleVerseKey( BBB, thisC, thisV ) ) )
+        self.bookBuffer.startWindow() # in case there were no verses after it
+    # end of USFMEditWindow.fillBookBuffer
+
+
     def emptyVerseMatch( self, stringToSearch ):
         """
         Goes through all chapters, verses, and books
@@ -1138,7 +1663,7 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
                     self.maxVersesThisChapter = self.getNumVerses( BBB, intC )
                     self.bookText = self.getBookDataFromDisk( BBB )
                     if self.bookText is not None:
-                        self.cacheBook( BBB )
+                        self.cacheLoadedBook( BBB )
             #print( "    doGotoNextEmptySomething going to {} {}:{}".format( BBB, intC, intV ) )
             cachedVerseData = self.getCachedVerseData( SimpleVerseKey( BBB, intC, intV ) )
             if cachedVerseData is None: # Could be end of books OR INSIDE A VERSE BRIDGE
@@ -1185,6 +1710,25 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
     # end of Application.doGotoNextEmptyMarker
 
 
+    def doGotoTextProblem( self, event=None ):
+        """
+        Go to (and select) the invalid combination or the unmatched start or end of a pair
+            that was found by the last check of the USFM text.
+        """
+        self.parentApp.logUsage( ProgName, debuggingThisModule, 'USFMEditWindow doGotoTextProblem' )
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("doGotoTextProblem() {}").format( self.textProblemRange ) )
+
+        if self.textProblemRange is None: errorBeep(); return
+        startIndex, endIndex = self.textProblemRange
+        self.textBox.mark_set( tk.INSERT, startIndex )
+        self.textBox.tag_remove( tk.SEL, tkSTART, tk.END )
+        self.textBox.tag_add( tk.SEL, startIndex, endIndex )
+        self.textBox.see( tk.INSERT )
+        self.textBox.focus()
+    # end of USFMEditWindow.doGotoTextProblem
+
+
     def updateShownBCV( self, newReferenceVerseKey, originator=None ):
         """
         Updates self.textBox in various ways depending on the contextViewMode held by the enclosing window.
@@ -1233,11 +1777,13 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
             self.refreshTitle()
             return
 
-        if self.textBox.edit_modified(): # we need to extract the changes into self.bookText
+        self.finishBookLoad() # so that self.bookBuffer has the whole book
+        if self.textBox.edit_modified(): # we need to extract the changes into self.bookBuffer
             assert self.bookTextModified
-            self.bookText = self.getEntireText()
+            self.bookBuffer.setWindowText( self.getAllText() )
             if newBBB == oldBBB: # We haven't changed books -- update our book cache
-                self.cacheBook( newBBB )
+                self.cacheBook( newBBB, onlyEditedVerses=True ) # without joining the whole book together (if possible)
+            else: self.bookText = self.bookBuffer.getText() # ready to save it
 
         if newReferenceVerseKey is None:
             if oldVerseKey is not None:
@@ -1257,9 +1803,11 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         #markAsUnmodified = True
         if newBBB != oldBBB: # we've switched books
             if self.bookTextModified: self.doSave() # resets bookTextModified flag
+            self.bookBuffer.clear()
             self.editStatus = 'Editable'
-            self.bookText = self.getBookDataFromDisk( newBBB )
-            if self.bookText is None:
+            self.bookText = self.getBookDataFromDisk( newBBB, C if self._contextViewMode in QUICK_LOAD_VIEW_MODES else None )
+            if self.bookLoadQueue is not None: pass # The rest of the book is being read (and cached) in the background
+            elif self.bookText is None:
                 uNumber, uAbbrev = BibleOrgSysGlobals.BibleBooksCodes.getUSFMNumber(newBBB), BibleOrgSysGlobals.BibleBooksCodes.getUSFMAbbreviation(newBBB)
                 if uNumber is None or uAbbrev is None: # no use asking about creating the book
                     # NOTE: I think we've already shown this error in getBookDataFromDisk()
@@ -1279,39 +1827,37 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
                         #markAsUnmodified = False
                         self.bookTextModified = True
                         #self.doSave() # Save the chapter/verse markers (blank book outline) ## Doesn't work -- saves a blank file
-            else: self.cacheBook( newBBB )
+            else: self.cacheLoadedBook( newBBB )
 
         # Now load the desired part of the book into the edit window
-        #   while at the same time, setting self.bookTextBefore and self.bookTextAfter
-        #   (so that combining these three components, would reconstitute the entire file).
-        if self.bookText is not None:
+        #   while at the same time, putting the other verses into self.bookBuffer
+        #   (so that splicing the edited text into it would reconstitute the entire file).
+        if self.bookText is not None or self.bookLoadQueue is not None:
             self.loading = True # Turns off USFMEditWindow onTextChange notifications for now
             self.clearText() # Leaves the text box enabled
-            startingFlag = True
-
-            if self._contextViewMode == 'BeforeAndAfter':
-                if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'BeforeAndAfter2' )
-                BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
-                self.bookTextBefore = self.bookTextAfter = ''
-                numChaps = self.getNumChapters( BBB )
-                if numChaps is None: numChaps = 0
-                for thisC in range( 0, numChaps+1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
-                    except KeyError: numVerses = 0
-                    for thisV in range( 0, numVerses+1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        if thisC < intC: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisC > intC: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        elif thisV < intV-1: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisV > intV+1: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        else: # these are the displayed verses
+            self.textBox.startBulkLoad() # No need to keep track of the changed lines for each verse
+            try:
+                startingFlag = True
+
+                if self._contextViewMode == 'BeforeAndAfter':
+                    if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'BeforeAndAfter2' )
+                    BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
+                    numChaps = self.getNumChapters( BBB )
+                    if numChaps is None: numChaps = 0
+                    displayedVerseKeys = []
+                    if 0 <= intC <= numChaps:
+                        try: numVerses = self.getNumVerses( BBB, intC )
+                        except KeyError: numVerses = 0
+                        for thisV in range( max( 0, intV-1 ), min( numVerses, intV+1 ) + 1 ): # these are the displayed verses
+                            thisVerseKey = SimpleVerseKey( BBB, intC, thisV )
+                            thisVerseData = self.getCachedVerseData( thisVerseKey )
+                            displayedVerseKeys.append( thisVerseKey )
                             RC = self.textBox.index( tk.INSERT ) # Something like 55.6 for line 55, before column 6
                             self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
-                                                currentVerse=thisC==intC and thisV==intV,
+                                                currentVerse=thisV==intV,
                                                 substituteTrailingSpaces=self.markTrailingSpacesFlag,
                                                 substituteMultipleSpaces=self.markMultipleSpacesFlag )
-                            if thisC==intC and thisV==intV and thisVerseData: # this is the current verse
+                            if thisV==intV and thisVerseData: # this is the current verse
                                 row, col = RC.split( '.', 1 ) # Get our starting row/column
                                 #print( 'R.C', repr(RC), repr(row), repr(col), 'tVD', repr(thisVerseData) )
                                 lines = thisVerseData.split( '\n' )
@@ -1323,36 +1869,33 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
                                 savedCursorPosition = '{}.end'.format( int(row) + offset ) # Move the cursor to the end of the SECOND line in the verse
                                 #print( "Move to {!r} after {!r} for {}".format( savedCursorPosition, lines[0], self.moduleID ) )
                             startingFlag = False
-
-            elif self._contextViewMode == 'ByVerse':
-                if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'ByVerse2' )
-                savedCursorPosition = '1.end' # Default the cursor to the end of the first line
-                BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
-                self.bookTextBefore = self.bookTextAfter = ''
-                numChaps = self.getNumChapters( BBB )
-                if numChaps is None: numChaps = 0
-                for thisC in range( 0, numChaps+1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
-                    except KeyError: numVerses = 0
-                    for thisV in range( 0, numVerses+1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        if thisC < intC: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisC > intC: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        elif thisV < intV: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisV > intV: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        else: # this is the current verse
+                    self.fillBookBuffer( BBB, (intC,intV-1), (intC,intV+1), displayedVerseKeys )
+
+                elif self._contextViewMode == 'ByVerse':
+                    if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'ByVerse2' )
+                    savedCursorPosition = '1.end' # Default the cursor to the end of the first line
+                    BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
+                    numChaps = self.getNumChapters( BBB )
+                    if numChaps is None: numChaps = 0
+                    displayedVerseKeys = []
+                    if 0 <= intC <= numChaps:
+                        try: numVerses = self.getNumVerses( BBB, intC )
+                        except KeyError: numVerses = 0
+                        if 0 <= intV <= numVerses: # this is the current verse
+                            thisVerseKey = SimpleVerseKey( BBB, intC, intV )
+                            thisVerseData = self.getCachedVerseData( thisVerseKey )
+                            displayedVerseKeys.append( thisVerseKey )
                             #print( "tVD for", self.moduleID, thisVerseKey, thisVerseData )
+                            bridgeV = intV
                             if thisVerseData is None: # We might have a missing or bridged verse
-                                intV = int( thisV )
-                                while intV > 1:
-                                    intV -= 1 # Go back looking for bridged verses to display
-                                    thisVerseData = self.getCachedVerseData( SimpleVerseKey( BBB, thisC, intV ) )
-                                    #print( "  tVD for", self.moduleID, intV, thisVerseData )
+                                while bridgeV > 1:
+                                    bridgeV -= 1 # Go back looking for bridged verses to display
+                                    thisVerseData = self.getCachedVerseData( SimpleVerseKey( BBB, intC, bridgeV ) )
+                                    #print( "  tVD for", self.moduleID, bridgeV, thisVerseData )
                                     if thisVerseData is not None: # it seems to have worked
                                         break # Might have been nice to check/confirm that it was actually a bridged verse???
                             self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
-                                                currentVerse=thisC==intC and thisV==intV,
+                                                currentVerse=bridgeV==intV,
                                                 substituteTrailingSpaces=self.markTrailingSpacesFlag,
                                                 substituteMultipleSpaces=self.markMultipleSpacesFlag )
                             #print( 'tVD', repr(thisVerseData) )
@@ -1362,64 +1905,63 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
                                     # Assume the first line is just a USFM paragraph marker (with no other info)
                                     #print( "Move to 2.end after", repr(lines[0]), "for", self.moduleID )
                                     savedCursorPosition = '2.end' # Move the cursor to the end of the SECOND line
-
-            elif self._contextViewMode == 'BySection':
-                if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'BySection2' )
-                BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
-                sectionStart, sectionEnd = findCurrentSection( newVerseKey, self.getNumChapters, self.getNumVerses, self.getCachedVerseData )
-                intC1, intV1 = sectionStart.getChapterNumberInt(), sectionStart.getVerseNumberInt()
-                intC2, intV2 = sectionEnd.getChapterNumberInt(), sectionEnd.getVerseNumberInt()
-                self.bookTextBefore = self.bookTextAfter = ''
-                for thisC in range( 0, self.getNumChapters( BBB )+1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
-                    except KeyError: numVerses = 0
-                    for thisV in range( 0, numVerses+1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        if thisC < intC1 or (thisC==intC1 and thisV<intV1):
-                            self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisC > intC2 or (thisC==intC2 and thisV>intV2):
-                            self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        else: # we're in the section that we're interested in
+                    self.fillBookBuffer( BBB, (intC,intV), (intC,intV), displayedVerseKeys )
+
+                elif self._contextViewMode == 'BySection':
+                    if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'BySection2' )
+                    BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
+                    sectionStart, sectionEnd = findCurrentSection( newVerseKey, self.getNumChapters, self.getNumVerses, self.getCachedVerseData )
+                    intC1, intV1 = sectionStart.getChapterNumberInt(), sectionStart.getVerseNumberInt()
+                    intC2, intV2 = sectionEnd.getChapterNumberInt(), sectionEnd.getVerseNumberInt()
+                    displayedVerseKeys = []
+                    for thisC in range( max( 0, intC1 ), min( self.getNumChapters( BBB ), intC2 ) + 1 ):
+                        try: numVerses = self.getNumVerses( BBB, thisC )
+                        except KeyError: numVerses = 0
+                        for thisV in range( intV1 if thisC==intC1 else 0, (min( numVerses, intV2 ) if thisC==intC2 else numVerses) + 1 ):
+                            # we're in the section that we're interested in
+                            thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
+                            thisVerseData = self.getCachedVerseData( thisVerseKey )
+                            displayedVerseKeys.append( thisVerseKey )
+                            self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
+                                                    currentVerse=thisC==intC and thisV==intV )
+                            startingFlag = False
+                    self.fillBookBuffer( BBB, (intC1,intV1), (intC2,intV2), displayedVerseKeys )
+
+                elif self._contextViewMode == 'ByBook':
+                    if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'ByBook2' )
+                    self.bookBuffer.clear()
+                    BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
+                    for thisC in range( 0, self.getNumChapters( BBB ) + 1 ):
+                        try: numVerses = self.getNumVerses( BBB, thisC )
+                        except KeyError: numVerses = 0
+                        for thisV in range( 0, numVerses+1 ):
+                            thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
+                            thisVerseData = self.getCachedVerseData( thisVerseKey )
+                            #print( 'tVD', repr(thisVerseData) )
                             self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
                                                     currentVerse=thisC==intC and thisV==intV )
                             startingFlag = False
 
-            elif self._contextViewMode == 'ByBook':
-                if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'ByBook2' )
-                self.bookTextBefore = self.bookTextAfter = ''
-                BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
-                for thisC in range( 0, self.getNumChapters( BBB ) + 1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
+                elif self._contextViewMode == 'ByChapter':
+                    if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'ByChapter2' )
+                    BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
+                    displayedVerseKeys = []
+                    try: numVerses = self.getNumVerses( BBB, intC )
                     except KeyError: numVerses = 0
-                    for thisV in range( 0, numVerses+1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        #print( 'tVD', repr(thisVerseData) )
-                        self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
-                                                currentVerse=thisC==intC and thisV==intV )
-                        startingFlag = False
-
-            elif self._contextViewMode == 'ByChapter':
-                if BibleOrgSysGlobals.debugFlag and debuggingThisModule: print( 'USFMEditWindow.updateShownBCV', 'ByChapter2' )
-                BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
-                self.bookTextBefore = self.bookTextAfter = ''
-                for thisC in range( 0, self.getNumChapters( BBB ) + 1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
-                    except KeyError: numVerses = 0
-                    for thisV in range( 0, numVerses + 1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        if thisC < intC: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisC > intC: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        else:
+                    if 0 <= intC <= self.getNumChapters( BBB ):
+                        for thisV in range( 0, numVerses + 1 ):
+                            thisVerseKey = SimpleVerseKey( BBB, intC, thisV )
+                            thisVerseData = self.getCachedVerseData( thisVerseKey )
+                            displayedVerseKeys.append( thisVerseKey )
                             self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
-                                                currentVerse=thisC==intC and thisV==intV )
+                                                    currentVerse=thisV==intV )
                             startingFlag = False
+                    self.fillBookBuffer( BBB, (intC,0), (intC,numVerses), displayedVerseKeys )
 
-            else:
-                logging.critical( exp("USFMEditWindow.updateShownBCV: Bad context view mode {}").format( self._contextViewMode ) )
-                if BibleOrgSysGlobals.debugFlag: halt # Unknown context view mode
+                else:
+                    logging.critical( exp("USFMEditWindow.updateShownBCV: Bad context view mode {}").format( self._contextViewMode ) )
+                    if BibleOrgSysGlobals.debugFlag: halt # Unknown context view mode
+            finally: self.textBox.endBulkLoad() # even if something went wrong
 
         self.textBox.highlightAllPatterns( self.patternsToHighlight )
 
@@ -1430,8 +1972,9 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
 
         # Make sure we can see what we're supposed to be looking at
         desiredMark = 'C{}V{}'.format( newVerseKey.getChapterNumber(), newVerseKey.getVerseNumber() )
-        try: self.textBox.see( desiredMark )
-        except tk.TclError: print( exp("USFMEditWindow.updateShownBCV couldn't find {} mark {!r}").format( newVerseKey.getBBB(), desiredMark ) )
+        desiredIndex = self.textBox.getVerseLineIndex( desiredMark )
+        if desiredIndex is None: print( exp("USFMEditWindow.updateShownBCV couldn't find {} mark {!r}").format( newVerseKey.getBBB(), desiredMark ) )
+        else: self.textBox.see( desiredIndex )
         self.lastCVMark = desiredMark
 
         # Put the cursor back where it was (if necessary)
@@ -1451,20 +1994,11 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
         #if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
             #print( exp("USFMEditWindow.getEntireText()") )
 
-        # Get the text from the edit box and clean it up
-        editBoxText = self.getAllText()
-
-        # Add the stuff that wasn't displayed before and after the currently displayed verses
-        try: entireText = self.bookTextBefore + editBoxText + self.bookTextAfter
-        except TypeError:
-            # Probably self.bookTextBefore and self.bookTextAfter are both None
-            #   Can happen if the book navigated to doesn't actually exist (and isn't created)
-            if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                assert self.bookTextBefore is None
-                assert self.bookTextAfter is None
-            #print( "getEntireText", repr(self.bookTextBefore), repr(editBoxText), repr(self.bookTextAfter) )
-            entireText = editBoxText
-        return entireText
+        # Splice the text from the edit box in between the stuff that wasn't displayed
+        #   (The buffer is empty if the book navigated to doesn't actually exist and isn't created)
+        self.finishBookLoad() # so that self.bookBuffer has the whole book
+        self.bookBuffer.setWindowText( self.getAllText() )
+        return self.bookBuffer.getText()
     # end of USFMEditWindow.getEntireText
 
 
@@ -1552,13 +2086,18 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
                 with open( filepath, mode='wt', encoding=self.internalBible.encoding, newline='\r\n' ) as theFile:
                     theFile.write( self.bookText )
                 self.rememberFileTimeAndSize()
+                self.bookFileChunkByteOffsets = None # The chapters have probably moved
                 BBB = self.currentVerseKey.getBBB()
                 self.internalBible.bookNeedsReloading[BBB] = True
                 self.textBox.edit_modified( tk.FALSE ) # clear Tkinter modified flag
                 self.bookTextModified = False
                 #self.internalBible.unloadBooks() # coz they're now out of date
                 #self.internalBible.reloadBook( self.currentVerseKey.getBBB() ) # coz it's now out of date -- what? why?
-                self.cacheBook( BBB ) # Wasted if we're closing the window/program, but important if we're continuing to edit
+                self.cacheBook( BBB, onlyEditedVerses=True ) # Wasted if we're closing the window/program, but important if we're continuing to edit
+                if self.cachedBookText is None and self.cachedNumLines is not None: # the edited chapters were spliced into the cache
+                    self.cachedBookText = self.bookText # which is what we just saved
+                self.saveBookIndex( BBB )
+                updateBibleBookAutocompleteWords( self, BBB, self.bookText )
                 self.refreshTitle()
                 logChangedFile( self.parentApp.currentUserName, self.parentApp.loggingFolderPath, self.projectName, BBB, self.bookText )
             else: self.doSaveAs()
@@ -1711,6 +2250,24 @@ class USFMEditWindow( InternalBibleResourceWindowFunctions, TextEditWindow ):
     # end of USFMEditWindow.doViewLog
 
 
+    def doClose( self, event=None ):
+        """
+        Called to finally and irreversibly remove this window from our list and close it.
+
+        Stops any text checks or book reads and releases any autocomplete words shared with other windows on this project first.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("USFMEditWindow.doClose( {} )").format( event ) )
+
+        self.cancelTextCheck()
+        if self.bookLoadID is not None: # The thread still closes the book file when it's finished
+            self.after_cancel( self.bookLoadID )
+            self.bookLoadID = self.bookLoadQueue = None
+        releaseAutocompleteWords( self )
+        InternalBibleResourceWindowFunctions.doClose( self, event )
+    # end of USFMEditWindow.doClose
+
+
     #def xxcloseEditor( self ):
         #"""
         #"""
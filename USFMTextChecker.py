@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# USFMTextChecker.py
+#
+# Incremental checking of USFM text as it's edited
+#
+# Copyright (C) 2017 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Keeps the results of checking each line of the USFM text in an edit window
+    so that only the lines touched by an edit need to be checked again.
+
+    class USFMTextChecker
+        setText( text, invalidCombinations, checkForPairs, stopEvent=None )
+        updateLines( firstLineIndex, oldEndLineIndex, newLines )
+        getFirstLineError()
+        hasBlankLine(), hasMultipleSpaces(), hasTrailingSpace()
+        getFirstInvalidCombination(), getInvalidCombinationPositions( firstLineIndex=0, endLineIndex=None )
+        takeChangedLineRange()
+        getFirstPairProblem()
+"""
+
+from gettext import gettext as _
+
+LastModifiedDate = '2017-11-21' # by RJH
+ShortProgName = "USFMTextChecker"
+ProgName = "Biblelator USFM Text Checker"
+ProgVersion = '0.41'
+ProgNameVersion = '{} v{}'.format( ProgName, ProgVersion )
+ProgNameVersionDate = '{} {} {}'.format( ProgNameVersion, _("last modified"), LastModifiedDate )
+
+debuggingThisModule = False
+
+
+import sys, re
+import bisect
+
+# BibleOrgSys imports
+if __name__ == '__main__': sys.path.append( '../BibleOrgSys/' )
+import BibleOrgSysGlobals
+
+# Biblelator imports
+from MultiPatternSearch import compileMultiPatternAutomaton, findAllPatterns
+
+
+STOP_CHECK_LINES = 500 # Number of lines checked between looking for a stop request
+
+
+
+def exp( messageString ):
+    """
+    Expands the message string in debug mode.
+    Prepends the module name to a error or warning message string
+        if we are in debug mode.
+    Returns the new string.
+    """
+    try: nameBit, errorBit = messageString.split( ': ', 1 )
+    except ValueError: nameBit, errorBit = '', messageString
+    if BibleOrgSysGlobals.debugFlag or debuggingThisModule:
+        nameBit = '{}{}{}'.format( ShortProgName, '.' if nameBit else '', nameBit )
+    return '{}{}'.format( nameBit+': ' if nameBit else '', errorBit )
+# end of exp
+
+
+
+class USFMTextChecker:
+    """
+    Checks USFM text one line at a time and keeps the results for each line
+        along with totals (e.g., of chapter and verse markers) for the whole text.
+
+    When some lines are edited, the results for the old lines are subtracted from the totals,
+        and the results for the new lines are added.
+    The line numbers of lines with errors or with bracket pairs are kept in sorted lists
+        so that the first (or last) one can be found without going through all the lines.
+
+    The pairs are matched up in a single pass through each line with a stack of open starts for each pair.
+    Only the starts and ends that aren't matched within their line are kept,
+        so the lines with those are the only ones that need to be looked at to match up the whole text.
+
+    None of the invalid combinations or pairs are expected to contain a newline character,
+        and the pair starts and ends are all expected to be different.
+    """
+    def __init__( self ):
+        """
+        """
+        self.invalidCombinations, self.checkForPairs = (), ()
+        self.pairRegex, self.pairLookup = None, {}
+        self.combinationAutomaton = compileMultiPatternAutomaton( self.invalidCombinations )
+        self.clear()
+    # end of USFMTextChecker.__init__
+
+
+    def clear( self ):
+        """
+        Forget any text that was checked (e.g., because the whole text has been replaced).
+        """
+        self.lineResults = None # A tuple for each line -- see _checkLine
+        self.numChapterMarkers = self.numVerseMarkers = 0
+        self.numBlankLines = self.numMultipleSpaceLines = self.numTrailingSpaceLines = 0
+        self.errorLineIndices = [] # Sorted line indices of lines with errors
+        self.combinationLineIndices = [] # Sorted line indices of lines with invalid combinations
+        self.pairLineIndices = [[] for pair in self.checkForPairs] # Sorted line indices of lines with unmatched pairs
+        self.changedLineRange = None # (firstLineIndex,endLineIndex) of the lines checked since takeChangedLineRange
+    # end of USFMTextChecker.clear
+
+
+    def isValid( self, invalidCombinations, checkForPairs ):
+        """
+        Returns True if we have results for the text (checked with these combinations and pairs).
+        """
+        return self.lineResults is not None \
+            and tuple( invalidCombinations ) == self.invalidCombinations \
+            and tuple( checkForPairs ) == self.checkForPairs
+    # end of USFMTextChecker.isValid
+
+
+    def __len__( self ): return len( self.lineResults ) if self.lineResults is not None else 0
+
+
+    def _checkLine( self, line ):
+        """
+        Check one line of USFM text.
+
+        Returns a tuple with the results.
+        """
+        if not line: lineError = None
+        elif line[0] == '\\':
+            marker = line.split( None, 1 )[0][1:] # First token, but without the first (backslash) character
+            #print( "  Found marker: {!r}".format( marker ) )
+            lineError = None if marker in BibleOrgSysGlobals.USFMMarkers \
+                            else _("Not a recognized USFM marker {!r}").format( marker )
+        else: lineError = _("Line should start with backslash, not '{}{}'").format( line[:8], '…' if len(line)>8 else '' )
+
+        segmentMatches = tuple( findAllPatterns( self.combinationAutomaton, line ) ) # (column,segmentIndex) tuples
+
+        return line.count( '\\c ' ), line.count( '\\v ' ), not line, '  ' in line, line.endswith( ' ' ), \
+                lineError, segmentMatches, self._matchPairs( line )
+    # end of USFMTextChecker._checkLine
+
+
+    def _compilePairs( self ):
+        """
+        Make a single regular expression that finds the starts and ends of all the pairs
+            (even if they overlap), and a dictionary to say which pair each one belongs to.
+        """
+        self.pairLookup = {}
+        for pairIndex,(pairStart,pairEnd) in enumerate( self.checkForPairs ):
+            self.pairLookup.setdefault( pairStart, (pairIndex,True) )
+            self.pairLookup.setdefault( pairEnd, (pairIndex,False) )
+        self.pairRegex = re.compile( '(?=({}))'.format( '|'.join( re.escape( pairString )
+                                for pairString in sorted( self.pairLookup, key=len, reverse=True ) ) ) ) \
+                            if self.pairLookup else None
+    # end of USFMTextChecker._compilePairs
+
+
+    def _matchPairs( self, line ):
+        """
+        Match up the pairs in one line in a single pass, with a stack of open starts for each pair.
+
+        Returns a tuple of (pairIndex, unmatchedEndColumns, unmatchedStartColumns) tuples
+            for the pairs that aren't all matched within the line.
+            (Any unmatched ends will all be before any unmatched starts.)
+        """
+        if self.pairRegex is None: return ()
+        openStartColumns, unmatchedEndColumns = {}, {}
+        for match in self.pairRegex.finditer( line ):
+            pairIndex, isStart = self.pairLookup[match.group( 1 )]
+            if isStart: openStartColumns.setdefault( pairIndex, [] ).append( match.start() )
+            elif openStartColumns.get( pairIndex ): openStartColumns[pairIndex].pop()
+            else: unmatchedEndColumns.setdefault( pairIndex, [] ).append( match.start() )
+        return tuple( (pairIndex, tuple( unmatchedEndColumns.get( pairIndex, () ) ), tuple( openStartColumns.get( pairIndex, () ) ))
+                        for pairIndex in sorted( set( openStartColumns ) | set( unmatchedEndColumns ) )
+                        if openStartColumns.get( pairIndex ) or pairIndex in unmatchedEndColumns )
+    # end of USFMTextChecker._matchPairs
+
+
+    def _addLineResult( self, lineResult, sign ):
+        """
+        Add (sign=1) or subtract (sign=-1) the results for a line to/from the totals.
+        """
+        numChapterMarkers, numVerseMarkers, isBlank, hasMultipleSpaces, hasTrailingSpace, \
+                                                lineError, segmentMatches, pairResults = lineResult
+        self.numChapterMarkers += sign * numChapterMarkers
+        self.numVerseMarkers += sign * numVerseMarkers
+        if isBlank: self.numBlankLines += sign
+        if hasMultipleSpaces: self.numMultipleSpaceLines += sign
+        if hasTrailingSpace: self.numTrailingSpaceLines += sign
+    # end of USFMTextChecker._addLineResult
+
+
+    def _indexLine( self, lineIndex, lineResult ):
+        """
+        Add the line index to the sorted lists that it belongs in.
+        """
+        if lineResult[5] is not None: bisect.insort( self.errorLineIndices, lineIndex )
+        if lineResult[6]: bisect.insort( self.combinationLineIndices, lineIndex )
+        for pairResult in lineResult[7]: bisect.insort( self.pairLineIndices[pairResult[0]], lineIndex )
+    # end of USFMTextChecker._indexLine
+
+
+    def _unindexLine( self, lineIndex, lineResult ):
+        """
+        Remove the line index from the sorted lists that it's in.
+        """
+        def removeIndex( sortedIndices ):
+            del sortedIndices[bisect.bisect_left( sortedIndices, lineIndex )]
+        if lineResult[5] is not None: removeIndex( self.errorLineIndices )
+        if lineResult[6]: removeIndex( self.combinationLineIndices )
+        for pairResult in lineResult[7]: removeIndex( self.pairLineIndices[pairResult[0]] )
+    # end of USFMTextChecker._unindexLine
+
+
+    def _reindexLines( self ):
+        """
+        Rebuild the sorted lists of line indices (after lines have been added or removed).
+        """
+        self.errorLineIndices, self.combinationLineIndices = [], []
+        self.pairLineIndices = [[] for pair in self.checkForPairs]
+        for lineIndex,lineResult in enumerate( self.lineResults ):
+            if lineResult[5] is not None: self.errorLineIndices.append( lineIndex )
+            if lineResult[6]: self.combinationLineIndices.append( lineIndex )
+            for pairResult in lineResult[7]: self.pairLineIndices[pairResult[0]].append( lineIndex )
+    # end of USFMTextChecker._reindexLines
+
+
+    def setText( self, text, invalidCombinations, checkForPairs, stopEvent=None ):
+        """
+        Check all the lines of the text.
+
+        If a stopEvent (threading.Event) is given, it's looked at every STOP_CHECK_LINES lines
+            and if it's set, the check is abandoned (leaving no results).
+
+        Returns True if the text was all checked.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("setText( {:,} chars, {}, {} )").format( len(text), len(invalidCombinations), len(checkForPairs) ) )
+
+        self.invalidCombinations, self.checkForPairs = tuple( invalidCombinations ), tuple( checkForPairs )
+        self.combinationAutomaton = compileMultiPatternAutomaton( self.invalidCombinations )
+        self._compilePairs()
+        self.clear()
+        lines = text.split( '\n' )
+        lineResults = []
+        for startIndex in range( 0, len(lines), STOP_CHECK_LINES ):
+            if stopEvent is not None and stopEvent.is_set(): return False
+            lineResults.extend( self._checkLine( line ) for line in lines[startIndex:startIndex+STOP_CHECK_LINES] )
+        self.lineResults = lineResults
+        for lineResult in self.lineResults: self._addLineResult( lineResult, 1 )
+        self._reindexLines()
+        self.changedLineRange = 0, len(lineResults)
+        return True
+    # end of USFMTextChecker.setText
+
+
+    def updateLines( self, firstLineIndex, oldEndLineIndex, newLines ):
+        """
+        Replace the old lines from firstLineIndex up to (but not including) oldEndLineIndex
+            with the new lines and check them.
+        """
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            print( exp("updateLines( {}, {}, {} )").format( firstLineIndex, oldEndLineIndex, len(newLines) ) )
+            assert 0 <= firstLineIndex <= oldEndLineIndex <= len(self.lineResults)
+
+        oldResults = self.lineResults[firstLineIndex:oldEndLineIndex]
+        newResults = [self._checkLine( line ) for line in newLines]
+        for lineResult in oldResults: self._addLineResult( lineResult, -1 )
+        for lineResult in newResults: self._addLineResult( lineResult, 1 )
+        self.lineResults[firstLineIndex:oldEndLineIndex] = newResults
+        if len(newResults) == len(oldResults): # no lines have moved
+            for lineIndex,oldResult,newResult in zip( range( firstLineIndex, oldEndLineIndex ), oldResults, newResults ):
+                self._unindexLine( lineIndex, oldResult )
+                self._indexLine( lineIndex, newResult )
+        else: self._reindexLines()
+
+        newEndLineIndex = firstLineIndex + len(newResults)
+        if self.changedLineRange is None: self.changedLineRange = firstLineIndex, newEndLineIndex
+        else: # Combine the ranges (moving the end of the previous one if lines were added or removed before it)
+            previousFirstLineIndex, previousEndLineIndex = self.changedLineRange
+            if previousEndLineIndex >= oldEndLineIndex: previousEndLineIndex += newEndLineIndex - oldEndLineIndex
+            else: previousEndLineIndex = min( previousEndLineIndex, newEndLineIndex )
+            self.changedLineRange = min( previousFirstLineIndex, firstLineIndex ), max( previousEndLineIndex, newEndLineIndex )
+    # end of USFMTextChecker.updateLines
+
+
+    def getFirstLineError( self ):
+        """
+        Returns the error message for the first line which doesn't start with a valid USFM marker
+            or None.
+        """
+        return self.lineResults[self.errorLineIndices[0]][5] if self.errorLineIndices else None
+    # end of USFMTextChecker.getFirstLineError
+
+
+    def hasBlankLine( self ):
+        """
+        Returns True if there's a blank line (not counting an empty line after a final newline).
+        """
+        numBlankLines = self.numBlankLines
+        if len(self.lineResults) > 1 and self.lineResults[-1][2]: numBlankLines -= 1
+        return numBlankLines > 0
+    # end of USFMTextChecker.hasBlankLine
+
+
+    def hasMultipleSpaces( self ):
+        """
+        Returns True if there's more than one space together anywhere.
+        """
+        return self.numMultipleSpaceLines > 0
+    # end of USFMTextChecker.hasMultipleSpaces
+
+
+    def hasTrailingSpace( self ):
+        """
+        Returns True if a line ends with a space (before a newline).
+        """
+        numTrailingSpaceLines = self.numTrailingSpaceLines
+        if self.lineResults[-1][4]: numTrailingSpaceLines -= 1 # There's no newline after the last line
+        return numTrailingSpaceLines > 0
+    # end of USFMTextChecker.hasTrailingSpace
+
+
+    def getFirstInvalidCombination( self ):
+        """
+        Returns None or a 3-tuple with the first invalid combination in the text,
+            and its lineIndex and column.
+        """
+        if not self.combinationLineIndices: return None
+        lineIndex = self.combinationLineIndices[0]
+        column, segmentIndex = self.lineResults[lineIndex][6][0]
+        return self.invalidCombinations[segmentIndex], lineIndex, column
+    # end of USFMTextChecker.getFirstInvalidCombination
+
+
+    def getInvalidCombinationPositions( self, firstLineIndex=0, endLineIndex=None ):
+        """
+        Returns a list of (lineIndex, column, segment) tuples
+            for every invalid combination in the text (e.g., to highlight them)
+            or just in the lines from firstLineIndex up to (but not including) endLineIndex.
+        """
+        startIndex = bisect.bisect_left( self.combinationLineIndices, firstLineIndex )
+        endIndex = len(self.combinationLineIndices) if endLineIndex is None \
+                    else bisect.bisect_left( self.combinationLineIndices, endLineIndex )
+        return [(lineIndex, column, self.invalidCombinations[segmentIndex])
+                        for lineIndex in self.combinationLineIndices[startIndex:endIndex]
+                            for column,segmentIndex in self.lineResults[lineIndex][6]]
+    # end of USFMTextChecker.getInvalidCombinationPositions
+
+
+    def takeChangedLineRange( self ):
+        """
+        Returns None or a 2-tuple with the (firstLineIndex,endLineIndex) of the lines
+            which have been checked since this was last called
+            (e.g., so that only their highlighting needs to be redone).
+        """
+        changedLineRange, self.changedLineRange = self.changedLineRange, None
+        return changedLineRange
+    # end of USFMTextChecker.takeChangedLineRange
+
+
+    def getFirstPairProblem( self ):
+        """
+        Check that the pairs (e.g., brackets) match up in the text
+            by going through the lines with unmatched starts or ends with a stack for each pair.
+
+        Returns None or a 5-tuple with the problem, pairStart, pairEnd, lineIndex and column
+            where the problem is 'NoEnd' (a start without a following end)
+            or 'NoStart' (an end without a preceding start).
+        If there's more than one problem, the one that's first in the text is returned.
+        """
+        firstProblem = None
+        for pairIndex,(pairStart,pairEnd) in enumerate( self.checkForPairs ):
+            openStartPositions = [] # The stack of (lineIndex,column) for this pair
+            for lineIndex in self.pairLineIndices[pairIndex]:
+                for pairResult in self.lineResults[lineIndex][7]:
+                    if pairResult[0] == pairIndex: break
+                unmatchedEndColumns, unmatchedStartColumns = pairResult[1], pairResult[2]
+                numOpen = len( openStartPositions )
+                if len(unmatchedEndColumns) > numOpen:
+                    problem = 'NoStart', pairStart, pairEnd, lineIndex, unmatchedEndColumns[numOpen]
+                    break
+                del openStartPositions[numOpen-len(unmatchedEndColumns):]
+                openStartPositions.extend( (lineIndex,column) for column in unmatchedStartColumns )
+            else: # no unmatched end
+                if not openStartPositions: continue
+                problem = ( 'NoEnd', pairStart, pairEnd ) + openStartPositions[0]
+            if firstProblem is None or problem[3:] < firstProblem[3:]: firstProblem = problem
+        return firstProblem
+    # end of USFMTextChecker.getFirstPairProblem
+# end of class USFMTextChecker
+
+
+
+def demo():
+    """
+    Demonstrate checking some USFM text and then editing a line.
+    """
+    if BibleOrgSysGlobals.verbosityLevel > 0: print( ProgNameVersion )
+
+    USFMText = '\\id GEN\n\\c 1\n\\p\n\\v 1 In the beginning (God created.\n\\v 2 The end.\n'
+    textChecker = USFMTextChecker()
+    textChecker.setText( USFMText, [',,',' ,'], [('(',')')] )
+    print( "  {} lines with {} chapter and {} verse markers: {}" \
+            .format( len(textChecker), textChecker.numChapterMarkers, textChecker.numVerseMarkers, textChecker.getFirstPairProblem() ) )
+    textChecker.updateLines( 3, 4, ['\\v 1 In the beginning (God) created.'] )
+    print( "  After editing: {}".format( textChecker.getFirstPairProblem() ) )
+# end of demo
+
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( ProgName, ProgVersion )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    demo()
+
+    BibleOrgSysGlobals.closedown( ProgName, ProgVersion )
+# end of USFMTextChecker.py